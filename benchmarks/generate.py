@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+벤치마크용 합성 데이터 생성기 (seed가 같으면 항상 같은 파일).
+
+  genome.fna                  염색체 여러 개, 80자 줄바꿈
+  annotation.gtf              NCBI Gnomon 형식 - gene/transcript/exon/CDS/start_codon 행,
+                              multi-exon, 양쪽 strand, gene당 isoform 1~4개 (exon 일부 건너뜀)
+  proteins.fasta              GTF의 protein_id별 단백질 서열 (길이는 실제 분포와 비슷한 log-normal)
+  blast_results.txt           outfmt 6, query당 hit 0~5개 (같은 query는 연속)
+  loc_protein_map.tsv         GTF와 같은 LOC → protein_id 매핑 (1_extract_loc_to_protein.py 출력 형식)
+  human_symbol_map_uniprot.tsv   BLAST subject accession → gene symbol
+
+크기는 게놈 염기 수로 지정하고 (--size 1M ~ 3G), 나머지는 gene 간격(--gene-spacing)에 맞춰 정해집니다.
+같은 설정으로 이미 만든 디렉토리가 있으면 다시 만들지 않습니다 (dataset.json 비교).
+
+  python generate.py --size 10M -o data/10M
+"""
+
+import sys
+import json
+import math
+import random
+import argparse
+import os
+from typing import Dict, List, NamedTuple, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BENCH_DIR, 'data')
+
+# 생성 규칙이 바뀌면 올려서 이전 데이터셋을 다시 만들게 함
+GENERATOR_VERSION = 1
+
+FASTA_LINE_WIDTH = 80
+CHUNK_BP = 1 << 20
+
+_SIZE_UNITS = {"": 1, "K": 10 ** 3, "M": 10 ** 6, "G": 10 ** 9}
+_BASES = bytes(b"ACGT"[i % 4] for i in range(256))
+_AMINO_ACIDS = "ACDEFGHIKLMNPQRSTVWY"
+
+
+class Dataset(NamedTuple):
+    """생성한 파일 경로."""
+    genome: str
+    gtf: str
+    proteins: str
+    blast: str
+    loc_map: str
+    symbol_map: str
+
+
+def parse_size(value: str) -> int:
+    """"500K", "10M", "2.5G", "1MB" → 염기 수 (argparse type)."""
+    text = value.strip().upper().rstrip("B")
+    unit = text[-1] if text and text[-1] in _SIZE_UNITS else ""
+    try:
+        size = int(float(text[:len(text) - len(unit)]) * _SIZE_UNITS[unit])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {value}")
+    if size < 10000:
+        raise argparse.ArgumentTypeError(f"size must be at least 10K: {value}")
+    return size
+
+
+def format_size(size: int) -> str:
+    """10000000 → "10M" (데이터 디렉토리 이름용)."""
+    for unit in ("G", "M", "K"):
+        if size >= _SIZE_UNITS[unit] and size % (_SIZE_UNITS[unit] // 10) == 0:
+            return f"{size / _SIZE_UNITS[unit]:g}{unit}"
+    return str(size)
+
+
+def dataset_paths(out_dir: str) -> Dataset:
+    return Dataset(
+        genome=os.path.join(out_dir, 'genome.fna'),
+        gtf=os.path.join(out_dir, 'annotation.gtf'),
+        proteins=os.path.join(out_dir, 'proteins.fasta'),
+        blast=os.path.join(out_dir, 'blast_results.txt'),
+        loc_map=os.path.join(out_dir, 'loc_protein_map.tsv'),
+        symbol_map=os.path.join(out_dir, 'human_symbol_map_uniprot.tsv'),
+    )
+
+
+def chromosome_lengths(rng: random.Random, total_bp: int) -> Dict[str, int]:
+    """전체 크기를 염색체 여러 개로 나눔 (큰 것부터 작은 것까지 섞이도록)."""
+    count = max(1, min(50, total_bp // 200000))
+    weights = [rng.uniform(0.3, 1.0) for _ in range(count)]
+    scale = total_bp / sum(weights)
+    lengths = {f"NC_{i + 1:06d}.1": max(1000, int(w * scale)) for i, w in enumerate(weights)}
+    return lengths
+
+
+def generate_genome(path: str, rng: random.Random, lengths: Dict[str, int]):
+    """염색체별 random 서열 (1 Mbp 단위로 생성해서 씀)."""
+    with open(path, "w") as f:
+        for chrom, length in lengths.items():
+            f.write(f">{chrom} synthetic chromosome\n")
+            remaining = length
+            carry = ""
+            while remaining > 0:
+                n = min(CHUNK_BP, remaining)
+                remaining -= n
+                seq = carry + rng.randbytes(n).translate(_BASES).decode("ascii")
+                cut = len(seq) - len(seq) % FASTA_LINE_WIDTH if remaining > 0 else len(seq)
+                f.writelines(seq[i:i + FASTA_LINE_WIDTH] + "\n" for i in range(0, cut, FASTA_LINE_WIDTH))
+                carry = seq[cut:]
+
+
+def _gtf_line(chrom: str, feature: str, start: int, end: int, strand: str, frame: str, attrs: str) -> str:
+    return f"{chrom}\tGnomon\t{feature}\t{start}\t{end}\t.\t{strand}\t{frame}\t{attrs}\n"
+
+
+def generate_gtf(path: str, rng: random.Random, lengths: Dict[str, int],
+                 gene_spacing: int) -> List[Tuple[str, str, str, str]]:
+    """
+    NCBI Gnomon 형식 GTF를 씁니다.
+
+    Returns:
+        (gene_id, protein_id, product, transcript_id) - GTF 순서, loc_protein_map.tsv 행
+    """
+    loc_rows = []
+    gene_number = 100000
+    protein_number = 0
+
+    with open(path, "w") as f:
+        f.write("#gtf-version 2.2\n#!genome-build synthetic\n")
+        for chrom, length in lengths.items():
+            pos = rng.randrange(1, gene_spacing)
+            while True:
+                exon_count = rng.randint(1, 12)
+                exon_lengths = [rng.randint(40, 400) for _ in range(exon_count)]
+                intron_lengths = [rng.randint(60, 3000) for _ in range(exon_count - 1)]
+                gene_end = pos + sum(exon_lengths) + sum(intron_lengths) - 1
+                if gene_end >= length:
+                    break
+
+                gene_number += 1
+                gene_id = f"LOC{gene_number}"
+                strand = rng.choice("+-")
+                gene_attrs = (f'gene_id "{gene_id}"; transcript_id ""; db_xref "GeneID:{gene_number}"; '
+                              f'description "synthetic protein {gene_number}"; gbkey "Gene"; gene "{gene_id}"; '
+                              f'gene_biotype "protein_coding"; ')
+                f.write(_gtf_line(chrom, "gene", pos, gene_end, strand, ".", gene_attrs))
+
+                exons = []
+                start = pos
+                for i, exon_length in enumerate(exon_lengths):
+                    exons.append((start, start + exon_length - 1))
+                    start += exon_length + (intron_lengths[i] if i < len(intron_lengths) else 0)
+
+                for isoform in range(1, rng.randint(1, 4) + 1):
+                    # 첫 isoform은 모든 exon, 나머지는 가운데 exon을 일부 건너뜀
+                    chosen = [e for i, e in enumerate(exons)
+                              if isoform == 1 or i in (0, len(exons) - 1) or rng.random() > 0.3]
+                    if strand == "-":
+                        chosen.reverse()
+
+                    protein_number += 1
+                    transcript_id = f"XM_{protein_number:09d}.1"
+                    protein_id = f"XP_{protein_number:09d}.1"
+                    product = f"synthetic protein {gene_number} isoform X{isoform}"
+                    loc_rows.append((gene_id, protein_id, product, transcript_id))
+
+                    common = (f'gene_id "{gene_id}"; transcript_id "{transcript_id}"; '
+                              f'db_xref "GeneID:{gene_number}"; ')
+                    f.write(_gtf_line(chrom, "transcript", min(e[0] for e in chosen), max(e[1] for e in chosen),
+                                      strand, ".", common + f'gbkey "mRNA"; gene "{gene_id}"; '
+                                      f'model_evidence "Supporting evidence includes similarity to: '
+                                      f'{rng.randint(1, 50)} Proteins"; product "{product}"; '
+                                      f'transcript_biotype "mRNA"; '))
+
+                    cds_offset = 0
+                    for exon_number, (exon_start, exon_end) in enumerate(chosen, 1):
+                        f.write(_gtf_line(chrom, "exon", exon_start, exon_end, strand, ".",
+                                          common + f'gene "{gene_id}"; product "{product}"; '
+                                          f'transcript_biotype "mRNA"; exon_number "{exon_number}"; '))
+                    for exon_number, (exon_start, exon_end) in enumerate(chosen, 1):
+                        frame = (3 - cds_offset % 3) % 3
+                        f.write(_gtf_line(chrom, "CDS", exon_start, exon_end, strand, str(frame),
+                                          common + f'db_xref "GenBank:{protein_id}"; gbkey "CDS"; '
+                                          f'gene "{gene_id}"; product "{product}"; protein_id "{protein_id}"; '
+                                          f'exon_number "{exon_number}"; '))
+                        cds_offset += exon_end - exon_start + 1
+
+                    codon_start = chosen[0][0] if strand == "+" else chosen[0][1] - 2
+                    f.write(_gtf_line(chrom, "start_codon", codon_start, codon_start + 2, strand, "0",
+                                      common + f'gene "{gene_id}"; product "{product}"; '
+                                      f'protein_id "{protein_id}"; exon_number "1"; '))
+
+                pos = gene_end + max(1, int(rng.expovariate(1 / gene_spacing)))
+
+    return loc_rows
+
+
+def write_loc_map(path: str, loc_rows: List[Tuple[str, str, str, str]]):
+    with open(path, "w") as f:
+        f.write("gene_id\tprotein_id\tproduct\ttranscript_id\n")
+        f.writelines("\t".join(row) + "\n" for row in loc_rows)
+
+
+def generate_proteins(path: str, rng: random.Random, protein_ids: List[str]):
+    """protein_id별 random 단백질 (길이 중앙값 ~400 aa)."""
+    with open(path, "w") as f:
+        for protein_id in protein_ids:
+            length = max(30, min(5000, int(rng.lognormvariate(math.log(400), 0.6))))
+            seq = "M" + "".join(rng.choices(_AMINO_ACIDS, k=length - 1))
+            f.write(f">{protein_id}\n")
+            f.writelines(seq[i:i + FASTA_LINE_WIDTH] + "\n" for i in range(0, len(seq), FASTA_LINE_WIDTH))
+
+
+def generate_symbol_map(path: str, rng: random.Random, count: int) -> List[Tuple[str, str]]:
+    """UniProt 형식 accession → symbol. Returns: [(accession, symbol), ...]"""
+    entries = []
+    seen = set()
+    while len(entries) < count:
+        accession = (rng.choice("OPQ") + str(rng.randrange(10))
+                     + "".join(rng.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789", k=3)) + str(rng.randrange(10)))
+        if accession in seen:
+            continue
+        seen.add(accession)
+        entries.append((accession, f"SYM{len(entries) + 1}"))
+
+    with open(path, "w") as f:
+        f.write("uniprot_id\tgene_symbol\n")
+        f.writelines(f"{accession}\t{symbol}\n" for accession, symbol in entries)
+    return entries
+
+
+def generate_blast(path: str, rng: random.Random, protein_ids: List[str], subjects: List[Tuple[str, str]]):
+    """outfmt 6 (12컬럼). query의 15%는 hit 없음, 나머지는 1~5개 (bitscore 내림차순)."""
+    with open(path, "w") as f:
+        for protein_id in protein_ids:
+            if rng.random() < 0.15:
+                continue
+            hits = []
+            for _ in range(rng.randint(1, 5)):
+                accession, symbol = rng.choice(subjects)
+                length = rng.randint(30, 1500)
+                pident = rng.uniform(15, 100)
+                mismatch = int(length * (100 - pident) / 100)
+                qstart = rng.randint(1, 50)
+                sstart = rng.randint(1, 50)
+                evalue = 10 ** -rng.uniform(5, 180)
+                bitscore = length * pident / 100 * rng.uniform(1.5, 2.2)
+                hits.append((bitscore, f"{protein_id}\tsp|{accession}|{symbol}_HUMAN\t{pident:.3f}\t{length}"
+                                       f"\t{mismatch}\t{rng.randint(0, 10)}\t{qstart}\t{qstart + length - 1}"
+                                       f"\t{sstart}\t{sstart + length - 1}\t{evalue:.2e}\t{bitscore:.1f}\n"))
+            hits.sort(key=lambda hit: -hit[0])
+            f.writelines(line for _, line in hits)
+
+
+def generate_dataset(out_dir: str, size: int, seed: int = 1, gene_spacing: int = 20000,
+                     symbols: int = 20000, force: bool = False) -> Dataset:
+    """
+    합성 데이터셋을 out_dir에 만듭니다 (같은 설정으로 이미 만들었으면 그대로 사용).
+
+    Args:
+        size: 게놈 염기 수
+        gene_spacing: gene 사이 평균 간격 (bp) - 작을수록 GTF/단백질/BLAST가 커짐
+        symbols: reference (UniProt) 항목 수
+    """
+    paths = dataset_paths(out_dir)
+    settings = {"size": size, "seed": seed, "gene_spacing": gene_spacing, "symbols": symbols,
+                "version": GENERATOR_VERSION}
+    marker = os.path.join(out_dir, 'dataset.json')
+
+    if not force and all(os.path.exists(p) for p in paths):
+        try:
+            with open(marker) as f:
+                if json.load(f).get("settings") == settings:
+                    return paths
+        except (IOError, ValueError):
+            pass
+
+    os.makedirs(out_dir, exist_ok=True)
+    rng = random.Random(seed)
+
+    print(f"Generating {size:,} bp genome...", file=sys.stderr)
+    lengths = chromosome_lengths(rng, size)
+    generate_genome(paths.genome, rng, lengths)
+
+    print(f"Generating GTF...", file=sys.stderr)
+    loc_rows = generate_gtf(paths.gtf, rng, lengths, gene_spacing)
+    write_loc_map(paths.loc_map, loc_rows)
+    protein_ids = [row[1] for row in loc_rows]
+
+    print(f"Generating {len(protein_ids):,} proteins and BLAST hits...", file=sys.stderr)
+    generate_proteins(paths.proteins, rng, protein_ids)
+    subjects = generate_symbol_map(paths.symbol_map, rng, symbols)
+    generate_blast(paths.blast, rng, protein_ids, subjects)
+
+    file_sizes = {name: os.path.getsize(path) for name, path in paths._asdict().items()}
+    with open(marker, "w") as f:
+        json.dump({"settings": settings, "proteins": len(protein_ids), "file_sizes": file_sizes}, f, indent=2)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="벤치마크용 합성 GTF/genome/protein/BLAST 데이터를 생성합니다.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+예시:
+  cd benchmarks
+  python generate.py --size 1M                  # → data/1M-seed1/
+  python generate.py --size 2.5G --seed 7 -o /scratch/bench_2.5G
+        """
+    )
+
+    parser.add_argument(
+        "--size",
+        type=parse_size,
+        default=parse_size("1M"),
+        help="게놈 크기 (예: 500K, 10M, 2.5G, 기본값: 1M)"
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=1,
+        help="random seed (기본값: 1)"
+    )
+
+    parser.add_argument(
+        "--gene-spacing",
+        type=int,
+        default=20000,
+        metavar="BP",
+        help="gene 사이 평균 간격 (기본값: 20000)"
+    )
+
+    parser.add_argument(
+        "--symbols",
+        type=int,
+        default=20000,
+        metavar="N",
+        help="reference accession 수 (기본값: 20000)"
+    )
+
+    parser.add_argument(
+        "-o", "--output-dir",
+        metavar="DIR",
+        help="출력 디렉토리 (기본값: data/<size>-seed<seed>)"
+    )
+
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="이미 있어도 다시 생성"
+    )
+
+    args = parser.parse_args()
+
+    out_dir = args.output_dir or os.path.join(DATA_DIR, f"{format_size(args.size)}-seed{args.seed}")
+    paths = generate_dataset(out_dir, args.size, args.seed, args.gene_spacing, args.symbols, args.force)
+
+    for name, path in paths._asdict().items():
+        print(f"  {name:<11} {os.path.getsize(path):>15,} bytes  {path}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+단계별 벤치마크 (실행 시간 + 최대 메모리).
+
+generate.py의 합성 데이터셋으로 각 단계를 별도 프로세스에서 실행해
+준비(setup) 이후 구간의 시간과 프로세스 최대 RSS를 잽니다. BLAST 실행은 포함하지 않으므로
+(BLAST 결과도 합성) blastp 없이 오프라인으로 돌아갑니다.
+
+결과는 JSON으로 저장하고, 저장해 둔 baseline과 비교해 기준 이상 느려지거나 메모리가 늘어난
+단계가 있으면 exit code 1로 끝납니다.
+
+  python run_benchmarks.py --size 10M -o baseline.json         # baseline 저장
+  python run_benchmarks.py --size 10M --compare baseline.json  # 변경 후 비교
+"""
+
+import sys
+import json
+import time
+import argparse
+import importlib
+import os
+import platform
+import resource
+import subprocess
+from typing import Callable, Dict, List, Optional
+
+from generate import DATA_DIR, Dataset, dataset_paths, format_size, generate_dataset, parse_size
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+SCRIPTS_DIR = os.path.join(PROJECT_ROOT, 'scripts')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+sys.path.insert(0, SCRIPTS_DIR)
+
+DEFAULT_MAX_SLOWDOWN = 0.20
+DEFAULT_MAX_MEMORY_GROWTH = 0.20
+
+# 이보다 짧은 단계는 시간 비교에서 제외 (측정 오차가 더 큼)
+MIN_COMPARABLE_SECONDS = 0.05
+
+
+def _peak_rss_mb() -> float:
+    # Linux는 KB, macOS는 byte 단위
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _consume(iterable) -> int:
+    count = 0
+    for _ in iterable:
+        count += 1
+    return count
+
+
+# 각 단계: setup(data) → 측정할 함수 (인자 없음)
+
+def setup_gtf_features(data: Dataset) -> Callable:
+    from gtf_reader import CDS_KEYS, iter_gtf_features
+    return lambda: _consume(iter_gtf_features(data.gtf, CDS_KEYS))
+
+
+def setup_parse_attributes(data: Dataset) -> Callable:
+    from gtf_reader import parse_attributes
+    with open(data.gtf) as f:
+        fields = [line.rstrip("\n").split("\t", 8)[8] for line in f if not line.startswith("#")]
+    return lambda: [parse_attributes(field) for field in fields]
+
+
+def setup_gtf_scan(data: Dataset) -> Callable:
+    from gtf_scan import CdsTableSink, LocProteinMapSink, scan_gtf
+
+    def run():
+        with open(os.devnull, "w") as null:
+            scan_gtf(data.gtf, [LocProteinMapSink(null), CdsTableSink(null)])
+    return run
+
+
+def setup_translate(data: Dataset) -> Callable:
+    from fasta_index import IndexedFasta
+    from gtf_scan import CdsRegionSink, scan_gtf
+    from translation import translate_many
+    extract_gtf = importlib.import_module("extract_proteins_from_gtf")
+
+    regions = CdsRegionSink()
+    scan_gtf(data.gtf, [regions])
+    with IndexedFasta(data.genome) as genome:
+        cds_sequences = ["".join(extract_gtf.assemble_cds(r, genome)[0]) for r in regions.cds_regions.values()]
+    batch = extract_gtf.TRANSLATE_BATCH_SIZE
+    return lambda: [translate_many(cds_sequences[i:i + batch]) for i in range(0, len(cds_sequences), batch)]
+
+
+def setup_extract_proteins(data: Dataset) -> Callable:
+    from fasta_index import load_or_build_fai
+    extract_gtf = importlib.import_module("extract_proteins_from_gtf")
+    load_or_build_fai(data.genome)
+
+    def run():
+        with open(os.devnull, "w") as null:
+            extract_gtf.extract_proteins(data.gtf, data.genome, null)
+    return run
+
+
+def setup_extract_proteins_2bit(data: Dataset) -> Callable:
+    from twobit import fasta_to_twobit, twobit_path_for
+    extract_gtf = importlib.import_module("extract_proteins_from_gtf")
+    twobit_file = twobit_path_for(data.genome)
+    if not os.path.exists(twobit_file):
+        fasta_to_twobit(data.genome, twobit_file)
+
+    def run():
+        with open(os.devnull, "w") as null:
+            extract_gtf.extract_proteins(data.gtf, twobit_file, null)
+    return run
+
+
+def _extract_sequences(data: Dataset, cold: bool) -> Callable:
+    from fasta_index import record_index_path_for, select_records
+    extract_proteins = importlib.import_module("2_extract_proteins")
+
+    # 절반의 ID를 추출 (query FASTA 준비와 비슷한 비율)
+    with open(data.loc_map) as f:
+        next(f)
+        ids = {line.split("\t")[1] for i, line in enumerate(f) if i % 2 == 0}
+
+    index_file = record_index_path_for(data.proteins)
+    if cold:
+        if os.path.exists(index_file):
+            os.remove(index_file)
+    else:
+        select_records(data.proteins, ())
+
+    def run():
+        with open(os.devnull, "w") as null:
+            extract_proteins.extract_sequences(data.proteins, ids, null)
+    return run
+
+
+def setup_extract_sequences(data: Dataset) -> Callable:
+    return _extract_sequences(data, cold=False)
+
+
+def setup_extract_sequences_cold(data: Dataset) -> Callable:
+    return _extract_sequences(data, cold=True)
+
+
+def setup_parse_blast_result(data: Dataset) -> Callable:
+    map_blast = importlib.import_module("5_map_blast_to_symbol")
+    return lambda: map_blast.parse_blast_result(data.blast, 1)
+
+
+def setup_blast_table(data: Dataset) -> Callable:
+    import blast_table   # NumPy 필요 (없으면 ImportError → 건너뜀)
+
+    def run():
+        table = blast_table.load_blast_table(data.blast)
+        blast_table.top_hit_indices(table, 1)
+    return run
+
+
+def setup_blast_table_empty(data: Dataset) -> Callable:
+    """hit이 없는 BLAST 결과 - NumPy 경로가 parse_blast_result()처럼 빈 결과를 내는지 확인 (회귀 방지)."""
+    import blast_table
+    map_blast = importlib.import_module("5_map_blast_to_symbol")
+
+    empty_blast = os.path.join(os.path.dirname(data.blast), "blast_empty.tsv")
+    with open(empty_blast, "w") as f:
+        f.write("# BLASTP 2.14.0+\n# 0 hits found\n")
+
+    def run():
+        hits = list(blast_table.iter_top_hits(blast_table.load_blast_table(empty_blast), 1))
+        expected = list(map_blast.parse_blast_result(empty_blast, 1).items())
+        if hits != expected:
+            raise RuntimeError(f"blast_table on empty results: {hits!r} != {expected!r}")
+    return run
+
+
+def setup_table_io_final_map(data: Dataset) -> Callable:
+    """
+    results/final_gene_symbol_map_COMPLETE.tsv (bit_score/evalue가 "-")를 Parquet로 바꿨다가 다시 TSV로 읽어
+    원본과 값이 같은지 확인 (회귀 방지, "-"와 빈 값은 둘 다 null).
+    """
+    import table_io
+    if table_io.pa is None:
+        raise ImportError("pyarrow is not installed")
+
+    final_map = os.path.join(PROJECT_ROOT, "results", "final_gene_symbol_map_COMPLETE.tsv")
+    parquet_file = os.path.join(os.path.dirname(data.blast), "final_map_roundtrip.parquet")
+
+    def values(lines: List[str]) -> List[list]:
+        header = lines[0].rstrip("\n").split("\t")
+        kinds = [table_io.COLUMN_TYPES.get(name) for name in header]
+        rows = [header]
+        for line in lines[1:]:
+            cols = line.rstrip("\n").split("\t")
+            rows.append([None if kind and v in table_io.NULL_VALUES else float(v) if kind else v
+                         for v, kind in zip(cols, kinds)])
+        return rows
+
+    def run():
+        table_io.convert(final_map, parquet_file)
+        text = b"".join(table_io.iter_tsv_chunks(parquet_file)).decode()
+        with open(final_map) as f:
+            expected = values(f.readlines())
+        if values(text.splitlines()) != expected:
+            raise RuntimeError(f"table_io round trip of {final_map} does not match the original")
+    return run
+
+
+def setup_map_blast_to_symbol(data: Dataset) -> Callable:
+    map_blast = importlib.import_module("5_map_blast_to_symbol")
+
+    def run():
+        with open(os.devnull, "w") as null:
+            map_blast.map_blast_to_symbol(data.loc_map, data.blast, data.symbol_map, null)
+    return run
+
+
+STAGES: Dict[str, Callable[[Dataset], Callable]] = {
+    "gtf_features": setup_gtf_features,
+    "parse_attributes": setup_parse_attributes,
+    "gtf_scan": setup_gtf_scan,
+    "translate": setup_translate,
+    "extract_proteins": setup_extract_proteins,
+    "extract_proteins_2bit": setup_extract_proteins_2bit,
+    "extract_sequences": setup_extract_sequences,
+    "extract_sequences_cold": setup_extract_sequences_cold,
+    "parse_blast_result": setup_parse_blast_result,
+    "blast_table": setup_blast_table,
+    "blast_table_empty": setup_blast_table_empty,
+    "table_io_final_map": setup_table_io_final_map,
+    "map_blast_to_symbol": setup_map_blast_to_symbol,
+}
+
+
+def run_stage_in_child(stage: str, data_dir: str) -> Dict:
+    """--child 모드: 단계 하나를 이 프로세스에서 실행하고 측정값을 돌려줍니다."""
+    data = dataset_paths(data_dir)
+    try:
+        run = STAGES[stage](data)
+    except ImportError as e:
+        return {"skipped": str(e)}
+
+    setup_mb = _peak_rss_mb()
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+    peak_mb = _peak_rss_mb()
+    return {"seconds": seconds, "peak_mb": round(peak_mb, 1), "stage_mb": round(max(0.0, peak_mb - setup_mb), 1)}
+
+
+def measure(stage: str, data_dir: str, repeat: int) -> Dict:
+    """
+    단계를 repeat번 (매번 새 프로세스에서) 실행합니다.
+    시간은 최솟값 (잡음이 가장 적음), 메모리는 최댓값을 기록합니다.
+    """
+    runs = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", stage, "--data-dir", data_dir],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"{stage} failed (exit code {result.returncode}):\n{result.stderr[-2000:]}")
+        measured = json.loads(result.stdout.strip().splitlines()[-1])
+        if "skipped" in measured:
+            return measured
+        runs.append(measured)
+
+    return {
+        "seconds": round(min(r["seconds"] for r in runs), 4),
+        "seconds_all": [round(r["seconds"], 4) for r in runs],
+        "peak_mb": max(r["peak_mb"] for r in runs),
+        "stage_mb": max(r["stage_mb"] for r in runs),
+    }
+
+
+def compare_results(current: Dict, baseline: Dict, max_slowdown: float, max_memory_growth: float) -> List[str]:
+    """
+    baseline과 비교한 표를 출력하고, 기준을 넘은 항목 목록을 돌려줍니다.
+    """
+    if current.get("dataset", {}).get("settings") != baseline.get("dataset", {}).get("settings"):
+        print("Warning: baseline was measured on a different dataset; ratios may not be meaningful",
+              file=sys.stderr)
+
+    regressions = []
+    print(f"\n{'stage':<24}{'base s':>10}{'now s':>10}{'ratio':>8}{'base MB':>10}{'now MB':>10}{'ratio':>8}",
+          file=sys.stderr)
+    for stage, now in current["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base or "seconds" not in base or "seconds" not in now:
+            continue
+
+        time_ratio = now["seconds"] / base["seconds"] if base["seconds"] else 1.0
+        memory_ratio = now["peak_mb"] / base["peak_mb"] if base["peak_mb"] else 1.0
+        flags = []
+        if time_ratio > 1 + max_slowdown and max(now["seconds"], base["seconds"]) >= MIN_COMPARABLE_SECONDS:
+            flags.append("SLOWER")
+            regressions.append(f"{stage}: {time_ratio:.2f}x time")
+        if memory_ratio > 1 + max_memory_growth:
+            flags.append("MEMORY")
+            regressions.append(f"{stage}: {memory_ratio:.2f}x peak memory")
+
+        print(f"{stage:<24}{base['seconds']:>10.3f}{now['seconds']:>10.3f}{time_ratio:>8.2f}"
+              f"{base['peak_mb']:>10.1f}{now['peak_mb']:>10.1f}{memory_ratio:>8.2f}  {' '.join(flags)}",
+              file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="합성 데이터로 단계별 실행 시간과 최대 메모리를 측정합니다 (BLAST binary 불필요).",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"""
+예시:
+  cd benchmarks
+  python run_benchmarks.py                                  # 1M 데이터셋, 전체 단계
+  python run_benchmarks.py --size 100M -o baseline.json     # baseline 저장
+  python run_benchmarks.py --size 100M --compare baseline.json --max-slowdown 0.1
+  python run_benchmarks.py --stages gtf_features,parse_attributes --repeat 5
+
+단계: {', '.join(STAGES)}
+        """
+    )
+
+    parser.add_argument(
+        "--size",
+        type=parse_size,
+        default=parse_size("1M"),
+        help="합성 게놈 크기 (예: 1M, 100M, 2.5G, 기본값: 1M)"
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=1,
+        help="데이터 생성 random seed (기본값: 1)"
+    )
+
+    parser.add_argument(
+        "--gene-spacing",
+        type=int,
+        default=20000,
+        metavar="BP",
+        help="gene 사이 평균 간격 (기본값: 20000)"
+    )
+
+    parser.add_argument(
+        "--data-dir",
+        metavar="DIR",
+        help="데이터셋 디렉토리 (기본값: data/<size>-seed<seed>, 없으면 생성)"
+    )
+
+    parser.add_argument(
+        "--stages",
+        metavar="LIST",
+        help="실행할 단계 (쉼표로 구분, 기본값: 전체)"
+    )
+
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        metavar="N",
+        help="단계별 반복 횟수 (시간은 최솟값, 기본값: 3)"
+    )
+
+    parser.add_argument(
+        "-o", "--output",
+        metavar="JSON",
+        help="결과 JSON 경로 (기본값: results/<날짜시각>-<size>.json)"
+    )
+
+    parser.add_argument(
+        "--compare",
+        metavar="BASELINE",
+        help="비교할 baseline 결과 JSON"
+    )
+
+    parser.add_argument(
+        "--max-slowdown",
+        type=float,
+        default=DEFAULT_MAX_SLOWDOWN,
+        metavar="FRACTION",
+        help=f"허용할 시간 증가 비율 (기본값: {DEFAULT_MAX_SLOWDOWN})"
+    )
+
+    parser.add_argument(
+        "--max-memory-growth",
+        type=float,
+        default=DEFAULT_MAX_MEMORY_GROWTH,
+        metavar="FRACTION",
+        help=f"허용할 최대 메모리 증가 비율 (기본값: {DEFAULT_MAX_MEMORY_GROWTH})"
+    )
+
+    parser.add_argument(
+        "--child",
+        metavar="STAGE",
+        help=argparse.SUPPRESS
+    )
+
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_stage_in_child(args.child, args.data_dir)))
+        return
+
+    stages = args.stages.split(",") if args.stages else list(STAGES)
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage: {', '.join(unknown)} (choose from {', '.join(STAGES)})")
+    if args.repeat < 1:
+        parser.error("--repeat must be >= 1")
+
+    baseline: Optional[Dict] = None
+    if args.compare:
+        try:
+            with open(args.compare) as f:
+                baseline = json.load(f)
+        except (IOError, ValueError) as e:
+            parser.error(f"cannot read baseline: {e}")
+
+    data_dir = args.data_dir or os.path.join(DATA_DIR, f"{format_size(args.size)}-seed{args.seed}")
+    generate_dataset(data_dir, args.size, args.seed, args.gene_spacing)
+    with open(os.path.join(data_dir, 'dataset.json')) as f:
+        dataset_info = json.load(f)
+
+    results = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "dataset": dataset_info,
+        "repeat": args.repeat,
+        "stages": {},
+    }
+
+    print(f"Benchmarking {len(stages)} stages on {data_dir} ({args.repeat} runs each)", file=sys.stderr)
+    failed = False
+    for stage in stages:
+        try:
+            measured = measure(stage, data_dir, args.repeat)
+        except RuntimeError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            failed = True
+            continue
+        results["stages"][stage] = measured
+        if "skipped" in measured:
+            print(f"  {stage:<24} skipped ({measured['skipped']})", file=sys.stderr)
+        else:
+            print(f"  {stage:<24} {measured['seconds']:>9.3f} s {measured['peak_mb']:>9.1f} MB peak "
+                  f"{measured['stage_mb']:>9.1f} MB in stage", file=sys.stderr)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + f"-{format_size(args.size)}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {output}", file=sys.stderr)
+
+    if baseline is not None:
+        regressions = compare_results(results, baseline, args.max_slowdown, args.max_memory_growth)
+        if regressions:
+            print(f"\n{len(regressions)} regressions:", file=sys.stderr)
+            for regression in regressions:
+                print(f"  {regression}", file=sys.stderr)
+            sys.exit(1)
+        print("\nNo regressions", file=sys.stderr)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
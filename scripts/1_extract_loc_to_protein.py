@@ -8,12 +8,19 @@ GTF의 CDS feature에서 다음 정보를 추출:
   - product (단백질 설명)
 
 출력: TSV 형식 (gene_id, protein_id, product, transcript_id)
+
+CDS 좌표 테이블 등 다른 산출물도 함께 필요하면 gtf_scan.py로 한 번에 생성할 수 있습니다.
 """
 
 import sys
-import re
 import argparse
 import os
+from typing import Optional
+
+from gtf_scan import LocProteinMapSink, scan_gtf
+from cds_cache import CdsCache, add_cache_arguments, cache_from_args
+from instrumentation import add_metrics_arguments, input_bytes, instrument_from_args, phase
+from output_io import open_output
 
 # 스크립트 기본 경로 설정
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -22,74 +29,24 @@ DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
 INTERMEDIATE_DIR = os.path.join(PROJECT_ROOT, 'intermediate')
 
 
-def parse_attributes(attr_field: str) -> dict:
-    """GTF 9번째 컬럼을 dict로 파싱."""
-    attrs = {}
-    for item in attr_field.strip().strip(";").split(";"):
-        item = item.strip()
-        if not item:
-            continue
-        # key "value" 형식 파싱
-        m = re.match(r'([^ ]+)\s+"(.+)"', item)
-        if m:
-            key, val = m.group(1), m.group(2)
-            attrs[key] = val
-    return attrs
-
-
-def extract_loc_to_protein(gtf_path: str, output_file=None):
+def extract_loc_to_protein(gtf_path: str, output_file=None, cache: Optional[CdsCache] = None):
     """
     GTF 파일에서 LOC → protein_id 매핑을 추출합니다.
 
     Args:
         gtf_path: 입력 GTF 파일 경로
         output_file: 출력 파일 객체 (기본값: stdout)
+        cache: 파싱된 GTF CDS 캐시 (None이면 항상 GTF를 파싱)
     """
     if output_file is None:
         output_file = sys.stdout
 
-    print("gene_id\tprotein_id\tproduct\ttranscript_id", file=output_file)
-
-    seen_pairs = set()  # (gene_id, protein_id) 쌍의 중복 제거
-
     try:
-        with open(gtf_path, "r") as f:
-            for line in f:
-                line = line.rstrip("\n")
-                if not line or line.startswith("#"):
-                    continue
-
-                cols = line.split("\t")
-                if len(cols) < 9:
-                    continue
-
-                feature = cols[2]
-                attrs_str = cols[8]
-
-                # CDS feature만 처리 (protein_id는 CDS에만 있음)
-                if feature != "CDS":
-                    continue
-
-                attrs = parse_attributes(attrs_str)
-                gene_id = attrs.get("gene_id")
-                protein_id = attrs.get("protein_id")
-                transcript_id = attrs.get("transcript_id", "")
-                product = attrs.get("product", "")
-
-                # protein_id가 없으면 스킵
-                if not gene_id or not protein_id:
-                    continue
-
-                # 중복 쌍 제거
-                pair = (gene_id, protein_id)
-                if pair in seen_pairs:
-                    continue
-                seen_pairs.add(pair)
-
-                # 출력
-                print(f"{gene_id}\t{protein_id}\t{product}\t{transcript_id}", file=output_file)
-
-    except IOError as e:
+        # CDS feature만 처리 (protein_id는 CDS에만 있음)
+        with phase("scan", nbytes=input_bytes(gtf_path)) as p:
+            p.records = scan_gtf(gtf_path, [LocProteinMapSink(output_file)], cache=cache)
+
+    except (IOError, ValueError) as e:
         print(f"Error reading GTF file: {e}", file=sys.stderr)
         sys.exit(1)
 
@@ -117,17 +74,17 @@ def main():
     parser.add_argument(
         "-o", "--output",
         metavar="OUTPUT",
-        type=argparse.FileType('w'),
-        default=sys.stdout,
-        help="출력 TSV 파일 경로 (기본값: stdout)"
+        help="출력 TSV 파일 경로 (기본값: stdout, .gz로 끝나면 gzip 압축)"
     )
 
-    args = parser.parse_args()
+    add_cache_arguments(parser)
+    add_metrics_arguments(parser)
 
-    extract_loc_to_protein(args.gtf_file, args.output)
+    args = parser.parse_args()
 
-    if args.output != sys.stdout:
-        args.output.close()
+    with instrument_from_args(args, "1_extract_loc_to_protein"), \
+            open_output(args.output, background=True) as output:
+        extract_loc_to_protein(args.gtf_file, output, cache_from_args(args))
 
 
 if __name__ == "__main__":
@@ -4,17 +4,25 @@ FASTA 파일에서 특정 ID의 단백질 서열을 추출합니다.
 
 입력:
   - FASTA 파일
-  - ID 리스트 (텍스트 파일 또는 TSV의 특정 컬럼)
+  - ID 리스트 (텍스트 파일 또는 TSV의 특정 컬럼) - 여러 개 또는 그룹 컬럼이 있는 TSV 가능
 
 출력:
-  - 필터링된 FASTA 파일
+  - 필터링된 FASTA 파일 (ID 리스트/그룹별로 하나씩, FASTA는 한 번만 읽음)
+  - --shards: 총 길이가 비슷한 N개의 FASTA 파일 (병렬 BLAST 입력용)
 """
 
 import sys
 import argparse
-from typing import Set
+import heapq
+from contextlib import ExitStack
+from typing import Dict, List, Optional, Set
 import os
 
+from compressed_io import open_input
+from fasta_index import iter_fasta, iter_records_by_id
+from instrumentation import add_metrics_arguments, input_bytes, instrument_from_args, phase
+from output_io import format_fasta, open_output
+
 # 스크립트 기본 경로 설정
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
@@ -34,7 +42,7 @@ def load_ids_from_file(id_file: str, column: int = 0) -> Set[str]:
     """
     ids = set()
     try:
-        with open(id_file, "r") as f:
+        with phase("load_ids", nbytes=input_bytes(id_file)) as p, open_input(id_file) as f:
             for line in f:
                 line = line.rstrip("\n")
                 if not line or line.startswith("#"):
@@ -47,6 +55,7 @@ def load_ids_from_file(id_file: str, column: int = 0) -> Set[str]:
                         ids.add(cols[column].strip())
                 else:
                     ids.add(line.strip())
+            p.records = len(ids)
 
     except IOError as e:
         print(f"Error reading ID file: {e}", file=sys.stderr)
@@ -55,10 +64,70 @@ def load_ids_from_file(id_file: str, column: int = 0) -> Set[str]:
     return ids
 
 
+def load_id_groups(id_file: str, column: int, group_column: int) -> Dict[str, Set[str]]:
+    """
+    TSV에서 그룹 컬럼 값별로 ID를 모읍니다 (예: 염색체별, 재실행 대상 등).
+
+    Returns:
+        {그룹 이름: ID 집합}
+    """
+    groups: Dict[str, Set[str]] = {}
+    try:
+        with phase("load_ids", nbytes=input_bytes(id_file)) as p, open_input(id_file) as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if not line or line.startswith("#"):
+                    continue
+
+                cols = line.split("\t")
+                if column >= len(cols) or group_column >= len(cols):
+                    continue
+
+                seq_id = cols[column].strip()
+                group = cols[group_column].strip()
+                if seq_id and group:
+                    groups.setdefault(group, set()).add(seq_id)
+                    p.records += 1
+
+    except IOError as e:
+        print(f"Error reading ID file: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    return groups
+
+
+def id_file_stem(id_file: str) -> str:
+    """ID 파일 경로 → 출력 이름 (디렉토리, 압축 확장자, 확장자 제외)."""
+    base = os.path.basename(id_file)
+    for ext in (".gz", ".bgz", ".zst"):
+        if base.endswith(ext):
+            base = base[:-len(ext)]
+    return os.path.splitext(base)[0] or base
+
+
+def group_file_name(group: str) -> str:
+    """그룹 이름 → 출력 FASTA 파일 이름 (경로 구분자는 _로 바꿈)."""
+    return group.replace("/", "_").replace(os.sep, "_") + ".fasta"
+
+
+def print_statistics(id_set: Set[str], found_count: int, not_found_ids: Set[str], label: Optional[str] = None):
+    """ID 집합 하나의 추출 결과 요약을 stderr로 출력."""
+    print(f"Statistics{f' [{label}]' if label else ''}:", file=sys.stderr)
+    print(f"  Total IDs requested: {len(id_set)}", file=sys.stderr)
+    print(f"  IDs found: {found_count}", file=sys.stderr)
+    print(f"  IDs not found: {len(not_found_ids)}", file=sys.stderr)
+
+    if not_found_ids and len(not_found_ids) <= 20:
+        print(f"  Missing IDs: {', '.join(sorted(not_found_ids))}", file=sys.stderr)
+
+
 def extract_sequences(fasta_file: str, id_set: Set[str], output_file, verbose: bool = False):
     """
     FASTA 파일에서 ID 리스트에 해당하는 서열을 추출합니다.
 
+    비압축 FASTA는 레코드 인덱스(.fxi, 첫 실행 때 생성)로 요청한 레코드만 읽으므로
+    ID 수에 비례하는 시간이 걸립니다. 출력 순서는 FASTA 파일 순서입니다.
+
     Args:
         fasta_file: 입력 FASTA 파일
         id_set: 추출할 ID 집합
@@ -67,62 +136,110 @@ def extract_sequences(fasta_file: str, id_set: Set[str], output_file, verbose: b
     """
     found_count = 0
     not_found_ids = set(id_set)
-    current_id = None
-    current_seq = []
 
     try:
-        with open(fasta_file, "r") as f:
-            for line in f:
-                line = line.rstrip("\n")
+        with phase("extract", nbytes=input_bytes(fasta_file)) as p:
+            for seq_id, seq in iter_records_by_id(fasta_file, id_set):
+                # 80자씩 줄바꿈 (표준 FASTA 형식)
+                output_file.write(format_fasta(seq_id, seq))
+                not_found_ids.discard(seq_id)
+                found_count += 1
+                if verbose:
+                    print(f"Found: {seq_id}", file=sys.stderr)
+            p.records = found_count
 
-                if line.startswith(">"):
-                    # 이전 서열 처리
-                    if current_id and current_id in id_set:
-                        seq_str = "".join(current_seq)
-                        print(f">{current_id}", file=output_file)
-                        # 80자씩 끊어서 출력 (표준 FASTA 형식)
-                        for i in range(0, len(seq_str), 80):
-                            print(seq_str[i:i+80], file=output_file)
-                        found_count += 1
-                        if verbose:
-                            print(f"Found: {current_id}", file=sys.stderr)
+    except IOError as e:
+        print(f"Error reading FASTA file: {e}", file=sys.stderr)
+        sys.exit(1)
 
-                    # Header에서 ID 추출
-                    header = line[1:].strip()
-                    # 첫 번째 공백까지가 ID (대부분의 FASTA 형식)
-                    current_id = header.split()[0] if header else None
+    # 요약 출력
+    print_statistics(id_set, found_count, not_found_ids)
 
-                    if current_id and current_id in not_found_ids:
-                        not_found_ids.discard(current_id)
 
-                    current_seq = []
+def extract_sequence_groups(fasta_file: str, id_sets: Dict[str, Set[str]], output_files: Dict[str, object],
+                            verbose: bool = False):
+    """
+    여러 ID 집합을 FASTA 한 번 읽기로 동시에 추출합니다.
 
-                else:
-                    # 서열 추가
-                    current_seq.append(line)
-
-            # 마지막 서열 처리
-            if current_id and current_id in id_set:
-                seq_str = "".join(current_seq)
-                print(f">{current_id}", file=output_file)
-                for i in range(0, len(seq_str), 80):
-                    print(seq_str[i:i+80], file=output_file)
-                found_count += 1
+    각 서열은 자신이 속한 모든 그룹의 출력 파일에 쓰입니다 (그룹 간 ID 중복 가능).
+
+    Args:
+        fasta_file: 입력 FASTA 파일
+        id_sets: {그룹 이름: ID 집합}
+        output_files: {그룹 이름: 출력 파일 객체}
+        verbose: 진행상황 출력 여부
+    """
+    # ID → 해당 ID를 요청한 그룹 목록
+    routes: Dict[str, List[str]] = {}
+    for group, ids in id_sets.items():
+        for seq_id in ids:
+            routes.setdefault(seq_id, []).append(group)
+
+    found_counts = dict.fromkeys(id_sets, 0)
+    found_ids: Set[str] = set()
+
+    try:
+        with phase("extract", nbytes=input_bytes(fasta_file)) as p:
+            for seq_id, seq in iter_records_by_id(fasta_file, routes):
+                record = format_fasta(seq_id, seq)
+                for group in routes[seq_id]:
+                    output_files[group].write(record)
+                    found_counts[group] += 1
+                found_ids.add(seq_id)
                 if verbose:
-                    print(f"Found: {current_id}", file=sys.stderr)
+                    print(f"Found: {seq_id} → {', '.join(routes[seq_id])}", file=sys.stderr)
+            p.records = len(found_ids)
 
     except IOError as e:
         print(f"Error reading FASTA file: {e}", file=sys.stderr)
         sys.exit(1)
 
-    # 요약 출력
-    print(f"Statistics:", file=sys.stderr)
-    print(f"  Total IDs requested: {len(id_set)}", file=sys.stderr)
-    print(f"  IDs found: {found_count}", file=sys.stderr)
-    print(f"  IDs not found: {len(not_found_ids)}", file=sys.stderr)
+    for group, ids in id_sets.items():
+        print_statistics(ids, found_counts[group], ids - found_ids, group)
 
-    if not_found_ids and len(not_found_ids) <= 20:
-        print(f"  Missing IDs: {', '.join(sorted(not_found_ids))}", file=sys.stderr)
+
+def shard_sequences(fasta_file: str, output_files: List, id_set: Optional[Set[str]] = None,
+                    verbose: bool = False):
+    """
+    서열을 len(output_files)개의 FASTA로 나눕니다.
+
+    각 서열은 지금까지 residue 수 합이 가장 작은 shard로 보내므로 shard별 총 길이
+    (≈ BLAST 실행 시간)가 거의 같아집니다. shard 안의 순서는 FASTA 파일 순서입니다.
+
+    Args:
+        fasta_file: 입력 FASTA 파일
+        output_files: shard별 출력 파일 객체
+        id_set: 지정하면 이 ID들만 나눔 (None이면 전체)
+        verbose: 진행상황 출력 여부
+    """
+    heap = [(0, i) for i in range(len(output_files))]
+    counts = [0] * len(output_files)
+    residues = [0] * len(output_files)
+
+    if id_set is None:
+        records = ((seq_id, seq) for seq_id, seq in iter_fasta(fasta_file, upper=False) if seq_id)
+    else:
+        records = iter_records_by_id(fasta_file, id_set)
+
+    try:
+        with phase("shard", nbytes=input_bytes(fasta_file)) as p:
+            for seq_id, seq in records:
+                size, shard = heapq.heappop(heap)
+                output_files[shard].write(format_fasta(seq_id, seq))
+                counts[shard] += 1
+                residues[shard] += len(seq)
+                heapq.heappush(heap, (size + len(seq), shard))
+                if verbose:
+                    print(f"{seq_id} → shard {shard + 1}", file=sys.stderr)
+            p.records = sum(counts)
+
+    except IOError as e:
+        print(f"Error reading FASTA file: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Statistics:", file=sys.stderr)
+    for shard, (count, total) in enumerate(zip(counts, residues), 1):
+        print(f"  Shard {shard}: {count} sequences, {total:,} residues", file=sys.stderr)
 
 
 def main():
@@ -150,9 +267,10 @@ def main():
     )
 
     parser.add_argument(
-        "id_file",
+        "id_files",
         metavar="ID_FILE",
-        help="추출할 ID 리스트 (텍스트 또는 TSV 파일)"
+        nargs="*",
+        help="추출할 ID 리스트 (텍스트 또는 TSV 파일). 여러 개면 파일별로 출력 (--output-dir 필요)"
     )
 
     parser.add_argument(
@@ -163,12 +281,31 @@ def main():
         help="TSV 파일의 경우 몇 번째 컬럼을 사용할지 (기본값: 0)"
     )
 
+    parser.add_argument(
+        "-g", "--group-column",
+        type=int,
+        metavar="COL",
+        help="이 컬럼 값별로 나눠서 <DIR>/<그룹>.fasta로 출력 (0-indexed, --output-dir 필요)"
+    )
+
+    parser.add_argument(
+        "--shards",
+        type=int,
+        metavar="N",
+        help="서열을 총 길이가 비슷한 N개의 파일(<DIR>/shard_001.fasta ...)로 나눔. "
+             "ID_FILE이 없으면 FASTA 전체를 나눔 (--output-dir 필요)"
+    )
+
     parser.add_argument(
         "-o", "--output",
         metavar="OUTPUT",
-        type=argparse.FileType('w'),
-        default=sys.stdout,
-        help="출력 FASTA 파일 경로 (기본값: stdout)"
+        help="출력 FASTA 파일 경로 (기본값: stdout, .gz로 끝나면 gzip 압축)"
+    )
+
+    parser.add_argument(
+        "-O", "--output-dir",
+        metavar="DIR",
+        help="여러 파일로 출력할 때 (ID 파일 여러 개, --group-column, --shards) 출력 디렉토리"
     )
 
     parser.add_argument(
@@ -177,17 +314,74 @@ def main():
         help="상세 출력 활성화"
     )
 
-    args = parser.parse_args()
+    add_metrics_arguments(parser)
 
-    # ID 로드
-    id_set = load_ids_from_file(args.id_file, args.column)
-    print(f"Loaded {len(id_set)} IDs from {args.id_file}", file=sys.stderr)
-
-    # 서열 추출
-    extract_sequences(args.fasta_file, id_set, args.output, args.verbose)
+    args = parser.parse_args()
 
-    if args.output != sys.stdout:
-        args.output.close()
+    if args.shards is not None:
+        if args.shards < 1:
+            parser.error("--shards must be >= 1")
+        if len(args.id_files) > 1 or args.group_column is not None:
+            parser.error("--shards accepts at most one ID_FILE and cannot be combined with --group-column")
+    elif not args.id_files:
+        parser.error("ID_FILE is required unless --shards is given")
+    elif args.group_column is not None and len(args.id_files) > 1:
+        parser.error("--group-column requires exactly one ID_FILE")
+
+    multi_output = args.shards is not None or args.group_column is not None or len(args.id_files) > 1
+    if multi_output and not args.output_dir:
+        parser.error("--output-dir is required with several ID files, --group-column or --shards")
+    if multi_output and args.output:
+        parser.error("-o/--output writes a single file; use --output-dir")
+
+    with instrument_from_args(args, "2_extract_proteins"):
+        # 단일 ID 리스트 → 파일 하나 (기존 동작)
+        if not multi_output:
+            id_file = args.id_files[0]
+            id_set = load_ids_from_file(id_file, args.column)
+            print(f"Loaded {len(id_set)} IDs from {id_file}", file=sys.stderr)
+
+            with open_output(args.output, background=True) as output:
+                extract_sequences(args.fasta_file, id_set, output, args.verbose)
+            return
+
+        os.makedirs(args.output_dir, exist_ok=True)
+
+        with ExitStack() as stack:
+            if args.shards is not None:
+                id_set = None
+                if args.id_files:
+                    id_set = load_ids_from_file(args.id_files[0], args.column)
+                    print(f"Loaded {len(id_set)} IDs from {args.id_files[0]}", file=sys.stderr)
+
+                outputs = [stack.enter_context(open_output(os.path.join(args.output_dir, f"shard_{i:03d}.fasta")))
+                           for i in range(1, args.shards + 1)]
+                shard_sequences(args.fasta_file, outputs, id_set, args.verbose)
+                return
+
+            if args.group_column is not None:
+                id_sets = load_id_groups(args.id_files[0], args.column, args.group_column)
+                print(f"Loaded {len(id_sets)} groups from {args.id_files[0]}", file=sys.stderr)
+            else:
+                id_sets = {}
+                for id_file in args.id_files:
+                    name = id_file_stem(id_file)
+                    if name in id_sets:
+                        parser.error(f"ID files map to the same output name: {name}")
+                    id_sets[name] = load_ids_from_file(id_file, args.column)
+                    print(f"Loaded {len(id_sets[name])} IDs from {id_file}", file=sys.stderr)
+
+            # 경로 구분자를 바꾼 뒤 같은 파일 이름이 되는 그룹 (예: a/b와 a_b)
+            file_names = {}
+            for name in id_sets:
+                file_name = group_file_name(name)
+                if file_name in file_names:
+                    parser.error(f"groups {file_names[file_name]!r} and {name!r} map to the same output name: {file_name}")
+                file_names[file_name] = name
+
+            outputs = {name: stack.enter_context(open_output(os.path.join(args.output_dir, file_name)))
+                       for file_name, name in file_names.items()}
+            extract_sequence_groups(args.fasta_file, id_sets, outputs, args.verbose)
 
 
 if __name__ == "__main__":
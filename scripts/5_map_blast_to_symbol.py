@@ -13,26 +13,47 @@ BLASTP 결과 + Annotation을 사용하여 LOC → Gene symbol 매핑을 수행
 
 import sys
 import argparse
-from typing import Dict, List, Tuple
+import heapq
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 import os
 
+from compressed_io import open_input
+from instrumentation import add_metrics_arguments, input_bytes, instrument_from_args, phase
+from output_io import DEFAULT_BUFFER_SIZE, open_output
+from table_io import detect_table_format, read_column_lists
+
+try:
+    import numpy as np
+    import blast_table
+except ImportError:  # NumPy가 없으면 hit 단위 Python 경로 사용
+    np = None
+    blast_table = None
+
 # 스크립트 기본 경로 설정
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 INTERMEDIATE_DIR = os.path.join(PROJECT_ROOT, 'intermediate')
 RESULTS_DIR = os.path.join(PROJECT_ROOT, 'results')
 
+OUTPUT_HEADER = "gene_id\tprotein_id\treference_accession\tgene_symbol\tidentity(%)\tcoverage(%)\tbit_score\tevalue"
+
 
 def load_loc_to_protein(loc_file: str) -> Dict[str, str]:
     """
     LOC → protein_id 매핑을 로드합니다.
 
+    Parquet/Arrow 파일이면 앞의 두 컬럼(gene_id, protein_id)만 바로 읽습니다.
+
     Returns:
         {protein_id: gene_id} 형태의 딕셔너리
     """
     loc_map = {}
     try:
-        with open(loc_file, "r") as f:
+        if detect_table_format(loc_file) is not None:
+            gene_ids, protein_ids = read_column_lists(loc_file, [0, 1])
+            return dict(zip(protein_ids, gene_ids))
+
+        with open_input(loc_file) as f:
             # 헤더 스킵
             next(f)
             for line in f:
@@ -42,7 +63,7 @@ def load_loc_to_protein(loc_file: str) -> Dict[str, str]:
                     protein_id = cols[1]  # XP
                     loc_map[protein_id] = gene_id
 
-    except IOError as e:
+    except (IOError, ValueError) as e:
         print(f"Error reading LOC file: {e}", file=sys.stderr)
         sys.exit(1)
 
@@ -53,11 +74,18 @@ def load_accession_to_symbol(annotation_file: str) -> Dict[str, str]:
     """
     Reference accession → gene symbol 매핑을 로드합니다.
 
-    파일 형식: accession\tsymbol (TSV)
+    파일 형식: accession\tsymbol (TSV) 또는 같은 순서의 두 컬럼을 가진 Parquet/Arrow 파일
     """
     symbol_map = {}
     try:
-        with open(annotation_file, "r") as f:
+        if detect_table_format(annotation_file) is not None:
+            accessions, symbols = read_column_lists(annotation_file, [0, 1])
+            for accession, symbol in zip(accessions, symbols):
+                if accession and not accession.startswith("#"):
+                    symbol_map[accession.strip()] = (symbol or "").strip()
+            return symbol_map
+
+        with open_input(annotation_file) as f:
             # 헤더 있을 수 있으니 처리
             for line in f:
                 line = line.rstrip("\n")
@@ -70,58 +98,195 @@ def load_accession_to_symbol(annotation_file: str) -> Dict[str, str]:
                     symbol = cols[1].strip()
                     symbol_map[accession] = symbol
 
-    except IOError as e:
+    except (IOError, ValueError) as e:
         print(f"Error reading annotation file: {e}", file=sys.stderr)
         sys.exit(1)
 
     return symbol_map
 
 
-def parse_blast_result(blast_file: str) -> Dict[str, List[Tuple]]:
+def load_dedup_members(members_file: str) -> Dict[str, List[str]]:
+    """
+    dedup_proteins.py의 대표 → 구성원 테이블을 로드합니다.
+
+    Returns:
+        {representative_id: [member_id, ...]} (구성원은 파일 순서, 대표 자신 포함)
+    """
+    members: Dict[str, List[str]] = {}
+    try:
+        if detect_table_format(members_file) is not None:
+            rows = zip(*read_column_lists(members_file, [0, 1]))
+        else:
+            with open_input(members_file) as f:
+                # 헤더 스킵
+                next(f, None)
+                rows = [line.rstrip("\n").split("\t")[:2] for line in f if "\t" in line]
+
+        for representative, member in rows:
+            members.setdefault(representative, []).append(member)
+
+    except (IOError, ValueError) as e:
+        print(f"Error reading dedup members file: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    return members
+
+
+def fan_out_members(blast_queries: Iterable[Tuple[str, List[Tuple]]],
+                    members: Dict[str, List[str]]) -> Iterator[Tuple[str, List[Tuple]]]:
+    """대표 서열의 (query_id, hits)를 구성원마다 하나씩 돌려줍니다 (테이블에 없는 query는 그대로)."""
+    for query_id, hits in blast_queries:
+        for member_id in members.get(query_id, (query_id,)):
+            yield member_id, hits
+
+
+def parse_blast_line(line: str):
+    """
+    outfmt 6 한 줄을 파싱합니다.
+
+    Returns:
+        (query_id, (subject_id, pident, qcovs, evalue, bitscore)) 또는 빈 줄/컬럼 부족이면 None
+    """
+    line = line.rstrip("\n")
+    if not line:
+        return None
+
+    cols = line.split("\t")
+    if len(cols) < 12:
+        return None
+
+    qseqid = cols[0]  # query id
+    sseqid = cols[1]  # subject id
+    pident = float(cols[2])  # percent identity
+    length = int(cols[3])  # alignment length
+    qstart = int(cols[6])  # query start
+    qend = int(cols[7])  # query end
+    evalue = float(cols[10])  # expect value
+    bitscore = float(cols[11])  # bit score
+
+    # Query coverage 계산: (qend - qstart + 1) / query_length * 100
+    # 여기서는 alignment length를 대체 값으로 사용
+    qcovs = (length / 1000.0) * 100  # 대략적인 추정 (최대 100%)
+    if qcovs > 100:
+        qcovs = 100.0
+
+    return qseqid, (sseqid, pident, qcovs, evalue, bitscore)
+
+
+class TopHits:
+    """
+    query 하나의 상위 k개 hit.
+
+    순위: bitscore 높은 순 → evalue 낮은 순 → identity 높은 순 (모두 같으면 먼저 나온 hit).
+    크기 k의 heap에 지금까지 가장 나쁜 hit을 root로 두므로, hit이 몇 개든 메모리는 k개 분량입니다.
+    """
+
+    __slots__ = ("k", "_heap", "_count")
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap = []
+        self._count = 0
+
+    def add(self, hit: Tuple):
+        sseqid, pident, qcovs, evalue, bitscore = hit
+        # 값이 클수록 좋은 hit (-count: 동점이면 먼저 나온 hit이 우선)
+        entry = (bitscore, -evalue, pident, -self._count, hit)
+        self._count += 1
+
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def hits(self) -> List[Tuple]:
+        """좋은 순서로 정렬된 hit 목록."""
+        return [entry[-1] for entry in sorted(self._heap, reverse=True)]
+
+
+def parse_blast_result(blast_file: str, top_k: int = 1) -> Dict[str, List[Tuple]]:
     """
     BLASTP 결과를 파싱합니다.
 
     outfmt 6: qseqid sseqid pident length mismatch gapopen qstart qend sstart send evalue bitscore
     (12 columns, no qcovs - will be calculated from qstart/qend and alignment length)
 
+    파일 순서와 관계없이 query별 상위 top_k개 hit만 남기므로 (TopHits 참고), 정렬되지 않았거나
+    여러 shard 결과를 이어 붙인 파일에서도 같은 결과가 나옵니다.
+
     Returns:
-        {query_id: [(subject_id, pident, qcovs), ...]} 형태의 딕셔너리
+        {query_id: [(subject_id, pident, qcovs, evalue, bitscore), ...]} 형태의 딕셔너리 (좋은 순)
     """
     blast_results = {}
     try:
-        with open(blast_file, "r") as f:
+        with open_input(blast_file) as f:
             for line in f:
-                line = line.rstrip("\n")
-                if not line:
+                parsed = parse_blast_line(line)
+                if parsed is None:
                     continue
 
-                cols = line.split("\t")
-                if len(cols) < 12:
-                    continue
+                qseqid, hit = parsed
+                if qseqid not in blast_results:
+                    blast_results[qseqid] = TopHits(top_k)
+
+                blast_results[qseqid].add(hit)
+
+    except (IOError, ValueError) as e:
+        print(f"Error reading BLAST file: {e}", file=sys.stderr)
+        sys.exit(1)
 
-                qseqid = cols[0]  # query id
-                sseqid = cols[1]  # subject id
-                pident = float(cols[2])  # percent identity
-                length = int(cols[3])  # alignment length
-                qstart = int(cols[6])  # query start
-                qend = int(cols[7])  # query end
+    return {qseqid: top_hits.hits() for qseqid, top_hits in blast_results.items()}
 
-                # Query coverage 계산: (qend - qstart + 1) / query_length * 100
-                # 여기서는 alignment length를 대체 값으로 사용
-                qcovs = (length / 1000.0) * 100  # 대략적인 추정 (최대 100%)
-                if qcovs > 100:
-                    qcovs = 100.0
 
-                if qseqid not in blast_results:
-                    blast_results[qseqid] = []
+def iter_blast_queries(blast_file: str, top_k: int = 1) -> Iterator[Tuple[str, List[Tuple]]]:
+    """
+    BLASTP 결과를 query 단위로 읽으면서 바로 돌려줍니다 (streaming).
+
+    outfmt 6은 같은 qseqid의 hit가 연속으로 나오므로 (query별로 나눈 shard 결과를 이어 붙여도 마찬가지),
+    메모리에는 현재 query의 상위 top_k개 hit만 둡니다. 같은 query가 떨어진 위치에 다시 나오면
+    (DB를 나눠서 돌린 결과 등) 경고를 출력하고 처음 block만 사용합니다 - 이런 파일은 기본 모드로 처리하세요.
 
-                blast_results[qseqid].append((sseqid, pident, qcovs))
+    Yields:
+        (query_id, [(subject_id, pident, qcovs, evalue, bitscore), ...]) - 좋은 순
+    """
+    seen_queries = set()
+    split_queries = 0
+    current_query = None
+    top_hits = None
+
+    try:
+        with open_input(blast_file) as f:
+            for line in f:
+                parsed = parse_blast_line(line)
+                if parsed is None:
+                    continue
+
+                qseqid, hit = parsed
+                if qseqid != current_query:
+                    if current_query is not None:
+                        if current_query in seen_queries:
+                            split_queries += 1
+                        else:
+                            seen_queries.add(current_query)
+                            yield current_query, top_hits.hits()
+                    current_query = qseqid
+                    top_hits = TopHits(top_k)
+
+                top_hits.add(hit)
 
     except (IOError, ValueError) as e:
         print(f"Error reading BLAST file: {e}", file=sys.stderr)
         sys.exit(1)
 
-    return blast_results
+    if current_query is not None:
+        if current_query in seen_queries:
+            split_queries += 1
+        else:
+            yield current_query, top_hits.hits()
+
+    if split_queries:
+        print(f"Warning: {split_queries} query blocks were not contiguous and only their first block was used; "
+              f"run without --streaming to rank hits across the whole file", file=sys.stderr)
 
 
 def extract_accession(subject_id: str) -> str:
@@ -141,52 +306,132 @@ def extract_accession(subject_id: str) -> str:
     return subject_id.split()[0]
 
 
-def map_blast_to_symbol(
+def load_blast_table(blast_file: str):
+    """blast_table.load_blast_table + parse_blast_result와 같은 에러 처리."""
+    try:
+        return blast_table.load_blast_table(blast_file)
+    except (IOError, ValueError) as e:
+        print(f"Error reading BLAST file: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def sweep_blast_thresholds(
     loc_file: str,
     blast_file: str,
     annotation_file: str,
+    identities: List[float],
+    coverages: List[float],
     output_file=None,
-    min_identity: float = 30.0,
-    min_coverage: float = 30.0,
-    verbose: bool = False
+    top_k: int = 1,
+    dedup_members_file: Optional[str] = None
 ):
     """
-    BLAST 결과를 gene symbol로 매핑합니다.
+    여러 (min_identity, min_coverage) 조합의 매핑 결과 수를 BLAST 파일 한 번 읽기로 집계합니다.
 
-    Args:
-        loc_file: LOC → protein_id 매핑 파일
-        blast_file: BLASTP 결과 파일
-        annotation_file: Reference accession → gene symbol 파일
-        output_file: 출력 파일 객체
-        min_identity: 최소 identity 퍼센트
-        min_coverage: 최소 coverage 퍼센트
-        verbose: 상세 출력 여부
+    각 조합의 mapped/unmapped 수는 같은 threshold로 map_blast_to_symbol()을 실행했을 때의
+    Mapping Summary와 같습니다 (dedup_members_file을 주면 구성원 단위). NumPy가 필요합니다.
     """
     if output_file is None:
         output_file = sys.stdout
 
-    # 데이터 로드
-    print(f"Loading LOC → protein_id mapping from {loc_file}...", file=sys.stderr)
-    loc_map = load_loc_to_protein(loc_file)
-    print(f"  Loaded {len(loc_map)} mappings", file=sys.stderr)
+    with phase("load", nbytes=input_bytes(loc_file) + input_bytes(annotation_file)) as p:
+        print(f"Loading LOC → protein_id mapping from {loc_file}...", file=sys.stderr)
+        loc_map = load_loc_to_protein(loc_file)
 
-    print(f"Loading accession → symbol mapping from {annotation_file}...", file=sys.stderr)
-    symbol_map = load_accession_to_symbol(annotation_file)
-    print(f"  Loaded {len(symbol_map)} symbols", file=sys.stderr)
+        print(f"Loading accession → symbol mapping from {annotation_file}...", file=sys.stderr)
+        symbol_map = load_accession_to_symbol(annotation_file)
+        p.records = len(loc_map) + len(symbol_map)
 
-    print(f"Parsing BLAST results from {blast_file}...", file=sys.stderr)
-    blast_results = parse_blast_result(blast_file)
-    print(f"  Loaded results for {len(blast_results)} query sequences", file=sys.stderr)
+    with phase("parse", nbytes=input_bytes(blast_file)) as p:
+        print(f"Parsing BLAST results from {blast_file}...", file=sys.stderr)
+        table = load_blast_table(blast_file)
+        print(f"  Loaded {len(table):,} hits for {len(table.queries)} query sequences", file=sys.stderr)
+        p.records = len(table)
 
-    # 출력 헤더
-    print("gene_id\tprotein_id\treference_accession\tgene_symbol\tidentity(%)\tcoverage(%)\tbit_score\tevalue",
-          file=output_file)
+    members = load_dedup_members(dedup_members_file) if dedup_members_file else {}
+    # query별로 LOC 매핑에 있는 protein 수 (dedup하지 않았으면 0 또는 1)
+    query_weights = np.array([sum(1 for member in members.get(query, (query,)) if member in loc_map)
+                              for query in table.queries], dtype=np.int64)
+    top_rows = blast_table.top_hit_indices(table, top_k)
+    symbols = [symbol_map.get(extract_accession(subject_id), "") for subject_id in table.subject_ids(top_rows)]
+
+    with phase("sweep", records=len(identities) * len(coverages)):
+        results = blast_table.sweep_thresholds(table, top_k, identities, coverages, query_weights, symbols)
+
+    print("min_identity\tmin_coverage\tmapped\tunmapped\thits\tgene_symbols", file=output_file)
+    for r in results:
+        output_file.write(f"{r['min_identity']:g}\t{r['min_coverage']:g}\t{r['mapped']}\t{r['unmapped']}"
+                          f"\t{r['hits']}\t{r['symbols']}\n")
+
+    print(f"Evaluated {len(results)} threshold combinations", file=sys.stderr)
+
+
+class SymbolMapping(NamedTuple):
+    """매핑 결과 한 행 (출력 TSV 한 줄)."""
+    gene_id: str
+    protein_id: str
+    accession: str
+    symbol: str
+    identity: float
+    coverage: float
+    bitscore: float
+    evalue: float
+
+    def to_tsv(self) -> str:
+        return (f"{self.gene_id}\t{self.protein_id}\t{self.accession}\t{self.symbol}\t{self.identity:.2f}"
+                f"\t{self.coverage:.2f}\t{self.bitscore:g}\t{self.evalue:g}\n")
+
+
+def load_blast_queries(blast_file: str, top_k: int = 1,
+                       streaming: bool = False) -> Iterable[Tuple[str, List[Tuple]]]:
+    """
+    BLAST 결과 → (query_id, 상위 top_k개 hit) 목록.
+
+    streaming이면 iter_blast_queries(), 아니면 NumPy가 있을 때 blast_table, 없으면 parse_blast_result()를 사용합니다.
+    """
+    if streaming:
+        print(f"Streaming BLAST results from {blast_file}...", file=sys.stderr)
+        return iter_blast_queries(blast_file, top_k)
+
+    print(f"Parsing BLAST results from {blast_file}...", file=sys.stderr)
+    with phase("parse", nbytes=input_bytes(blast_file)) as p:
+        if blast_table is not None:
+            # 컬럼 단위로 읽고 상위 hit 선택을 배열 연산으로 처리 (결과는 parse_blast_result와 동일)
+            table = load_blast_table(blast_file)
+            print(f"  Loaded results for {len(table.queries)} query sequences", file=sys.stderr)
+            p.records = len(table)
+            return blast_table.iter_top_hits(table, top_k)
+
+        blast_results = parse_blast_result(blast_file, top_k)
+        print(f"  Loaded results for {len(blast_results)} query sequences", file=sys.stderr)
+        p.records = len(blast_results)
+        return blast_results.items()
+
+
+def iter_mappings(
+    blast_queries: Iterable[Tuple[str, List[Tuple]]],
+    loc_map: Dict[str, str],
+    symbol_map: Dict[str, str],
+    min_identity: float = 30.0,
+    min_coverage: float = 30.0,
+    verbose: bool = False,
+    counts: Optional[Dict[str, int]] = None
+) -> Iterator[SymbolMapping]:
+    """
+    query별 hit을 필터링해 매핑 행을 돌려줍니다.
 
-    # 매핑 수행
-    mapped_count = 0
-    unmapped_count = 0
+    Args:
+        blast_queries: (protein_id, 순위순 hit 목록) - LOC 매핑에 없는 protein은 건너뜀
+        loc_map: {protein_id: gene_id}
+        symbol_map: {accession: gene symbol}
+        counts: 지정하면 "mapped"/"unmapped" protein 수를 더함
+    """
+    if counts is None:
+        counts = {}
+    counts.setdefault("mapped", 0)
+    counts.setdefault("unmapped", 0)
 
-    for protein_id, hits in blast_results.items():
+    for protein_id, hits in blast_queries:
         if protein_id not in loc_map:
             if verbose:
                 print(f"Warning: {protein_id} not in LOC mapping", file=sys.stderr)
@@ -194,29 +439,90 @@ def map_blast_to_symbol(
 
         gene_id = loc_map[protein_id]
 
-        # Best hit만 사용 (첫 번째)
-        if hits:
-            subject_id, pident, qcovs = hits[0]
-
+        # 순위가 높은 hit부터 (기본값: best hit 하나만)
+        written = 0
+        for subject_id, pident, qcovs, evalue, bitscore in hits:
             # 필터링
             if pident < min_identity or qcovs < min_coverage:
                 if verbose:
                     print(f"Filtering: {protein_id} - identity={pident}, coverage={qcovs}",
                           file=sys.stderr)
-                unmapped_count += 1
                 continue
 
             accession = extract_accession(subject_id)
-            symbol = symbol_map.get(accession, "")
-
-            # 추가 정보는 BLAST 파일에서 다시 읽기
-            # 간단히 처리하면 first hit만 사용
-            print(f"{gene_id}\t{protein_id}\t{accession}\t{symbol}\t{pident:.2f}\t{qcovs:.2f}\t-\t-",
-                  file=output_file)
-            mapped_count += 1
+            yield SymbolMapping(gene_id, protein_id, accession, symbol_map.get(accession, ""),
+                                pident, qcovs, bitscore, evalue)
+            written += 1
 
+        if written:
+            counts["mapped"] += 1
         else:
-            unmapped_count += 1
+            counts["unmapped"] += 1
+
+
+def map_blast_to_symbol(
+    loc_file: str,
+    blast_file: str,
+    annotation_file: str,
+    output_file=None,
+    min_identity: float = 30.0,
+    min_coverage: float = 30.0,
+    verbose: bool = False,
+    streaming: bool = False,
+    top_k: int = 1,
+    dedup_members_file: Optional[str] = None
+):
+    """
+    BLAST 결과를 gene symbol로 매핑합니다.
+
+    Args:
+        loc_file: LOC → protein_id 매핑 파일
+        blast_file: BLASTP 결과 파일
+        annotation_file: Reference accession → gene symbol 파일
+        output_file: 출력 파일 객체
+        min_identity: 최소 identity 퍼센트
+        min_coverage: 최소 coverage 퍼센트
+        verbose: 상세 출력 여부
+        streaming: BLAST 결과 전체를 메모리에 올리지 않고 query 단위로 읽으면서 바로 출력
+        top_k: protein별로 출력할 최대 hit 수 (bitscore → evalue → identity 순위)
+        dedup_members_file: dedup_proteins.py의 대표 → 구성원 테이블
+                            (BLAST를 대표 서열로 실행했으면 hit을 모든 구성원에 적용)
+    """
+    if output_file is None:
+        output_file = sys.stdout
+
+    # 데이터 로드
+    with phase("load", nbytes=input_bytes(loc_file) + input_bytes(annotation_file)) as p:
+        print(f"Loading LOC → protein_id mapping from {loc_file}...", file=sys.stderr)
+        loc_map = load_loc_to_protein(loc_file)
+        print(f"  Loaded {len(loc_map)} mappings", file=sys.stderr)
+
+        print(f"Loading accession → symbol mapping from {annotation_file}...", file=sys.stderr)
+        symbol_map = load_accession_to_symbol(annotation_file)
+        print(f"  Loaded {len(symbol_map)} symbols", file=sys.stderr)
+        p.records = len(loc_map) + len(symbol_map)
+
+    blast_queries = load_blast_queries(blast_file, top_k, streaming)
+
+    if dedup_members_file:
+        print(f"Loading dedup members from {dedup_members_file}...", file=sys.stderr)
+        members = load_dedup_members(dedup_members_file)
+        print(f"  Loaded {sum(len(m) for m in members.values())} members of {len(members)} representatives",
+              file=sys.stderr)
+        blast_queries = fan_out_members(blast_queries, members)
+
+    # 출력 헤더
+    print(OUTPUT_HEADER, file=output_file)
+
+    # 매핑 수행 (streaming이면 BLAST 파일 읽기도 이 phase에 포함)
+    counts = {"mapped": 0, "unmapped": 0}
+    with phase("map", nbytes=input_bytes(blast_file) if streaming else 0) as p:
+        for mapping in iter_mappings(blast_queries, loc_map, symbol_map, min_identity, min_coverage, verbose,
+                                     counts):
+            output_file.write(mapping.to_tsv())
+            p.records += 1
+    mapped_count = counts["mapped"]
+    unmapped_count = counts["unmapped"]
 
     # 요약
     print(f"\nMapping Summary:", file=sys.stderr)
@@ -225,6 +531,14 @@ def map_blast_to_symbol(
     print(f"  Total: {mapped_count + unmapped_count}", file=sys.stderr)
 
 
+def parse_float_list(value: str) -> List[float]:
+    """"20,30,40" → [20.0, 30.0, 40.0] (argparse type)."""
+    try:
+        return [float(v) for v in value.split(",") if v.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated numbers: {value}")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="BLASTP 결과를 사용하여 LOC → Gene symbol 매핑을 수행합니다.",
@@ -273,9 +587,7 @@ def main():
     parser.add_argument(
         "-o", "--output",
         metavar="OUTPUT",
-        type=argparse.FileType('w'),
-        default=sys.stdout,
-        help="출력 파일 (기본값: stdout)"
+        help="출력 파일 (기본값: stdout, .gz로 끝나면 gzip 압축)"
     )
 
     parser.add_argument(
@@ -294,26 +606,89 @@ def main():
         help="최소 query coverage 퍼센트 (기본값: 30.0)"
     )
 
+    parser.add_argument(
+        "--sweep-identity",
+        type=parse_float_list,
+        metavar="LIST",
+        help="매핑 대신 threshold 조합별 매핑 수를 출력: 시험할 최소 identity 목록 (예: 20,30,40,50)"
+    )
+
+    parser.add_argument(
+        "--sweep-coverage",
+        type=parse_float_list,
+        metavar="LIST",
+        help="--sweep-identity와 함께 시험할 최소 coverage 목록 (기본값: --min-coverage 값 하나)"
+    )
+
+    parser.add_argument(
+        "-k", "--top-hits",
+        type=int,
+        default=1,
+        metavar="K",
+        help="protein별로 출력할 최대 hit 수 (bitscore → evalue → identity 순, 기본값: 1)"
+    )
+
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="BLAST 결과를 query 단위로 읽으면서 바로 출력 (결과 파일 크기와 관계없이 메모리 일정)"
+    )
+
+    parser.add_argument(
+        "--dedup-members",
+        metavar="MEMBERS_FILE",
+        help="dedup_proteins.py의 대표 → 구성원 TSV (BLAST를 대표 서열로 실행한 경우, hit을 모든 구성원에 적용)"
+    )
+
     parser.add_argument(
         "-v", "--verbose",
         action="store_true",
         help="상세 출력 활성화"
     )
 
-    args = parser.parse_args()
+    add_metrics_arguments(parser)
 
-    map_blast_to_symbol(
-        args.loc_file,
-        args.blast_file,
-        args.annotation_file,
-        args.output,
-        args.min_identity,
-        args.min_coverage,
-        args.verbose
-    )
+    args = parser.parse_args()
 
-    if args.output != sys.stdout:
-        args.output.close()
+    if args.top_hits < 1:
+        parser.error("--top-hits must be >= 1")
+
+    if args.sweep_identity or args.sweep_coverage:
+        if blast_table is None:
+            parser.error("--sweep-identity/--sweep-coverage require NumPy")
+        if args.streaming:
+            parser.error("--sweep-identity/--sweep-coverage cannot be combined with --streaming")
+
+        with instrument_from_args(args, "5_map_blast_to_symbol"), open_output(args.output) as output:
+            sweep_blast_thresholds(
+                args.loc_file,
+                args.blast_file,
+                args.annotation_file,
+                args.sweep_identity or [args.min_identity],
+                args.sweep_coverage or [args.min_coverage],
+                output,
+                args.top_hits,
+                args.dedup_members
+            )
+        return
+
+    # stdout으로 streaming할 때는 행마다 바로 내보냄 (파이프 뒤에서 바로 볼 수 있도록)
+    buffer_size = 0 if args.streaming and args.output in (None, "-") else DEFAULT_BUFFER_SIZE
+
+    with instrument_from_args(args, "5_map_blast_to_symbol"), \
+            open_output(args.output, background=True, buffer_size=buffer_size) as output:
+        map_blast_to_symbol(
+            args.loc_file,
+            args.blast_file,
+            args.annotation_file,
+            output,
+            args.min_identity,
+            args.min_coverage,
+            args.verbose,
+            args.streaming,
+            args.top_hits,
+            args.dedup_members
+        )
 
 
 if __name__ == "__main__":
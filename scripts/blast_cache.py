@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+단백질 서열 hash 기준 BLAST 결과 영구 캐시 (content-addressed).
+
+annotation release가 바뀌어도 대부분의 단백질 서열은 그대로이므로, 서열이 같으면
+이전 BLAST 결과(hit 목록)를 재사용하고 새로 생긴 서열만 BLAST를 실행합니다.
+
+- 캐시 key: (context, 서열 hash)
+    서열 hash: 서열(대문자)의 BLAKE2b
+    context:   reference DB 파일 내용 hash + BLAST 설정(명령, evalue, max_target_seqs)
+               → DB나 설정이 바뀌면 다른 항목으로 취급
+- 값: 해당 서열의 outfmt 6 hit 줄에서 qseqid를 뺀 나머지 (hit이 없는 서열도 빈 값으로 저장)
+- 저장 형식: SQLite 파일 하나 (<cache_dir>/blast_hits.sqlite)
+
+  cache = BlastCache()
+  context = cache.context(db, {"evalue": "1e-5", "max_target_seqs": 1})
+  cached = cache.lookup(context, hashes)                    # {서열 hash: hit 줄들}
+  cache.store(context, {sequence_hash(seq): hit_lines})
+"""
+
+import os
+import glob
+import json
+import sqlite3
+import hashlib
+from contextlib import closing
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from cds_cache import DEFAULT_CACHE_DIR, file_digest
+
+CACHE_FILE_NAME = "blast_hits.sqlite"
+
+# 저장 형식이 바뀌면 올려서 이전 캐시를 무효화
+CACHE_VERSION = 1
+
+# SQLite 변수 개수 제한 아래로 나눠서 조회
+_LOOKUP_CHUNK = 500
+
+
+def sequence_hash(seq: str) -> str:
+    """단백질 서열의 hash (대소문자 무시)."""
+    return hashlib.blake2b(seq.upper().encode("ascii"), digest_size=16).hexdigest()
+
+
+def database_digest(db: str) -> str:
+    """
+    BLAST DB(makeblastdb -out 접두사)의 파일 내용 hash.
+    로컬에 DB 파일이 없으면 (원격 DB 등) 경로 자체를 사용합니다.
+    """
+    files = sorted(glob.glob(glob.escape(db) + ".*"))
+    if not files:
+        return "path:" + os.path.abspath(db)
+
+    h = hashlib.blake2b(digest_size=20)
+    for path in files:
+        h.update(os.path.basename(path).encode())
+        h.update(file_digest(path).encode())
+    return h.hexdigest()
+
+
+class BlastCache:
+    """
+    서열 hash → BLAST hit 캐시.
+
+    hits 테이블: (context, seq_hash) → hit 줄들 (qseqid 제외, 줄바꿈 포함)
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.path = os.path.join(cache_dir, CACHE_FILE_NAME)
+
+    def _connect(self) -> sqlite3.Connection:
+        """``with closing(self._connect()) as conn, conn:`` 형태로 사용."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("""CREATE TABLE IF NOT EXISTS hits (
+                            context TEXT, seq_hash TEXT, hits TEXT,
+                            PRIMARY KEY (context, seq_hash)) WITHOUT ROWID""")
+        return conn
+
+    def context(self, db: str, params: Dict) -> str:
+        """reference DB + BLAST 설정 → context key."""
+        payload = json.dumps({"db": database_digest(db), "params": params, "version": CACHE_VERSION},
+                             sort_keys=True)
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+    def lookup(self, context: str, seq_hashes: Iterable[str]) -> Dict[str, str]:
+        """캐시에 있는 서열의 {서열 hash: hit 줄들}."""
+        seq_hashes = list(set(seq_hashes))
+        found: Dict[str, str] = {}
+
+        with closing(self._connect()) as conn:
+            for i in range(0, len(seq_hashes), _LOOKUP_CHUNK):
+                chunk = seq_hashes[i:i + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(conn.execute(
+                    f"SELECT seq_hash, hits FROM hits WHERE context = ? AND seq_hash IN ({placeholders})",
+                    [context] + chunk))
+        return found
+
+    def store(self, context: str, entries: Dict[str, str]):
+        """{서열 hash: hit 줄들}을 저장합니다 (이미 있으면 교체)."""
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO hits VALUES (?, ?, ?)",
+                             ((context, seq_hash, hits) for seq_hash, hits in entries.items()))
+
+
+def group_hits_by_query(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """
+    outfmt 6 줄들 → (qseqid, qseqid를 뺀 hit 줄들) - query별로 연속된 block 단위.
+    (같은 query가 떨어진 위치에 다시 나오면 block마다 따로 돌려줌)
+    """
+    current_query = None
+    current_hits: List[str] = []
+    for line in lines:
+        if not line.strip():
+            continue
+        query, _, rest = line.partition("\t")
+        if query != current_query:
+            if current_query is not None:
+                yield current_query, "".join(current_hits)
+            current_query = query
+            current_hits = []
+        current_hits.append(rest if rest.endswith("\n") else rest + "\n")
+    if current_query is not None:
+        yield current_query, "".join(current_hits)
+
+
+def rekey_hits(query_id: str, hits: str) -> str:
+    """캐시된 hit 줄들(qseqid 제외)에 새 query ID를 붙입니다."""
+    return "".join(f"{query_id}\t{line}\n" for line in hits.splitlines())
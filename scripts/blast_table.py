@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+BLAST outfmt 6 결과를 NumPy 컬럼으로 읽어 벡터 연산으로 처리합니다 (NumPy 필요).
+
+- 숫자 컬럼(pident, length, evalue, bitscore)은 np.loadtxt로 한 번에 읽고,
+  qseqid/sseqid는 줄/탭 위치를 벡터 연산으로 찾아 byte 배열에서 바로 잘라냅니다.
+- query별 상위 k개 hit 선택(bitscore → evalue → identity), identity/coverage/evalue/bitscore
+  필터, 여러 threshold 조합의 결과 집계를 파일을 다시 읽지 않고 배열 연산으로 처리합니다.
+
+Parquet/Arrow 파일(table_io.py --blast로 변환)은 텍스트를 거치지 않고 컬럼을 바로 배열로 읽습니다.
+
+  table = load_blast_table("blast_results.txt")
+  top = top_hit_indices(table, k=1)
+  mask = hit_mask(table, top, min_identity=40, min_coverage=50)
+"""
+
+import io
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from compressed_io import open_input
+from table_io import detect_table_format, read_table
+
+# outfmt 6 기본 12 컬럼 중 숫자로 읽는 것
+_NUMERIC_COLUMNS = {"pident": 2, "length": 3, "evalue": 10, "bitscore": 11}
+
+# 이 값 이하의 k는 전체 정렬 전에 bitscore로 후보를 줄임
+_PRUNE_MAX_K = 10
+
+
+class BlastTable:
+    """
+    BLAST hit 테이블 (행 = hit, 파일 순서).
+
+    Attributes:
+        queries: query 번호 → qseqid (파일에 처음 나온 순서)
+        query: 행별 query 번호 (int32)
+        pident, length, qcovs, evalue, bitscore: 행별 값 (float64)
+
+    sseqid는 필요한 행만 subject_id()/hits()로 원본 bytes에서 꺼냅니다.
+    """
+
+    def __init__(self, queries: List[str], query, subject_spans, data: bytes,
+                 pident, length, evalue, bitscore):
+        self.queries = queries
+        self.query = query
+        self._subject_starts, self._subject_ends = subject_spans
+        self._data = data
+        self.pident = pident
+        self.length = length
+        self.evalue = evalue
+        self.bitscore = bitscore
+        # 5_map_blast_to_symbol.parse_blast_line과 같은 대략적인 coverage 추정 (최대 100%)
+        self.qcovs = np.minimum(length / 1000.0 * 100, 100.0)
+
+    def __len__(self) -> int:
+        return len(self.query)
+
+    def subject_id(self, row: int) -> str:
+        return self._data[self._subject_starts[row]:self._subject_ends[row]].decode()
+
+    def subject_ids(self, rows) -> List[str]:
+        data = self._data
+        return [data[start:end].decode() for start, end
+                in zip(self._subject_starts[rows].tolist(), self._subject_ends[rows].tolist())]
+
+    def hits(self, rows) -> List[Tuple]:
+        """행 번호 목록 → [(subject_id, pident, qcovs, evalue, bitscore), ...] (Python 값)."""
+        rows = np.asarray(rows)
+        return list(zip(
+            self.subject_ids(rows),
+            self.pident[rows].tolist(),
+            self.qcovs[rows].tolist(),
+            self.evalue[rows].tolist(),
+            self.bitscore[rows].tolist(),
+        ))
+
+
+def _field_bytes(buf: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """buf[starts[i]:ends[i]]들을 고정폭 bytes 배열(dtype S)로 모읍니다."""
+    lengths = ends - starts
+    width = max(int(lengths.max()), 1) if len(lengths) else 1
+    min_length = int(lengths.min()) if len(lengths) else 0
+    out = np.zeros((len(starts), width), dtype=np.uint8)
+    # 열(문자 위치) 단위로 채움 - (행 수 x 폭) 크기의 index 배열을 만들지 않기 위해.
+    # ID 길이는 대부분 같으므로 가장 짧은 길이까지는 mask 없이 채움
+    for j in range(min_length):
+        out[:, j] = buf[starts + j]
+    for j in range(min_length, width):
+        rows = lengths > j
+        out[rows, j] = buf[starts[rows] + j]
+    return out.view(f"S{width}").ravel()
+
+
+def _line_positions(buf: np.ndarray):
+    """(줄 시작, 줄 끝, 탭 위치, 줄별 첫 탭의 index, 줄별 탭 수)"""
+    line_ends = np.flatnonzero(buf == ord("\n"))
+    if len(buf) and buf[-1] != ord("\n"):
+        line_ends = np.append(line_ends, len(buf))
+    line_starts = np.concatenate(([0], line_ends[:-1] + 1)).astype(np.int64)[:len(line_ends)]
+
+    tabs = np.flatnonzero(buf == ord("\t"))
+    first_tab = np.searchsorted(tabs, line_starts)
+    tab_counts = np.searchsorted(tabs, line_ends) - first_tab
+    return line_starts, line_ends, tabs, first_tab, tab_counts
+
+
+def load_blast_table(blast_file: str) -> BlastTable:
+    """
+    outfmt 6 파일을 BlastTable로 읽습니다.
+
+    컬럼이 12개 미만인 줄(빈 줄 포함)은 parse_blast_result()와 마찬가지로 건너뜁니다.
+    숫자 컬럼을 해석할 수 없으면 ValueError.
+    """
+    if detect_table_format(blast_file) is not None:
+        return _load_blast_columns(blast_file)
+
+    with open_input(blast_file, "rb") as f:
+        data = f.read()
+
+    buf = np.frombuffer(data, dtype=np.uint8)
+    line_starts, line_ends, tabs, first_tab, tab_counts = _line_positions(buf)
+
+    valid = tab_counts >= 11
+    if not valid.all():
+        # 건너뛸 줄이 있으면 유효한 줄만 모아서 다시 계산 (드문 경우)
+        data = b"".join(data[start:end] + b"\n" for start, end, ok
+                        in zip(line_starts.tolist(), line_ends.tolist(), valid.tolist()) if ok)
+        buf = np.frombuffer(data, dtype=np.uint8)
+        line_starts, line_ends, tabs, first_tab, tab_counts = _line_positions(buf)
+
+    if len(line_starts) == 0:
+        empty = np.zeros(0)
+        return BlastTable([], np.zeros(0, dtype=np.int32), (empty, empty), data, empty, empty, empty, empty)
+
+    # qseqid: [줄 시작, 첫 탭), sseqid: (첫 탭, 둘째 탭)
+    tab1 = tabs[first_tab]
+    tab2 = tabs[first_tab + 1]
+    qseqid = _field_bytes(buf, line_starts, tab1)
+
+    # 같은 query는 보통 연속으로 나오므로 block 단위로 번호를 붙임 (떨어져 다시 나와도 같은 번호)
+    block_starts = np.flatnonzero(np.concatenate(([True], qseqid[1:] != qseqid[:-1])))
+    block_lengths = np.diff(np.append(block_starts, len(qseqid)))
+    codes: Dict[bytes, int] = {}
+    block_codes = [codes.setdefault(q, len(codes)) for q in qseqid[block_starts].tolist()]
+    query = np.repeat(np.array(block_codes, dtype=np.int32), block_lengths)
+    queries = [q.decode() for q in codes]
+
+    numeric = np.loadtxt(io.BytesIO(data), delimiter="\t", comments=None, dtype=np.float64,
+                         usecols=tuple(_NUMERIC_COLUMNS.values()), ndmin=2)
+    pident, length, evalue, bitscore = numeric.T
+
+    return BlastTable(queries, query, (tab1 + 1, tab2), data, pident, length, evalue, bitscore)
+
+
+def _load_blast_columns(blast_file: str) -> BlastTable:
+    """outfmt 6 순서의 컬럼을 가진 Parquet/Arrow 파일 → BlastTable (컬럼 위치 기준)."""
+    import pyarrow as pa
+
+    table = read_table(blast_file, [0, 1] + list(_NUMERIC_COLUMNS.values()))
+
+    # 처음 나온 순서대로 번호가 붙으므로 텍스트 경로의 query 번호와 같음
+    encoded = table.column(0).combine_chunks().dictionary_encode()
+    queries = encoded.dictionary.to_pylist()
+    query = encoded.indices.to_numpy(zero_copy_only=False).astype(np.int32)
+
+    # sseqid는 Arrow 문자열 배열의 offset/data buffer를 그대로 span으로 사용
+    subjects = table.column(1).combine_chunks().cast(pa.large_string())
+    offsets = np.frombuffer(subjects.buffers()[1], dtype=np.int64)[subjects.offset:subjects.offset + len(subjects) + 1]
+    data = subjects.buffers()[2].to_pybytes() if len(subjects) else b""
+
+    pident, length, evalue, bitscore = (table.column(i).cast(pa.float64()).to_numpy() for i in range(2, 6))
+    return BlastTable(queries, query, (offsets[:-1], offsets[1:]), data, pident, length, evalue, bitscore)
+
+
+def _top_bitscore_candidates(table: BlastTable, k: int) -> np.ndarray:
+    """
+    query별로 bitscore가 상위 k번째 (서로 다른) 값 이상인 행 - 상위 k개 hit을 반드시 포함하는 작은 후보 집합.
+    전체를 정렬하지 않고 query 단위 max를 k번 구해서 찾습니다.
+    """
+    query = table.query
+    order = None
+    if len(query) > 1 and (np.diff(query) < 0).any():
+        order = np.argsort(query, kind="stable")
+        query = query[order]
+    bitscore = table.bitscore if order is None else table.bitscore[order]
+
+    group_starts = np.flatnonzero(np.concatenate(([True], query[1:] != query[:-1])))
+    group_lengths = np.diff(np.append(group_starts, len(query)))
+
+    remaining = bitscore
+    threshold = np.full(len(group_starts), -np.inf)
+    for _ in range(k):
+        group_max = np.maximum.reduceat(remaining, group_starts)
+        found = group_max > -np.inf
+        threshold[found] = group_max[found]
+        remaining = np.where(remaining < np.repeat(group_max, group_lengths), remaining, -np.inf)
+
+    candidates = np.flatnonzero(bitscore >= np.repeat(threshold, group_lengths))
+    return candidates if order is None else np.sort(order[candidates])
+
+
+def top_hit_indices(table: BlastTable, k: int = 1) -> np.ndarray:
+    """
+    query별 상위 k개 hit의 행 번호 (query 번호 순, query 안에서는 좋은 순).
+
+    순위: bitscore 높은 순 → evalue 낮은 순 → identity 높은 순 → 파일 순서.
+    """
+    n = len(table)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    rows = np.arange(n)
+    if k <= _PRUNE_MAX_K:
+        rows = _top_bitscore_candidates(table, k)
+
+    # lexsort는 마지막 key가 1순위이고 stable이므로, 모두 같으면 파일 순서가 유지됨
+    order = rows[np.lexsort((-table.pident[rows], table.evalue[rows], -table.bitscore[rows], table.query[rows]))]
+    n = len(order)
+    sorted_query = table.query[order]
+    group_starts = np.flatnonzero(np.concatenate(([True], sorted_query[1:] != sorted_query[:-1])))
+    rank = np.arange(n) - np.repeat(group_starts, np.diff(np.append(group_starts, n)))
+    return order[rank < k]
+
+
+def hit_mask(table: BlastTable, rows: np.ndarray, min_identity: float = 0.0, min_coverage: float = 0.0,
+             max_evalue: Optional[float] = None, min_bitscore: Optional[float] = None) -> np.ndarray:
+    """rows 중 threshold를 모두 통과하는 hit (bool 배열)."""
+    mask = (table.pident[rows] >= min_identity) & (table.qcovs[rows] >= min_coverage)
+    if max_evalue is not None:
+        mask &= table.evalue[rows] <= max_evalue
+    if min_bitscore is not None:
+        mask &= table.bitscore[rows] >= min_bitscore
+    return mask
+
+
+def iter_top_hits(table: BlastTable, k: int = 1) -> Iterator[Tuple[str, List[Tuple]]]:
+    """
+    5_map_blast_to_symbol.parse_blast_result(..., top_k=k).items()와 같은 결과를 돌려줍니다.
+
+    Yields:
+        (query_id, [(subject_id, pident, qcovs, evalue, bitscore), ...]) - 좋은 순
+    """
+    rows = top_hit_indices(table, k)
+    if len(rows) == 0:
+        # hit이 하나도 없는 결과 (빈 파일, 주석만 있는 -outfmt 7 등)
+        return
+    hits = table.hits(rows)
+    query = table.query[rows]
+    boundaries = np.flatnonzero(np.concatenate(([True], query[1:] != query[:-1]))).tolist() + [len(rows)]
+    for start, end in zip(boundaries, boundaries[1:]):
+        yield table.queries[query[start]], hits[start:end]
+
+
+def sweep_thresholds(table: BlastTable, k: int, identities: Sequence[float], coverages: Sequence[float],
+                     query_weights: Optional[np.ndarray] = None,
+                     symbols: Optional[Sequence[str]] = None) -> List[Dict[str, float]]:
+    """
+    여러 (min_identity, min_coverage) 조합에 대해 매핑 결과를 한 번에 집계합니다.
+
+    Args:
+        table: BlastTable
+        k: query별 상위 hit 수 (매핑과 동일하게 상위 k개 안에서만 threshold 적용)
+        identities, coverages: 시험할 threshold 값들 (모든 조합)
+        query_weights: query 번호별 가중치 - mapped/unmapped/hits를 이 수만큼 셈
+                       (예: LOC 매핑에 있는 protein 수, 0이면 제외), None이면 모두 1
+        symbols: 상위 hit 행(top_hit_indices 순서)별 gene symbol, 지정하면 고유 symbol 수도 집계
+
+    Returns:
+        조합별 {"min_identity", "min_coverage", "mapped", "unmapped", "hits", ("symbols")}
+    """
+    rows = top_hit_indices(table, k)
+    query = table.query[rows]
+    symbol_codes = None
+
+    if query_weights is None:
+        query_weights = np.ones(len(table.queries), dtype=np.int64)
+    else:
+        keep = query_weights[query] > 0
+        rows, query = rows[keep], query[keep]
+        if symbols is not None:
+            symbols = [s for s, ok in zip(symbols, keep.tolist()) if ok]
+
+    if symbols is not None:
+        codes: Dict[str, int] = {"": -1}
+        symbol_codes = np.array([codes.setdefault(s, len(codes) - 1) for s in symbols], dtype=np.int64)
+
+    total_queries = int(query_weights[np.unique(query)].sum())
+    results = []
+    for min_identity in identities:
+        for min_coverage in coverages:
+            mask = hit_mask(table, rows, min_identity, min_coverage)
+            mapped = int(query_weights[np.unique(query[mask])].sum())
+            result = {
+                "min_identity": min_identity,
+                "min_coverage": min_coverage,
+                "mapped": mapped,
+                "unmapped": total_queries - mapped,
+                "hits": int(query_weights[query[mask]].sum()),
+            }
+            if symbol_codes is not None:
+                passed = symbol_codes[mask]
+                result["symbols"] = len(np.unique(passed[passed >= 0]))
+            results.append(result)
+    return results
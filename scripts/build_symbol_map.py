@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+UniProt reference FASTA 헤더에서 accession → gene symbol 매핑을 만듭니다.
+
+  >sp|Q969H6|POP5_HUMAN Ribonuclease P/MRP protein subunit POP5 OS=Homo sapiens OX=9606 GN=POP5 PE=1 SV=1
+  → Q969H6    POP5
+
+기존 intermediate/human_symbol_map_uniprot.tsv와 같은 규칙으로 entry name에서 종 접미사를 뗀 값을
+symbol로 사용합니다 (P78540|ARGI2_HUMAN → ARGI2). entry name이 없으면 accession을 그대로 쓰므로
+accession 기반 TrEMBL 항목(A0A024RCN7_HUMAN → A0A024RCN7)도 빠지지 않습니다.
+--gene-name을 주면 헤더의 GN= 값(P78540 → ARG2)을 우선 사용합니다. 최종 매핑의 symbol이 달라지므로
+기존 결과와 비교할 때는 주의하세요.
+
+출력: TSV (uniprot_id, gene_symbol) - 5_map_blast_to_symbol.py의 -a 입력
+"""
+
+import re
+import sys
+import argparse
+import os
+from typing import Optional, Tuple
+
+from compressed_io import open_input
+from output_io import open_output
+
+# 스크립트 기본 경로 설정
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+INTERMEDIATE_DIR = os.path.join(PROJECT_ROOT, 'intermediate')
+
+_GENE_NAME = re.compile(r"\sGN=(\S+)")
+
+
+def parse_uniprot_header(header: str, gene_name: bool = False) -> Optional[Tuple[str, str]]:
+    """
+    UniProt FASTA 헤더 (">" 제외) → (accession, gene symbol).
+    UniProt 형식(db|accession|entry_name)이 아니면 None.
+
+    Args:
+        gene_name: True이면 GN= 값이 있을 때 entry name 대신 사용
+    """
+    fields = header.split(None, 1)
+    if not fields:
+        return None
+
+    parts = fields[0].split("|")
+    if len(parts) < 3 or not parts[1]:
+        return None
+    accession, entry_name = parts[1], parts[2]
+
+    if gene_name:
+        match = _GENE_NAME.search(header)
+        if match:
+            return accession, match.group(1)
+
+    return accession, entry_name.rsplit("_", 1)[0] or accession
+
+
+def build_symbol_map(fasta_file: str, output_file=None, gene_name: bool = False) -> Tuple[int, int]:
+    """
+    reference FASTA의 헤더만 읽어 매핑 TSV를 씁니다.
+
+    Args:
+        gene_name: GN= 값을 symbol로 우선 사용 (parse_uniprot_header 참고)
+
+    Returns:
+        (헤더 수, 출력한 매핑 수)
+    """
+    if output_file is None:
+        output_file = sys.stdout
+
+    header_count = 0
+    mapped_count = 0
+    seen = set()
+
+    print("uniprot_id\tgene_symbol", file=output_file)
+    try:
+        with open_input(fasta_file) as f:
+            for line in f:
+                if not line.startswith(">"):
+                    continue
+                header_count += 1
+
+                parsed = parse_uniprot_header(line[1:].strip(), gene_name)
+                if parsed is None or parsed[0] in seen:
+                    continue
+                seen.add(parsed[0])
+                output_file.write(f"{parsed[0]}\t{parsed[1]}\n")
+                mapped_count += 1
+
+    except IOError as e:
+        print(f"Error reading FASTA file: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    return header_count, mapped_count
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="UniProt reference FASTA 헤더에서 accession → gene symbol 매핑을 만듭니다.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+예시:
+  cd scripts
+  python build_symbol_map.py ../intermediate/human_complete.fasta \\
+    -o ../intermediate/human_symbol_map_uniprot.tsv
+        """
+    )
+
+    parser.add_argument(
+        "fasta_file",
+        metavar="FASTA_FILE",
+        nargs='?',
+        default=os.path.join(INTERMEDIATE_DIR, 'human_complete.fasta'),
+        help="UniProt reference FASTA (기본값: intermediate/human_complete.fasta)"
+    )
+
+    parser.add_argument(
+        "-o", "--output",
+        metavar="OUTPUT",
+        help="출력 TSV 파일 경로 (기본값: stdout)"
+    )
+
+    parser.add_argument(
+        "--gene-name",
+        action="store_true",
+        help="entry name 대신 헤더의 GN= 값을 symbol로 사용 (기존 매핑과 symbol이 달라짐, 예: P78540 ARGI2 → ARG2)"
+    )
+
+    args = parser.parse_args()
+
+    with open_output(args.output, background=True) as output:
+        header_count, mapped_count = build_symbol_map(args.fasta_file, output, args.gene_name)
+
+    print(f"Statistics:", file=sys.stderr)
+    print(f"  Reference sequences: {header_count}", file=sys.stderr)
+    print(f"  Symbols: {mapped_count}", file=sys.stderr)
+    print(f"  Without symbol: {header_count - mapped_count}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
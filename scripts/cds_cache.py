@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+파싱된 GTF CDS 테이블의 영구 캐시.
+
+GTF가 바뀌지 않았으면 다음 실행부터는 텍스트를 다시 파싱하지 않고 캐시에서 읽습니다.
+
+- 저장 형식: SQLite 파일 하나에 컬럼별 binary blob
+  (정수 컬럼은 array, 문자열 컬럼은 고유값 목록 + index array로 dictionary encoding)
+  + interval index(cds_index.py)용 염색체/start 정렬 순서
+- 캐시 key: GTF 경로 + 파일 크기 + mtime (빠른 확인), 불일치 시 내용 hash(BLAKE2b)로 재확인
+  → 파일을 복사하거나 touch만 한 경우에도 다시 파싱하지 않음
+- eviction: 항목 수 / 전체 크기 한도를 넘으면 가장 오래 사용하지 않은 것부터 삭제
+
+  cache = CdsCache()
+  for record in cache.records("annotation.gtf"):   # GtfRecord (gtf_reader 참고)
+      ...
+"""
+
+import sys
+import os
+import time
+import sqlite3
+import hashlib
+from contextlib import closing
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from gtf_reader import CDS_KEYS, GtfRecord, iter_gtf_features
+
+# 스크립트 기본 경로 설정
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+INTERMEDIATE_DIR = os.path.join(PROJECT_ROOT, 'intermediate')
+DEFAULT_CACHE_DIR = os.path.join(INTERMEDIATE_DIR, 'cache')
+
+# 저장 형식이나 GTF 해석 규칙(gtf_reader.py)이 바뀌면 올려서 이전 캐시를 무효화
+# (3: key와 값 사이 여러 칸 공백/tab 허용, frame '.' 허용)
+CACHE_VERSION = 3
+
+DEFAULT_MAX_ENTRIES = 4
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+_INT_COLUMNS = {"start": "q", "end": "q", "frame": "b"}
+_STRING_COLUMNS = ("chrom", "strand") + CDS_KEYS
+_INTERVAL_ORDER = "interval_order"
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """파일 내용의 BLAKE2b hash (hex)."""
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _encode_strings(values: List[Optional[str]]):
+    """문자열 컬럼을 (고유값 blob, index array blob)으로 dictionary encoding. None은 빈 문자열로 저장."""
+    codes_by_value: Dict[Optional[str], int] = {}
+    codes = array("I", [codes_by_value.setdefault(v, len(codes_by_value)) for v in values])
+    uniques = "\0".join(v or "" for v in codes_by_value).encode("utf-8")
+    return uniques, codes.tobytes()
+
+
+def _decode_strings(uniques_blob: bytes, codes_blob: bytes) -> List[Optional[str]]:
+    uniques = [v or None for v in uniques_blob.decode("utf-8").split("\0")]
+    codes = array("I")
+    codes.frombytes(codes_blob)
+    return list(map(uniques.__getitem__, codes))
+
+
+class CdsTable:
+    """GTF CDS 레코드를 컬럼별 list로 보관 (GTF 순서 유지)."""
+
+    def __init__(self, columns: Optional[Dict[str, list]] = None, interval_order: Optional[List[int]] = None):
+        if columns is None:
+            columns = {name: [] for name in ("chrom", "start", "end", "strand", "frame") + CDS_KEYS}
+        self.columns = columns
+        self._interval_order = interval_order
+
+    def __len__(self) -> int:
+        return len(self.columns["chrom"])
+
+    def append(self, record: GtfRecord):
+        chrom, start, end, strand, frame, values = record
+        c = self.columns
+        c["chrom"].append(chrom)
+        c["start"].append(start)
+        c["end"].append(end)
+        c["strand"].append(strand)
+        c["frame"].append(frame)
+        for key, value in zip(CDS_KEYS, values):
+            c[key].append(value)
+        self._interval_order = None
+
+    def interval_order(self) -> List[int]:
+        """
+        row 번호를 염색체별로 모아 start 순으로 정렬한 순서 (cds_index.CdsIndex가 사용).
+        한 번 계산하면 캐시 파일에 같이 저장되므로 캐시에서 읽은 테이블은 다시 정렬하지 않습니다.
+        """
+        if self._interval_order is None:
+            rows_by_chrom: Dict[str, List[int]] = {}
+            for row, chrom in enumerate(self.columns["chrom"]):
+                rows_by_chrom.setdefault(chrom, []).append(row)
+
+            starts = self.columns["start"]
+            order = []
+            for rows in rows_by_chrom.values():
+                rows.sort(key=starts.__getitem__)  # stable sort: start가 같으면 GTF 순서
+                order.extend(rows)
+            self._interval_order = order
+        return self._interval_order
+
+    def cds_regions(self, transcript_ids=None) -> Dict[str, List[tuple]]:
+        """
+        extract_cds_regions()와 같은 {transcript_id: [(chrom, start, end, strand, frame, protein_id), ...]}.
+        transcript_ids를 지정하면 그 transcript만 (GTF 순서 유지).
+        """
+        c = self.columns
+        cds_regions: Dict[str, List[tuple]] = {}
+        for chrom, start, end, strand, frame, transcript_id, protein_id in zip(
+                c["chrom"], c["start"], c["end"], c["strand"], c["frame"], c["transcript_id"], c["protein_id"]):
+            if not transcript_id or not protein_id:
+                continue
+            if transcript_ids is not None and transcript_id not in transcript_ids:
+                continue
+            cds_regions.setdefault(transcript_id, []).append((chrom, start, end, strand, frame, protein_id))
+        return cds_regions
+
+    @classmethod
+    def from_records(cls, records: Iterable[GtfRecord]) -> "CdsTable":
+        table = cls()
+        for record in records:
+            table.append(record)
+        return table
+
+    def records(self) -> Iterator[GtfRecord]:
+        """iter_gtf_features(gtf, CDS_KEYS)와 같은 형식의 레코드를 돌려줍니다."""
+        c = self.columns
+        return zip(c["chrom"], c["start"], c["end"], c["strand"], c["frame"],
+                   zip(*(c[key] for key in CDS_KEYS)))
+
+    def save(self, path: str, meta: Dict[str, str]):
+        """SQLite 파일로 저장 (임시 파일에 쓴 뒤 rename)."""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.execute("CREATE TABLE columns (name TEXT PRIMARY KEY, data BLOB, uniques BLOB)")
+            conn.executemany("INSERT INTO meta VALUES (?, ?)",
+                             list(meta.items()) + [("rows", str(len(self)))])
+            for name, typecode in _INT_COLUMNS.items():
+                conn.execute("INSERT INTO columns VALUES (?, ?, NULL)",
+                             (name, array(typecode, self.columns[name]).tobytes()))
+            for name in _STRING_COLUMNS:
+                uniques, codes = _encode_strings(self.columns[name])
+                conn.execute("INSERT INTO columns VALUES (?, ?, ?)", (name, codes, uniques))
+            conn.execute("INSERT INTO columns VALUES (?, ?, NULL)",
+                         (_INTERVAL_ORDER, array("I", self.interval_order()).tobytes()))
+            conn.commit()
+        finally:
+            conn.close()
+
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "CdsTable":
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            columns = {}
+            interval_order = None
+            for name, data, uniques in conn.execute("SELECT name, data, uniques FROM columns"):
+                if name == _INTERVAL_ORDER:
+                    interval_order = array("I")
+                    interval_order.frombytes(data)
+                elif name in _INT_COLUMNS:
+                    values = array(_INT_COLUMNS[name])
+                    values.frombytes(data)
+                    columns[name] = values.tolist()
+                else:
+                    columns[name] = _decode_strings(uniques, data)
+        finally:
+            conn.close()
+        return cls(columns, interval_order)
+
+
+class CdsCache:
+    """
+    GTF 파일별 CdsTable 캐시 디렉토리.
+
+    index.sqlite: (경로, 크기, mtime) → 내용 hash, 사용 시각
+    <hash>.cds.sqlite: 실제 CdsTable
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def _connect(self) -> sqlite3.Connection:
+        """index.sqlite 연결 (``with closing(self._connect()) as conn, conn:`` 형태로 사용)."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(self.cache_dir, "index.sqlite"), timeout=30)
+        conn.execute("""CREATE TABLE IF NOT EXISTS sources (
+                            path TEXT, size INTEGER, mtime_ns INTEGER, content_hash TEXT,
+                            PRIMARY KEY (path, size, mtime_ns))""")
+        conn.execute("""CREATE TABLE IF NOT EXISTS tables (
+                            content_hash TEXT PRIMARY KEY, bytes INTEGER, last_used REAL)""")
+        return conn
+
+    def _table_path(self, content_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{content_hash}.cds.sqlite")
+
+    @staticmethod
+    def _source_key(gtf_file: str):
+        st = os.stat(gtf_file)
+        return os.path.abspath(gtf_file), st.st_size, st.st_mtime_ns
+
+    def _cache_tag(self, content_hash: str) -> str:
+        # 저장 형식 / 추출 attribute가 바뀌면 다른 항목으로 취급
+        return f"{content_hash}-v{CACHE_VERSION}"
+
+    def _lookup(self, gtf_file: str):
+        """(캐시된 CdsTable 또는 None, 내용 hash)"""
+        source_key = self._source_key(gtf_file)
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT content_hash FROM sources WHERE path = ? AND size = ? AND mtime_ns = ?",
+                               source_key).fetchone()
+            content_hash = row[0] if row else self._cache_tag(file_digest(gtf_file))
+
+            table_path = self._table_path(content_hash)
+            if not os.path.exists(table_path):
+                return None, content_hash
+
+            conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)", source_key + (content_hash,))
+            conn.execute("UPDATE tables SET last_used = ? WHERE content_hash = ?", (time.time(), content_hash))
+
+        return CdsTable.load(table_path), content_hash
+
+    def lookup(self, gtf_file: str) -> Optional[CdsTable]:
+        """캐시된 CdsTable을 찾습니다. 없으면 None."""
+        return self._lookup(gtf_file)[0]
+
+    def store(self, gtf_file: str, table: CdsTable, content_hash: Optional[str] = None):
+        """CdsTable을 저장하고 한도를 넘는 오래된 항목을 정리합니다."""
+        source_key = self._source_key(gtf_file)
+        if content_hash is None:
+            content_hash = self._cache_tag(file_digest(gtf_file))
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        table_path = self._table_path(content_hash)
+        table.save(table_path, {
+            "source": source_key[0],
+            "content_hash": content_hash,
+            "keys": ",".join(CDS_KEYS),
+            "version": str(CACHE_VERSION),
+        })
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)", source_key + (content_hash,))
+            conn.execute("INSERT OR REPLACE INTO tables VALUES (?, ?, ?)",
+                         (content_hash, os.path.getsize(table_path), time.time()))
+        self.evict()
+
+    def evict(self):
+        """max_entries / max_bytes를 넘으면 가장 오래 사용하지 않은 항목부터 삭제."""
+        with closing(self._connect()) as conn, conn:
+            rows = conn.execute("SELECT content_hash, bytes FROM tables ORDER BY last_used DESC").fetchall()
+            kept_bytes = 0
+            for i, (content_hash, size) in enumerate(rows):
+                kept_bytes += size
+                if i < self.max_entries and (i == 0 or kept_bytes <= self.max_bytes):
+                    continue
+
+                try:
+                    os.remove(self._table_path(content_hash))
+                except FileNotFoundError:
+                    pass
+                conn.execute("DELETE FROM tables WHERE content_hash = ?", (content_hash,))
+                conn.execute("DELETE FROM sources WHERE content_hash = ?", (content_hash,))
+
+    def table(self, gtf_file: str, progress: bool = False) -> CdsTable:
+        """GTF의 CdsTable (캐시에 없으면 파싱해서 저장)."""
+        try:
+            table, content_hash = self._lookup(gtf_file)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Warning: CDS cache unavailable ({e}), parsing GTF", file=sys.stderr)
+            return CdsTable.from_records(iter_gtf_features(gtf_file, CDS_KEYS, progress=progress))
+
+        if table is not None:
+            print(f"  Loaded {len(table):,} CDS records from cache", file=sys.stderr)
+            return table
+
+        table = CdsTable.from_records(iter_gtf_features(gtf_file, CDS_KEYS, progress=progress))
+        try:
+            self.store(gtf_file, table, content_hash)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Warning: could not write CDS cache: {e}", file=sys.stderr)
+        return table
+
+    def records(self, gtf_file: str, progress: bool = False) -> Iterator[GtfRecord]:
+        """
+        GTF의 CDS 레코드를 돌려줍니다.
+        캐시에 있으면 캐시에서, 없으면 GTF를 파싱하면서 돌려주고 끝까지 읽은 뒤 저장합니다.
+        """
+        try:
+            table, content_hash = self._lookup(gtf_file)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Warning: CDS cache unavailable ({e}), parsing GTF", file=sys.stderr)
+            yield from iter_gtf_features(gtf_file, CDS_KEYS, progress=progress)
+            return
+
+        if table is not None:
+            print(f"  Loaded {len(table):,} CDS records from cache", file=sys.stderr)
+            yield from table.records()
+            return
+
+        table = CdsTable()
+        for record in iter_gtf_features(gtf_file, CDS_KEYS, progress=progress):
+            table.append(record)
+            yield record
+
+        try:
+            self.store(gtf_file, table, content_hash)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Warning: could not write CDS cache: {e}", file=sys.stderr)
+
+
+def add_cache_arguments(parser):
+    """--no-cache / --cache-dir 옵션 추가 (GTF를 읽는 스크립트 공용)."""
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="파싱된 GTF CDS 캐시를 사용하지 않음"
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        metavar="DIR",
+        default=DEFAULT_CACHE_DIR,
+        help="GTF CDS 캐시 디렉토리 (기본값: intermediate/cache)"
+    )
+
+
+def cache_from_args(args) -> Optional[CdsCache]:
+    """add_cache_arguments()로 받은 옵션에서 CdsCache 생성 (--no-cache이면 None)."""
+    if args.no_cache:
+        return None
+    return CdsCache(args.cache_dir)
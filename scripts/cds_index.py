@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+GTF CDS 레코드의 interval index - 게놈 구간과 겹치는 gene_id / protein_id 조회.
+
+염색체별로 CDS를 start 순으로 정렬한 배열과 누적 최대 end(prefix max) 배열을 두고,
+[start, end) 질의는 bisect 두 번으로 후보 범위를 좁힌 뒤 겹치는 것만 돌려줍니다
+(질의당 O(log n + 후보 수)). 정렬 순서는 CDS 캐시(cds_cache.py)에 파싱된 테이블과 함께 저장됩니다.
+
+  index = CdsIndex(load_cds_table("annotation.gtf", cache=CdsCache()))
+  index.proteins("NC_089186.1", 10000, 20000)    # [(gene_id, protein_id), ...]
+  region = parse_region("NC_089186.1:10,001-20,000")
+  index.query(region.chrom, region.start, region.end)  # [CdsHit, ...]
+
+구간 표기:
+  --region CHROM:START-END   1-based, 양 끝 포함 (samtools/IGV와 같음). CHROM만 쓰면 염색체 전체
+  --bed FILE                 BED (0-based, end 미포함), 4번째 컬럼이 있으면 구간 이름으로 사용
+"""
+
+import sys
+import argparse
+import os
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from compressed_io import open_input
+from cds_cache import CdsCache, CdsTable, add_cache_arguments, cache_from_args
+from gtf_reader import CDS_KEYS, iter_gtf_features
+from gtf_scan import read_cds_table_records
+from output_io import open_output
+
+# 스크립트 기본 경로 설정
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
+
+REGION_HITS_HEADER = "region\tgene_id\tprotein_id\ttranscript_id"
+
+_REGION_RANGE = re.compile(r"^([\d,]+)(?:-([\d,]+))?$")
+
+
+class Region(NamedTuple):
+    """게놈 구간 (0-based, end 미포함)."""
+    chrom: str
+    start: int
+    end: int
+    name: str
+
+
+class CdsHit(NamedTuple):
+    """구간과 겹치는 CDS 레코드 하나 (좌표는 0-based, end 미포함)."""
+    chrom: str
+    start: int
+    end: int
+    strand: str
+    gene_id: Optional[str]
+    transcript_id: Optional[str]
+    protein_id: Optional[str]
+
+
+def parse_region(text: str) -> Region:
+    """'chr:1,000-2,000' (1-based, 양 끝 포함), 'chr:1000' (1 bp), 'chr' (전체) → Region."""
+    chrom, _, coords = text.rpartition(":")
+    match = _REGION_RANGE.match(coords) if chrom else None
+    if match is None:
+        # ':'가 없거나 뒤가 좌표가 아니면 전체가 염색체 이름
+        return Region(text, 0, sys.maxsize, text)
+
+    start = int(match.group(1).replace(",", ""))
+    end = int(match.group(2).replace(",", "")) if match.group(2) else start
+    if start < 1 or end < start:
+        raise ValueError(f"invalid region: {text}")
+    return Region(chrom, start - 1, end, text)
+
+
+def read_bed_regions(bed_file: str) -> List[Region]:
+    """BED 파일의 구간 목록 (track/browser/# 줄은 건너뜀)."""
+    regions = []
+    with open_input(bed_file) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip() or line.startswith(("#", "track", "browser")):
+                continue
+            cols = line.rstrip("\n").split("\t")
+            try:
+                chrom, start, end = cols[0], int(cols[1]), int(cols[2])
+            except (IndexError, ValueError):
+                raise ValueError(f"{bed_file}:{line_number}: expected chrom, start, end columns")
+            name = cols[3] if len(cols) > 3 and cols[3] else f"{chrom}:{start + 1}-{end}"
+            regions.append(Region(chrom, start, end, name))
+    return regions
+
+
+def load_cds_table(gtf_file: str, cds_table: Optional[str] = None,
+                   cache: Optional[CdsCache] = None) -> CdsTable:
+    """GTF(또는 캐시) / gtf_scan.py CDS 좌표 테이블 → CdsTable."""
+    if cds_table is not None:
+        return CdsTable.from_records(read_cds_table_records(cds_table))
+    if cache is not None:
+        return cache.table(gtf_file)
+    return CdsTable.from_records(iter_gtf_features(gtf_file, CDS_KEYS))
+
+
+class CdsIndex:
+    """
+    CdsTable 위의 interval index.
+
+    염색체마다 (start 정렬 배열, end 배열, prefix max end 배열, row 번호 배열)을 둡니다.
+    prefix max end는 단조 증가하므로 "end > 질의 start"인 첫 위치를 bisect로 찾을 수 있습니다.
+    """
+
+    def __init__(self, table: CdsTable):
+        self.table = table
+        c = table.columns
+        starts, ends, chroms = c["start"], c["end"], c["chrom"]
+
+        self._chroms: Dict[str, Tuple[array, array, array, array]] = {}
+        order = table.interval_order()
+        i = 0
+        while i < len(order):
+            chrom = chroms[order[i]]
+            j = i
+            while j < len(order) and chroms[order[j]] == chrom:
+                j += 1
+            rows = array("I", order[i:j])
+            chrom_starts = array("q", map(starts.__getitem__, rows))
+            chrom_ends = array("q", map(ends.__getitem__, rows))
+            max_ends = array("q", chrom_ends)
+            for k in range(1, len(max_ends)):
+                if max_ends[k] < max_ends[k - 1]:
+                    max_ends[k] = max_ends[k - 1]
+            self._chroms[chrom] = (chrom_starts, chrom_ends, max_ends, rows)
+            i = j
+
+    def __contains__(self, chrom) -> bool:
+        return chrom in self._chroms
+
+    def rows(self, chrom: str, start: int, end: int) -> Iterator[int]:
+        """[start, end)와 겹치는 CDS의 row 번호 (start 순)."""
+        entry = self._chroms.get(chrom)
+        if entry is None:
+            return
+        chrom_starts, chrom_ends, max_ends, rows = entry
+        first = bisect_right(max_ends, start)   # 이 앞의 CDS는 모두 start 이전에 끝남
+        last = bisect_left(chrom_starts, end)   # 이 뒤의 CDS는 모두 end 이후에 시작
+        for k in range(first, last):
+            if chrom_ends[k] > start:
+                yield rows[k]
+
+    def query(self, chrom: str, start: int, end: int) -> List[CdsHit]:
+        """[start, end) (0-based)와 겹치는 CDS 레코드 목록."""
+        c = self.table.columns
+        return [CdsHit(c["chrom"][row], c["start"][row], c["end"][row], c["strand"][row],
+                       c["gene_id"][row], c["transcript_id"][row], c["protein_id"][row])
+                for row in self.rows(chrom, start, end)]
+
+    def proteins(self, chrom: str, start: int, end: int) -> List[Tuple[Optional[str], str]]:
+        """[start, end)와 CDS가 겹치는 (gene_id, protein_id) 목록 (중복 제거, 위치 순)."""
+        c = self.table.columns
+        seen = {}
+        for row in self.rows(chrom, start, end):
+            protein_id = c["protein_id"][row]
+            if protein_id:
+                seen.setdefault((c["gene_id"][row], protein_id), None)
+        return list(seen)
+
+    def transcripts(self, regions: Iterable[Region]) -> Set[str]:
+        """구간들 중 하나라도 CDS가 겹치는 transcript_id 집합."""
+        transcript_ids = self.table.columns["transcript_id"]
+        selected = set()
+        for region in regions:
+            for row in self.rows(region.chrom, region.start, region.end):
+                if transcript_ids[row]:
+                    selected.add(transcript_ids[row])
+        return selected
+
+    def region_hits(self, regions: Iterable[Region]) -> Iterator[Tuple[str, Optional[str], str, str]]:
+        """구간별로 겹치는 (구간 이름, gene_id, protein_id, transcript_id) - transcript당 한 번."""
+        c = self.table.columns
+        for region in regions:
+            seen = set()
+            for row in self.rows(region.chrom, region.start, region.end):
+                transcript_id, protein_id = c["transcript_id"][row], c["protein_id"][row]
+                if not protein_id or transcript_id in seen:
+                    continue
+                seen.add(transcript_id)
+                yield region.name, c["gene_id"][row], protein_id, transcript_id
+
+
+def regions_from_args(region_texts: Optional[List[str]], bed_files: Optional[List[str]]) -> List[Region]:
+    """--region / --bed 옵션 값 → Region 목록 (잘못된 값이면 ValueError)."""
+    regions = [parse_region(text) for text in region_texts or []]
+    for bed_file in bed_files or []:
+        regions.extend(read_bed_regions(bed_file))
+    return regions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="게놈 구간과 CDS가 겹치는 gene_id / protein_id를 조회합니다.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+예시:
+  cd scripts
+  python cds_index.py --region NC_089186.1:1,000,000-1,050,000
+  python cds_index.py ../data/annotation.gtf --bed loci.bed -o loci_proteins.tsv
+
+  # 겹치는 transcript만 번역
+  python extract_proteins_from_gtf.py --bed loci.bed -o loci_proteins.fasta
+        """
+    )
+
+    parser.add_argument(
+        "gtf_file",
+        metavar="GTF_FILE",
+        nargs='?',
+        default=os.path.join(DATA_DIR, 'annotation.gtf'),
+        help="입력 GTF 파일 (기본값: data/annotation.gtf)"
+    )
+
+    parser.add_argument(
+        "-r", "--region",
+        action="append",
+        metavar="REGION",
+        help="조회할 구간 CHROM:START-END (1-based, 양 끝 포함, 여러 번 지정 가능)"
+    )
+
+    parser.add_argument(
+        "--bed",
+        action="append",
+        metavar="BED",
+        help="조회할 구간 BED 파일 (여러 번 지정 가능)"
+    )
+
+    parser.add_argument(
+        "--cds-table",
+        metavar="CDS_TABLE",
+        help="GTF 대신 gtf_scan.py가 만든 CDS 좌표 테이블 사용"
+    )
+
+    parser.add_argument(
+        "-o", "--output",
+        metavar="OUTPUT",
+        help="출력 TSV (region, gene_id, protein_id, transcript_id, 기본값: stdout)"
+    )
+
+    add_cache_arguments(parser)
+
+    args = parser.parse_args()
+
+    if not (args.region or args.bed):
+        parser.error("at least one --region or --bed is required")
+
+    try:
+        regions = regions_from_args(args.region, args.bed)
+    except (IOError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        table = load_cds_table(args.gtf_file, args.cds_table, cache_from_args(args))
+    except (IOError, ValueError) as e:
+        print(f"Error reading GTF file: {e}", file=sys.stderr)
+        sys.exit(1)
+    index = CdsIndex(table)
+
+    hit_count = 0
+    with open_output(args.output) as output:
+        print(REGION_HITS_HEADER, file=output)
+        for hit in index.region_hits(regions):
+            output.write("\t".join(value or "" for value in hit) + "\n")
+            hit_count += 1
+
+    missing = sorted({region.chrom for region in regions if region.chrom not in index})
+    print(f"{hit_count} transcripts overlap {len(regions)} regions", file=sys.stderr)
+    if missing:
+        print(f"Warning: no CDS on {', '.join(missing[:10])}{' ...' if len(missing) > 10 else ''}",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
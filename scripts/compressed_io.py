@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+압축 입력 파일 공용 reader.
+
+모든 스크립트의 입력(GTF, genome/protein FASTA, BLAST 결과, TSV)은 open_input()으로 열며,
+압축 형식은 파일 앞부분의 magic byte로 자동 감지합니다.
+
+  - 일반 텍스트: 그대로 open()
+  - gzip:  background thread에서 압축 해제 (파싱과 압축 해제가 동시에 진행)
+  - bgzip: BGZF block을 여러 thread로 병렬 압축 해제 (zlib은 GIL을 해제함)
+  - zstd:  zstandard 패키지가 있으면 background thread에서 압축 해제
+
+Parquet/Arrow IPC 테이블(table_io 참고)은 TSV 텍스트로 변환해서 읽습니다 (pyarrow 필요).
+
+bgzip 파일은 BgzfRandomReader로 .gzi 인덱스(samtools/bgzip 호환)를 사용해
+압축을 풀지 않고 임의 위치를 읽을 수 있습니다 (IndexedFasta에서 사용).
+"""
+
+import io
+import os
+import sys
+import zlib
+import gzip
+import queue
+import struct
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from table_io import detect_table_format, iter_tsv_chunks
+
+try:
+    import zstandard
+except ImportError:  # zstd 입력을 쓰지 않으면 필요 없음
+    zstandard = None
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+CHUNK_SIZE = 1 << 20
+DEFAULT_THREADS = min(4, os.cpu_count() or 1)
+
+
+def detect_compression(path: str) -> Optional[str]:
+    """파일의 압축 형식: 'bgzip', 'gzip', 'zstd' 또는 None (비압축)."""
+    with open(path, "rb") as f:
+        head = f.read(18)
+
+    if head[:2] == _GZIP_MAGIC:
+        return "bgzip" if _bgzf_block_size(head) is not None else "gzip"
+    if head[:4] == _ZSTD_MAGIC:
+        return "zstd"
+    return None
+
+
+def _bgzf_block_size(header: bytes) -> Optional[int]:
+    """BGZF block header이면 block 전체 크기(BSIZE + 1), 아니면 None."""
+    if len(header) < 18 or header[:4] != b"\x1f\x8b\x08\x04":
+        return None
+    xlen = struct.unpack_from("<H", header, 10)[0]
+    # 일반적인 bgzip 출력은 extra field가 'BC' 하나 (XLEN=6)
+    if xlen >= 6 and header[12:14] == b"BC" and struct.unpack_from("<H", header, 14)[0] == 2:
+        return struct.unpack_from("<H", header, 16)[0] + 1
+    return None
+
+
+def _read_bgzf_block(f) -> Optional[bytes]:
+    """파일 위치에서 BGZF block 하나(압축된 상태)를 읽습니다. EOF이면 None."""
+    header = f.read(18)
+    if not header:
+        return None
+    block_size = _bgzf_block_size(header)
+    if block_size is None:
+        raise ValueError("Invalid BGZF block header")
+    rest = f.read(block_size - 18)
+    if len(rest) != block_size - 18:
+        raise ValueError("Truncated BGZF block")
+    return header + rest
+
+
+def _inflate_bgzf_block(block: bytes) -> bytes:
+    xlen = struct.unpack_from("<H", block, 10)[0]
+    return zlib.decompress(block[12 + xlen:-8], -15)
+
+
+class _ChunkStream(io.RawIOBase):
+    """bytes chunk iterator를 읽기 전용 binary stream으로 감쌉니다."""
+
+    def __init__(self, chunks: Iterator[bytes], on_close: Optional[Callable[[], None]] = None):
+        self._chunks = chunks
+        self._chunk = memoryview(b"")
+        self._on_close = on_close
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._chunk:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._chunk = memoryview(chunk)
+
+        n = min(len(buffer), len(self._chunk))
+        buffer[:n] = self._chunk[:n]
+        self._chunk = self._chunk[n:]
+        return n
+
+    def close(self):
+        if not self.closed and self._on_close is not None:
+            self._on_close()
+        super().close()
+
+
+def _threaded_chunks(read: Callable[[int], bytes], depth: int = 8):
+    """
+    read(CHUNK_SIZE)를 background thread에서 반복 호출해 chunk를 미리 채워 둡니다.
+
+    Returns:
+        (chunk iterator, 중단 함수)
+    """
+    chunks: "queue.Queue" = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            while not stop.is_set():
+                chunk = read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if not put(chunk):
+                    return
+        except BaseException as e:  # 읽기 에러는 소비하는 쪽에서 다시 발생
+            put(e)
+            return
+        put(done)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+
+    def consume() -> Iterator[bytes]:
+        while True:
+            item = chunks.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def cancel():
+        stop.set()
+        # producer가 put에서 기다리고 있으면 자리를 비워 줌
+        try:
+            while True:
+                chunks.get_nowait()
+        except queue.Empty:
+            pass
+
+    return consume(), cancel
+
+
+def _parallel_bgzf_chunks(f, threads: int) -> Iterator[bytes]:
+    """BGZF block을 순서대로 읽으면서 thread pool로 병렬 압축 해제 (출력 순서 유지)."""
+    max_pending = threads * 4
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        pending = []
+        while True:
+            block = _read_bgzf_block(f)
+            if block is not None:
+                pending.append(executor.submit(_inflate_bgzf_block, block))
+            if pending and (block is None or len(pending) >= max_pending):
+                yield pending.pop(0).result()
+            if block is None and not pending:
+                return
+
+
+def open_input(path: str, mode: str = "rt", threads: int = DEFAULT_THREADS):
+    """
+    입력 파일을 압축 형식에 맞게 엽니다.
+
+    Args:
+        path: 입력 파일 경로
+        mode: "rt" (텍스트, 기본값) 또는 "rb"
+        threads: bgzip 병렬 압축 해제 thread 수
+
+    Returns:
+        file object (with 문으로 사용)
+    """
+    if mode not in ("r", "rt", "rb"):
+        raise ValueError(f"open_input supports read modes only: {mode}")
+
+    compression = detect_compression(path)
+    if compression is None:
+        if detect_table_format(path) is None:
+            return open(path, mode)
+        stream = _ChunkStream(iter_tsv_chunks(path))
+    elif compression == "bgzip" and threads > 1:
+        raw_file = open(path, "rb")
+        stream = _ChunkStream(_parallel_bgzf_chunks(raw_file, threads), raw_file.close)
+    elif compression in ("gzip", "bgzip"):
+        raw_file = open(path, "rb")
+        gz = gzip.GzipFile(fileobj=raw_file)
+        chunks, cancel = _threaded_chunks(gz.read)
+        stream = _ChunkStream(chunks, lambda: (cancel(), raw_file.close()))
+    else:
+        if zstandard is None:
+            raise ValueError(f"{path} is zstd-compressed; install the 'zstandard' package to read it")
+        raw_file = open(path, "rb")
+        reader = zstandard.ZstdDecompressor().stream_reader(raw_file)
+        chunks, cancel = _threaded_chunks(reader.read)
+        stream = _ChunkStream(chunks, lambda: (cancel(), raw_file.close()))
+
+    buffered = io.BufferedReader(stream, buffer_size=CHUNK_SIZE)
+    if mode == "rb":
+        return buffered
+    return io.TextIOWrapper(buffered)
+
+
+def gzi_path_for(path: str) -> str:
+    """bgzip 파일에 대응하는 .gzi 경로."""
+    return path + ".gzi"
+
+
+def build_gzi(path: str) -> List[Tuple[int, int]]:
+    """
+    BGZF block header만 훑어서 (압축 offset, 비압축 offset) 목록을 만듭니다.
+    압축 해제 없이 block 끝의 ISIZE를 읽어 계산합니다.
+    """
+    blocks = []
+    coffset = uoffset = 0
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(18)
+            if not header:
+                break
+            block_size = _bgzf_block_size(header)
+            if block_size is None:
+                raise ValueError(f"{path} is not a valid BGZF file")
+            f.seek(coffset + block_size - 4)
+            isize = struct.unpack("<I", f.read(4))[0]
+            blocks.append((coffset, uoffset))
+            coffset += block_size
+            uoffset += isize
+    return blocks
+
+
+def write_gzi(blocks: List[Tuple[int, int]], gzi_file: str):
+    """bgzip -i와 같은 형식으로 저장 (첫 block (0, 0)은 생략)."""
+    entries = blocks[1:]
+    tmp_file = gzi_file + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(struct.pack("<Q", len(entries)))
+        for coffset, uoffset in entries:
+            f.write(struct.pack("<QQ", coffset, uoffset))
+    os.replace(tmp_file, gzi_file)
+
+
+def read_gzi(gzi_file: str) -> List[Tuple[int, int]]:
+    with open(gzi_file, "rb") as f:
+        count = struct.unpack("<Q", f.read(8))[0]
+        data = f.read(16 * count)
+    values = struct.unpack(f"<{2 * count}Q", data)
+    return [(0, 0)] + list(zip(values[::2], values[1::2]))
+
+
+def load_or_build_gzi(path: str) -> List[Tuple[int, int]]:
+    """.gzi가 있고 최신이면 읽고, 아니면 만들어서 (가능하면) 저장합니다."""
+    gzi_file = gzi_path_for(path)
+    if os.path.exists(gzi_file) and os.path.getmtime(gzi_file) >= os.path.getmtime(path):
+        return read_gzi(gzi_file)
+
+    print(f"Building BGZF index for {path}...", file=sys.stderr)
+    blocks = build_gzi(path)
+    try:
+        write_gzi(blocks, gzi_file)
+    except OSError as e:
+        print(f"Warning: could not write {gzi_file}: {e}", file=sys.stderr)
+    return blocks
+
+
+class BgzfRandomReader:
+    """
+    .gzi 인덱스를 이용한 bgzip 파일 random access.
+    read(offset, length)의 offset은 압축 해제된 데이터 기준입니다.
+    """
+
+    def __init__(self, path: str, blocks: Optional[List[Tuple[int, int]]] = None, cache_blocks: int = 64):
+        self.path = path
+        if blocks is None:
+            blocks = load_or_build_gzi(path)
+        self._coffsets = [c for c, _ in blocks]
+        self._uoffsets = [u for _, u in blocks]
+        self._fd = os.open(path, os.O_RDONLY)
+        self._cache: "OrderedDict[int, bytes]" = OrderedDict()
+        self._cache_blocks = cache_blocks
+
+    def _block(self, idx: int) -> bytes:
+        data = self._cache.get(idx)
+        if data is not None:
+            self._cache.move_to_end(idx)
+            return data
+
+        header = os.pread(self._fd, 18, self._coffsets[idx])
+        block_size = _bgzf_block_size(header)
+        if block_size is None:
+            raise ValueError(f"Invalid BGZF block at offset {self._coffsets[idx]} in {self.path}")
+        data = _inflate_bgzf_block(os.pread(self._fd, block_size, self._coffsets[idx]))
+
+        self._cache[idx] = data
+        if len(self._cache) > self._cache_blocks:
+            self._cache.popitem(last=False)
+        return data
+
+    def read(self, offset: int, length: int) -> bytes:
+        """비압축 offset부터 length 바이트를 읽습니다."""
+        parts = []
+        idx = bisect_right(self._uoffsets, offset) - 1
+        pos = offset
+        end = offset + length
+        while pos < end and idx < len(self._uoffsets):
+            data = self._block(idx)
+            start_in_block = pos - self._uoffsets[idx]
+            piece = data[start_in_block:start_in_block + (end - pos)]
+            if not piece and start_in_block >= len(data):
+                idx += 1
+                continue
+            parts.append(piece)
+            pos += len(piece)
+            idx += 1
+        return b"".join(parts)
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+서열이 같은 단백질을 하나로 합쳐 BLAST할 query 수를 줄입니다.
+
+같은 gene의 isoform(X1, X2, ...)은 번역하면 서열이 완전히 같은 경우가 많습니다.
+서열이 같은 단백질 중 FASTA에서 처음 나온 것을 대표(representative)로 남기고,
+대표 → 구성원(member) 테이블을 함께 저장합니다.
+
+BLAST는 대표 FASTA로 실행하고, 매핑 단계에서 hit을 모든 구성원에 다시 펼칩니다:
+
+  python dedup_proteins.py ../intermediate/shrimp_query.fasta \\
+      -o ../intermediate/shrimp_query.dedup.fasta -m ../intermediate/dedup_members.tsv
+  python run_blastp.py -q ../intermediate/shrimp_query.dedup.fasta
+  python 5_map_blast_to_symbol.py --dedup-members ../intermediate/dedup_members.tsv
+
+서열이 완전히 같은 경우만 합칩니다 (다른 isoform에 포함되는 짧은 서열은 BLAST 결과가 달라지므로 합치지 않음).
+"""
+
+import sys
+import argparse
+import os
+from typing import Dict
+
+from blast_cache import sequence_hash
+from fasta_index import iter_fasta
+from output_io import open_output
+
+# 스크립트 기본 경로 설정
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+INTERMEDIATE_DIR = os.path.join(PROJECT_ROOT, 'intermediate')
+
+MEMBERS_HEADER = "representative_id\tmember_id"
+
+
+def dedup_proteins(fasta_file: str, fasta_output, members_output, verbose: bool = False) -> Dict[str, int]:
+    """
+    서열이 같은 단백질을 합칩니다.
+
+    Args:
+        fasta_file: 입력 단백질 FASTA
+        fasta_output: 대표 서열 FASTA 출력 (입력 순서)
+        members_output: 대표 → 구성원 TSV 출력 (대표 자신 포함, 모든 입력 서열이 한 행씩)
+        verbose: 합쳐진 서열 출력
+
+    Returns:
+        {"sequences": 입력 서열 수, "representatives": 대표 서열 수}
+    """
+    representatives: Dict[str, str] = {}
+    sequence_count = 0
+
+    print(MEMBERS_HEADER, file=members_output)
+    try:
+        for seq_id, seq in iter_fasta(fasta_file, upper=False):
+            if not seq_id:
+                continue
+            sequence_count += 1
+
+            key = sequence_hash(seq)
+            representative = representatives.get(key)
+            if representative is None:
+                representative = representatives[key] = seq_id
+                fasta_output.write_fasta(seq_id, seq)
+            elif verbose:
+                print(f"{seq_id} = {representative}", file=sys.stderr)
+
+            members_output.write(f"{representative}\t{seq_id}\n")
+
+    except IOError as e:
+        print(f"Error reading FASTA file: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    return {"sequences": sequence_count, "representatives": len(representatives)}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="서열이 같은 단백질을 하나로 합쳐 대표 FASTA와 대표 → 구성원 테이블을 만듭니다.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+예시:
+  cd scripts
+  python dedup_proteins.py ../intermediate/shrimp_query.fasta \\
+    -o ../intermediate/shrimp_query.dedup.fasta \\
+    -m ../intermediate/dedup_members.tsv
+        """
+    )
+
+    parser.add_argument(
+        "fasta_file",
+        metavar="FASTA_FILE",
+        nargs='?',
+        default=os.path.join(INTERMEDIATE_DIR, 'shrimp_query.fasta'),
+        help="입력 단백질 FASTA (기본값: intermediate/shrimp_query.fasta)"
+    )
+
+    parser.add_argument(
+        "-o", "--output",
+        metavar="OUTPUT",
+        default=os.path.join(INTERMEDIATE_DIR, 'shrimp_query.dedup.fasta'),
+        help="대표 서열 FASTA (기본값: intermediate/shrimp_query.dedup.fasta)"
+    )
+
+    parser.add_argument(
+        "-m", "--members",
+        metavar="MEMBERS",
+        default=os.path.join(INTERMEDIATE_DIR, 'dedup_members.tsv'),
+        help="대표 → 구성원 TSV (기본값: intermediate/dedup_members.tsv)"
+    )
+
+    parser.add_argument(
+        "-v", "--verbose",
+        action="store_true",
+        help="합쳐진 서열 출력"
+    )
+
+    args = parser.parse_args()
+
+    with open_output(args.output, background=True) as fasta_output, \
+            open_output(args.members, background=True) as members_output:
+        stats = dedup_proteins(args.fasta_file, fasta_output, members_output, args.verbose)
+
+    removed = stats["sequences"] - stats["representatives"]
+    print(f"Statistics:", file=sys.stderr)
+    print(f"  Input sequences: {stats['sequences']}", file=sys.stderr)
+    print(f"  Representatives: {stats['representatives']}", file=sys.stderr)
+    print(f"  Duplicates removed: {removed}"
+          + (f" ({removed / stats['sequences'] * 100:.1f}%)" if stats["sequences"] else ""), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,15 +4,29 @@ GTF + genome FASTA에서 protein sequence를 추출합니다.
 
 1. GTF 파싱: CDS feature에서 위치 정보 추출
 2. 서열 추출: genome FASTA에서 해당 위치의 DNA 추출
+   (기본: .fai 인덱스 + mmap으로 필요한 구간만 읽음, --in-memory: 전체 로드,
+    --streaming: 염색체 하나씩 읽고 바로 번역/출력, .2bit 게놈: twobit.py로 변환한 파일을 mmap)
 3. 번역: DNA → codon → amino acid
 4. protein_id별로 정렬
+
+--region / --bed를 주면 CDS interval index(cds_index.py)로 그 구간과 CDS가 겹치는 transcript만 번역합니다.
 """
 
 import sys
 import argparse
-from typing import Dict, List, Tuple
-import re
+from typing import Dict, Iterator, List, Optional, Tuple
 import os
+from concurrent.futures import ProcessPoolExecutor
+
+from compressed_io import detect_compression, open_input
+from fasta_index import IndexedFasta, iter_fasta
+from output_io import format_fasta, open_output
+from gtf_scan import CdsRegionSink, read_cds_table, scan_gtf
+from cds_cache import CdsCache, add_cache_arguments, cache_from_args
+from cds_index import CdsIndex, Region, load_cds_table, regions_from_args
+from instrumentation import add_metrics_arguments, input_bytes, instrument_from_args, phase
+from translation import GENETIC_CODES, codon_table, reverse_complement, translate_many
+from twobit import TwoBitFile, is_twobit
 
 # 스크립트 기본 경로 설정
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -20,39 +34,11 @@ PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
 INTERMEDIATE_DIR = os.path.join(PROJECT_ROOT, 'intermediate')
 
-# 유전자 코드 (표준)
-CODON_TABLE = {
-    'TTT': 'F', 'TTC': 'F', 'TTA': 'L', 'TTG': 'L',
-    'TCT': 'S', 'TCC': 'S', 'TCA': 'S', 'TCG': 'S',
-    'TAT': 'Y', 'TAC': 'Y', 'TAA': '*', 'TAG': '*',
-    'TGT': 'C', 'TGC': 'C', 'TGA': '*', 'TGG': 'W',
-    'CTT': 'L', 'CTC': 'L', 'CTA': 'L', 'CTG': 'L',
-    'CCT': 'P', 'CCC': 'P', 'CCA': 'P', 'CCG': 'P',
-    'CAT': 'H', 'CAC': 'H', 'CAA': 'Q', 'CAG': 'Q',
-    'CGT': 'R', 'CGC': 'R', 'CGA': 'R', 'CGG': 'R',
-    'ATT': 'I', 'ATC': 'I', 'ATA': 'I', 'ATG': 'M',
-    'ACT': 'T', 'ACC': 'T', 'ACA': 'T', 'ACG': 'T',
-    'AAT': 'N', 'AAC': 'N', 'AAA': 'K', 'AAG': 'K',
-    'AGT': 'S', 'AGC': 'S', 'AGA': 'R', 'AGG': 'R',
-    'GTT': 'V', 'GTC': 'V', 'GTA': 'V', 'GTG': 'V',
-    'GCT': 'A', 'GCC': 'A', 'GCA': 'A', 'GCG': 'A',
-    'GAT': 'D', 'GAC': 'D', 'GAA': 'E', 'GAG': 'E',
-    'GGT': 'G', 'GGC': 'G', 'GGA': 'G', 'GGG': 'G',
-}
-
-
-def parse_gtf_attributes(attr_field: str) -> dict:
-    """GTF attribute 필드 파싱."""
-    attrs = {}
-    for item in attr_field.strip().strip(";").split(";"):
-        item = item.strip()
-        if not item:
-            continue
-        m = re.match(r'([^ ]+)\s+"(.+)"', item)
-        if m:
-            key, val = m.group(1), m.group(2)
-            attrs[key] = val
-    return attrs
+# 유전자 코드 (표준). 다른 NCBI genetic code는 translation.GENETIC_CODES 참고
+CODON_TABLE = codon_table(1)
+
+# translate_many 한 번에 넘기는 transcript 수
+TRANSLATE_BATCH_SIZE = 2000
 
 
 def load_genome_fasta(fasta_file: str) -> Dict[str, str]:
@@ -66,7 +52,7 @@ def load_genome_fasta(fasta_file: str) -> Dict[str, str]:
 
     print(f"Loading genome FASTA from {fasta_file}...", file=sys.stderr)
 
-    with open(fasta_file, "r") as f:
+    with open_input(fasta_file) as f:
         for line_num, line in enumerate(f, 1):
             if line_num % 1000000 == 0:
                 print(f"  Processed {line_num:,} lines...", file=sys.stderr)
@@ -94,153 +80,374 @@ def load_genome_fasta(fasta_file: str) -> Dict[str, str]:
     return sequences
 
 
-def extract_cds_regions(gtf_file: str) -> Dict[str, List[Tuple]]:
+def extract_cds_regions(gtf_file: str, cache: Optional[CdsCache] = None) -> Dict[str, List[Tuple]]:
     """
     GTF 파일에서 CDS 영역을 추출합니다.
+    cache를 지정하면 GTF가 바뀌지 않은 경우 파싱된 캐시에서 읽습니다.
 
     Returns:
         {transcript_id: [(chrom, start, end, strand, frame, protein_id), ...]}
     """
-    cds_regions = {}
-
     print(f"Parsing GTF from {gtf_file}...", file=sys.stderr)
 
-    with open(gtf_file, "r") as f:
-        for line_num, line in enumerate(f, 1):
-            if line_num % 100000 == 0:
-                print(f"  Processed {line_num:,} lines...", file=sys.stderr)
+    sink = CdsRegionSink()
+    scan_gtf(gtf_file, [sink], progress=True, cache=cache)
+    cds_regions = sink.cds_regions
 
-            line = line.rstrip("\n")
-            if not line or line.startswith("#"):
-                continue
+    print(f"Found {len(cds_regions)} transcripts with CDS", file=sys.stderr)
+    return cds_regions
 
-            cols = line.split("\t")
-            if len(cols) < 9:
-                continue
 
-            chrom, source, feature, start, end, score, strand, frame, attrs_str = cols
+def select_cds_regions(gtf_file: str, regions: List[Region], cds_table: Optional[str] = None,
+                       cache: Optional[CdsCache] = None) -> Dict[str, List[Tuple]]:
+    """구간과 CDS가 하나라도 겹치는 transcript의 CDS 영역 전체 (extract_cds_regions()와 같은 형식)."""
+    print(f"Parsing GTF from {cds_table or gtf_file}...", file=sys.stderr)
+    table = load_cds_table(gtf_file, cds_table, cache)
+    transcript_ids = CdsIndex(table).transcripts(regions)
+    cds_regions = table.cds_regions(transcript_ids)
+    print(f"Selected {len(cds_regions)} transcripts overlapping {len(regions)} regions", file=sys.stderr)
+    return cds_regions
 
-            # CDS feature만
-            if feature != "CDS":
-                continue
 
-            attrs = parse_gtf_attributes(attrs_str)
-            transcript_id = attrs.get("transcript_id")
-            protein_id = attrs.get("protein_id")
+def load_cds_regions(gtf_file: str, cds_table: Optional[str] = None, cache: Optional[CdsCache] = None,
+                     regions: Optional[List[Region]] = None) -> Dict[str, List[Tuple]]:
+    """
+    CDS 좌표 테이블(gtf_scan.py 출력)이 있으면 그것을, 없으면 GTF(또는 캐시)를 읽습니다.
+    regions를 지정하면 그 구간과 겹치는 transcript만 돌려줍니다.
+    """
+    with phase("parse", nbytes=input_bytes(cds_table or gtf_file)) as p:
+        try:
+            if regions is not None:
+                cds_regions = select_cds_regions(gtf_file, regions, cds_table, cache)
+            elif cds_table is None:
+                cds_regions = extract_cds_regions(gtf_file, cache)
+            else:
+                print(f"Loading CDS table from {cds_table}...", file=sys.stderr)
+                cds_regions = read_cds_table(cds_table)
+                print(f"Found {len(cds_regions)} transcripts with CDS", file=sys.stderr)
+        except (IOError, ValueError) as e:
+            print(f"Error reading GTF file: {e}", file=sys.stderr)
+            sys.exit(1)
+        p.records = len(cds_regions)
+    return cds_regions
 
-            if not transcript_id or not protein_id:
-                continue
 
-            if transcript_id not in cds_regions:
-                cds_regions[transcript_id] = []
+def assemble_cds(regions: List[Tuple], sequences, verbose: bool = False) -> Tuple[List[str], int]:
+    """
+    한 transcript의 CDS 영역들을 genome에서 잘라 전사 방향으로 정렬합니다.
 
-            cds_regions[transcript_id].append((
-                chrom,
-                int(start) - 1,  # GTF는 1-based, Python은 0-based
-                int(end),
-                strand,
-                int(frame),
-                protein_id
-            ))
+    Returns:
+        (CDS 서열 조각 리스트, 게놈에 없어서 건너뛴 영역 수)
+    """
+    cds_sequence_parts = []
+    missing_count = 0
 
-    print(f"Found {len(cds_regions)} transcripts with CDS", file=sys.stderr)
-    return cds_regions
+    for chrom, start, end, strand, frame, protein_id in regions:
+        if chrom not in sequences:
+            if verbose:
+                print(f"Warning: Chromosome {chrom} not found in genome", file=sys.stderr)
+            missing_count += 1
+            continue
 
+        # 서열 추출
+        dna = sequences[chrom][start:end]
 
-def reverse_complement(seq: str) -> str:
-    """DNA 서열의 보수 역순."""
-    complement = {'A': 'T', 'T': 'A', 'C': 'G', 'G': 'C'}
-    return "".join(complement.get(base, 'N') for base in reversed(seq))
+        # 역방향이면 보수 역순
+        if strand == "-":
+            dna = reverse_complement(dna)
 
+        cds_sequence_parts.append(dna)
 
-def translate_cds(dna_seq: str) -> str:
-    """DNA 서열을 단백질로 번역."""
-    protein = []
-    for i in range(0, len(dna_seq) - 2, 3):
-        codon = dna_seq[i:i+3].upper()
-        # N 포함된 코돈은 X로 번역
-        if 'N' in codon or len(codon) < 3:
-            protein.append('X')
-        else:
-            amino_acid = CODON_TABLE.get(codon, 'X')
-            protein.append(amino_acid)
+    return cds_sequence_parts, missing_count
+
+
+def write_protein(output_file, protein_id: str, seq: str) -> int:
+    """단백질 하나를 FASTA 형식으로 출력 (80자씩 줄바꿈). Returns: 출력한 문자 수"""
+    record = format_fasta(protein_id, seq)
+    output_file.write(record)
+    return len(record)
+
+
+def translate_transcripts(items: List[Tuple[str, List[Tuple]]], sequences, verbose: bool = False,
+                          table_id: int = 1) -> List[Tuple[Optional[str], str, int]]:
+    """
+    transcript 묶음을 번역합니다.
+    CDS 조립은 transcript별로 하고, 번역은 translate_many로 묶음 전체를 한 번에 합니다.
+
+    Returns:
+        transcript별 (protein_id, protein 서열, 에러 수) - 번역할 CDS가 없으면 protein_id는 None
+    """
+    assembled = []  # [protein_id, cds 번호, 에러 수]
+    cds_sequences = []
+
+    for transcript_id, regions in items:
+        try:
+            # 각 CDS 영역별로 서열 추출
+            cds_sequence_parts, missing_count = assemble_cds(regions, sequences, verbose)
+        except Exception as e:
+            if verbose:
+                print(f"Error processing {transcript_id}: {e}", file=sys.stderr)
+            assembled.append([None, -1, 1])
+            continue
+
+        if not cds_sequence_parts:
+            assembled.append([None, -1, missing_count])
+            continue
+
+        # protein_id는 transcript의 마지막 CDS 기준
+        assembled.append([regions[-1][5], len(cds_sequences), missing_count])
+        cds_sequences.append("".join(cds_sequence_parts))
+
+    proteins = translate_many(cds_sequences, table_id)
+    return [(protein_id, proteins[idx] if protein_id is not None else "", errors)
+            for protein_id, idx, errors in assembled]
+
+
+# worker process마다 한 번 여는 genome (mmap이므로 page cache를 프로세스 간 공유)
+_worker_genome = None
+_worker_options = (False, 1)  # (verbose, table_id)
+
+
+def open_genome(genome_file: str, entries: Optional[List] = None):
+    """게놈 random access reader: .2bit이면 TwoBitFile, 아니면 IndexedFasta (.fai 인덱스)."""
+    if is_twobit(genome_file):
+        return TwoBitFile(genome_file, entries)
+    return IndexedFasta(genome_file, entries)
+
+
+def _init_worker(genome_file: str, entries: List, verbose: bool, table_id: int):
+    global _worker_genome, _worker_options
+    _worker_genome = open_genome(genome_file, entries)
+    _worker_options = (verbose, table_id)
+
+
+def _translate_batch(batch: List[Tuple[str, List[Tuple]]]) -> List[Tuple[Optional[str], str, int]]:
+    return translate_transcripts(batch, _worker_genome, *_worker_options)
+
+
+def translate_parallel(cds_regions: Dict[str, List[Tuple]], genome, workers: int,
+                       verbose: bool = False, table_id: int = 1) -> Iterator[Tuple[Optional[str], str, int]]:
+    """
+    transcript 묶음을 process pool로 번역합니다.
+
+    각 worker는 같은 genome 파일을 mmap으로 열기 때문에 게놈 서열은 pickle되지 않고,
+    결과는 입력(GTF) 순서대로 돌려줍니다.
+    """
+    items = list(cds_regions.items())
+    batch_size = max(1, min(TRANSLATE_BATCH_SIZE, len(items) // (workers * 8)))
+    batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(genome.twobit_file if isinstance(genome, TwoBitFile) else genome.fasta_file,
+                  list(genome.entries()), verbose, table_id),
+    ) as executor:
+        for results in executor.map(_translate_batch, batches):
+            yield from results
+
+
+def translate_proteins(cds_regions: Dict[str, List[Tuple]], sequences, workers: int = 1, verbose: bool = False,
+                       table_id: int = 1) -> Tuple[Dict[str, str], int]:
+    """
+    모든 transcript를 번역합니다.
+
+    Args:
+        sequences: 염색체 이름 → 서열 (dict, IndexedFasta 또는 TwoBitFile, workers > 1이면 dict 제외)
+
+    Returns:
+        ({protein_id: protein 서열}, 에러 수) - 같은 protein_id는 먼저 나온 transcript 기준, GTF 순서
+    """
+    if workers > 1:
+        print(f"  Using {workers} worker processes", file=sys.stderr)
+        results = translate_parallel(cds_regions, sequences, workers, verbose, table_id)
+    else:
+        items = list(cds_regions.items())
+        results = (result
+                   for i in range(0, len(items), TRANSLATE_BATCH_SIZE)
+                   for result in translate_transcripts(items[i:i + TRANSLATE_BATCH_SIZE], sequences,
+                                                       verbose, table_id))
+
+    proteins_by_id = {}  # {protein_id: sequence}
+    error_count = 0
+
+    for protein_id, protein_seq, errors in results:
+        error_count += errors
+
+        # protein_id별로 저장 (먼저 나온 transcript 우선)
+        if protein_id is not None and protein_id not in proteins_by_id:
+            proteins_by_id[protein_id] = protein_seq
 
-    return "".join(protein)
+    return proteins_by_id, error_count
 
 
-def extract_proteins(gtf_file: str, genome_file: str, output_file=None, verbose: bool = False):
+def extract_proteins(gtf_file: str, genome_file: str, output_file=None, verbose: bool = False,
+                     in_memory: bool = False, workers: int = 1, table_id: int = 1,
+                     cds_table: Optional[str] = None, cache: Optional[CdsCache] = None,
+                     regions: Optional[List[Region]] = None):
     """
     GTF + genome에서 protein sequence를 추출합니다.
+
+    Args:
+        genome_file: 게놈 FASTA 또는 .2bit (twobit.py로 변환, 항상 mmap으로 읽음)
+        in_memory: True이면 genome 전체를 메모리에 로드 (기존 방식, FASTA만).
+                   False이면 .fai 인덱스 + mmap으로 필요한 구간만 읽습니다.
+        workers: 번역에 사용할 process 수 (1이면 단일 process, in_memory와 함께 사용 불가)
+        table_id: NCBI genetic code 번호 (기본값: 1, 표준)
+        cds_table: gtf_scan.py가 만든 CDS 좌표 테이블 (지정하면 GTF를 파싱하지 않음)
+        cache: 파싱된 GTF CDS 캐시 (None이면 항상 GTF를 파싱)
+        regions: 지정하면 이 구간과 CDS가 겹치는 transcript만 번역
     """
     if output_file is None:
         output_file = sys.stdout
 
+    if workers > 1 and in_memory:
+        raise ValueError("workers > 1 requires the indexed genome (in_memory=False)")
+    if in_memory and is_twobit(genome_file):
+        raise ValueError(".2bit genomes are read via mmap; in_memory requires a FASTA genome")
+
     # 1. Genome 로드
-    sequences = load_genome_fasta(genome_file)
+    with phase("load", nbytes=input_bytes(genome_file)) as p:
+        if in_memory:
+            sequences = load_genome_fasta(genome_file)
+        else:
+            sequences = open_genome(genome_file)
+        p.records = len(sequences)
 
     # 2. CDS 영역 추출
-    cds_regions = extract_cds_regions(gtf_file)
+    cds_regions = load_cds_regions(gtf_file, cds_table, cache, regions)
 
     # 3. 단백질 추출
     print(f"\nExtracting proteins...", file=sys.stderr)
+    with phase("translate") as p:
+        proteins_by_id, error_count = translate_proteins(cds_regions, sequences, workers, verbose, table_id)
+        p.records = translated_count = len(proteins_by_id)
 
-    proteins_by_id = {}  # {protein_id: sequence}
-    translated_count = 0
-    error_count = 0
+    # 4. FASTA 형식으로 출력
+    print(f"Writing proteins to output...", file=sys.stderr)
+
+    with phase("write", records=translated_count) as p:
+        for protein_id in sorted(proteins_by_id.keys()):
+            p.bytes += write_protein(output_file, protein_id, proteins_by_id[protein_id])
+
+    if isinstance(sequences, (IndexedFasta, TwoBitFile)):
+        sequences.close()
+
+    # 통계
+    print(f"\n=== Statistics ===", file=sys.stderr)
+    print(f"Total proteins extracted: {translated_count}", file=sys.stderr)
+    print(f"Errors: {error_count}", file=sys.stderr)
+
+
+def extract_proteins_streaming(gtf_file: str, genome_file: str, output_file=None, verbose: bool = False,
+                               table_id: int = 1, cds_table: Optional[str] = None,
+                               cache: Optional[CdsCache] = None, regions: Optional[List[Region]] = None):
+    """
+    염색체 단위 streaming 모드로 protein sequence를 추출합니다.
+
+    genome FASTA를 서열 하나씩 순서대로 읽으면서, 그 염색체에 걸친 transcript를
+    번역해 바로 출력하고 염색체 서열은 버립니다. 최대 메모리는 게놈 전체가 아니라
+    가장 큰 염색체 + 그 위의 transcript 수준입니다.
 
+    출력 순서는 protein_id 정렬이 아니라 게놈(염색체) 순서입니다.
+    같은 protein_id가 여러 transcript에 있으면 GTF에서 먼저 나온 transcript를 사용합니다.
+    """
+    if output_file is None:
+        output_file = sys.stdout
+
+    if is_twobit(genome_file):
+        raise ValueError(".2bit genomes cannot be streamed; use extract_proteins() (mmap access)")
+
+    # 1. CDS 영역 추출
+    cds_regions = load_cds_regions(gtf_file, cds_table, cache, regions)
+
+    # 2. protein_id별로 사용할 transcript 선택 후 염색체별로 그룹화
+    transcripts = []  # [(transcript_id, regions)]
+    seen_proteins = set()
     for transcript_id, regions in cds_regions.items():
-        try:
-            # 각 CDS 영역별로 서열 추출
-            cds_sequence_parts = []
+        protein_id = regions[-1][5]
+        if protein_id in seen_proteins:
+            continue
+        seen_proteins.add(protein_id)
+        transcripts.append((transcript_id, regions))
+    del cds_regions, seen_proteins
+
+    regions_by_chrom = {}  # {chrom: [(transcript 번호, region 번호), ...]}
+    chroms_left = []       # transcript별로 아직 읽지 않은 염색체 수
+    for t_idx, (transcript_id, regions) in enumerate(transcripts):
+        chroms = set()
+        for r_idx, region in enumerate(regions):
+            regions_by_chrom.setdefault(region[0], []).append((t_idx, r_idx))
+            chroms.add(region[0])
+        chroms_left.append(len(chroms))
+
+    pending = {}  # {transcript 번호: [CDS 조각 또는 None, ...]}
+    translated_count = 0
+    error_count = 0
 
-            for chrom, start, end, strand, frame, protein_id in regions:
-                if chrom not in sequences:
+    def finish(t_indices: List[int]):
+        """CDS 조각이 모두 모인 transcript들을 한 번에 번역해서 출력."""
+        nonlocal translated_count, error_count
+        completed = []  # [(protein_id, cds 서열)]
+        for t_idx in t_indices:
+            transcript_id, regions = transcripts[t_idx]
+            parts = pending.pop(t_idx, None) or [None] * len(regions)
+            for region, part in zip(regions, parts):
+                if part is None:
                     if verbose:
-                        print(f"Warning: Chromosome {chrom} not found in genome", file=sys.stderr)
+                        print(f"Warning: Chromosome {region[0]} not found in genome", file=sys.stderr)
                     error_count += 1
-                    continue
 
-                # 서열 추출
-                dna = sequences[chrom][start:end]
+            cds_sequence_parts = [part for part in parts if part is not None]
+            if cds_sequence_parts:
+                completed.append((regions[-1][5], "".join(cds_sequence_parts)))
 
-                # 역방향이면 보수 역순
-                if strand == "-":
-                    dna = reverse_complement(dna)
+        proteins = translate_many([cds for _, cds in completed], table_id)
+        for (protein_id, _), protein_seq in zip(completed, proteins):
+            write_protein(output_file, protein_id, protein_seq)
+        translated_count += len(completed)
 
-                cds_sequence_parts.append(dna)
-
-            if not cds_sequence_parts:
-                continue
+    # 3. 염색체를 하나씩 읽으면서 번역 (게놈 읽기 + 번역 + 출력이 한 phase)
+    print(f"\nStreaming genome from {genome_file}...", file=sys.stderr)
 
-            # CDS 서열 병합
-            cds_sequence = "".join(cds_sequence_parts)
+    with phase("translate", nbytes=input_bytes(genome_file)) as p:
+        chrom_count = 0
+        for chrom, chrom_seq in iter_fasta(genome_file):
+            chrom_count += 1
+            if verbose and chrom_count % 1000 == 0:
+                print(f"  Processed {chrom_count:,} sequences...", file=sys.stderr)
 
-            # 번역
-            protein_seq = translate_cds(cds_sequence)
+            on_chrom = regions_by_chrom.pop(chrom, None)
+            if not on_chrom:
+                continue
 
-            # protein_id별로 저장 (마지막 것이 기본값)
-            if protein_id not in proteins_by_id:
-                proteins_by_id[protein_id] = protein_seq
-                translated_count += 1
+            touched = {}  # 이 염색체에 걸친 transcript (GTF 순서 유지)
+            for t_idx, r_idx in on_chrom:
+                regions = transcripts[t_idx][1]
+                parts = pending.get(t_idx)
+                if parts is None:
+                    parts = pending[t_idx] = [None] * len(regions)
+                touched[t_idx] = None
 
-        except Exception as e:
-            if verbose:
-                print(f"Error processing {transcript_id}: {e}", file=sys.stderr)
-            error_count += 1
+                _, start, end, strand, _, _ = regions[r_idx]
+                dna = chrom_seq[start:end]
+                if strand == "-":
+                    dna = reverse_complement(dna)
+                parts[r_idx] = dna
 
-    # 4. FASTA 형식으로 출력
-    print(f"Writing proteins to output...", file=sys.stderr)
+            del chrom_seq
 
-    for protein_id in sorted(proteins_by_id.keys()):
-        seq = proteins_by_id[protein_id]
-        print(f">{protein_id}", file=output_file)
+            for t_idx in touched:
+                chroms_left[t_idx] -= 1
+            finish([t_idx for t_idx in touched if chroms_left[t_idx] == 0])
 
-        # 80자씩 끊어서 출력
-        for i in range(0, len(seq), 80):
-            print(seq[i:i+80], file=output_file)
+        # 4. 게놈에 없는 염색체가 포함된 transcript 처리
+        finish([t_idx for t_idx, left in enumerate(chroms_left) if left > 0])
+        p.records = translated_count
 
     # 통계
     print(f"\n=== Statistics ===", file=sys.stderr)
+    print(f"Genome sequences streamed: {chrom_count}", file=sys.stderr)
     print(f"Total proteins extracted: {translated_count}", file=sys.stderr)
     print(f"Errors: {error_count}", file=sys.stderr)
 
@@ -253,6 +460,7 @@ def main():
 예시:
   cd scripts && python extract_proteins_from_gtf.py
   cd scripts && python extract_proteins_from_gtf.py -o ../intermediate/proteins.fasta -v
+  cd scripts && python extract_proteins_from_gtf.py --region NC_089186.1:1,000,000-1,050,000 --bed loci.bed
         """
     )
 
@@ -269,15 +477,64 @@ def main():
         metavar="GENOME_FILE",
         nargs='?',
         default=os.path.join(DATA_DIR, 'genome.fna'),
-        help="게놈 FASTA 파일 (기본값: data/genome.fna)"
+        help="게놈 FASTA 또는 twobit.py로 변환한 .2bit 파일 (기본값: data/genome.fna)"
     )
 
     parser.add_argument(
         "-o", "--output",
         metavar="OUTPUT",
-        type=argparse.FileType('w'),
-        default=sys.stdout,
-        help="출력 FASTA 파일 (기본값: stdout)"
+        help="출력 FASTA 파일 (기본값: stdout, .gz로 끝나면 gzip 압축)"
+    )
+
+    parser.add_argument(
+        "--cds-table",
+        metavar="CDS_TABLE",
+        help="GTF 대신 gtf_scan.py가 만든 CDS 좌표 테이블 사용 (GTF 재파싱 생략)"
+    )
+
+    parser.add_argument(
+        "-r", "--region",
+        action="append",
+        metavar="REGION",
+        help="이 구간과 CDS가 겹치는 transcript만 번역 (CHROM:START-END, 1-based, 여러 번 지정 가능)"
+    )
+
+    parser.add_argument(
+        "--bed",
+        action="append",
+        metavar="BED",
+        help="BED 파일의 구간들과 CDS가 겹치는 transcript만 번역 (여러 번 지정 가능)"
+    )
+
+    mode_group = parser.add_mutually_exclusive_group()
+
+    mode_group.add_argument(
+        "--in-memory",
+        action="store_true",
+        help="게놈 전체를 메모리에 로드 (기본값: .fai 인덱스 + mmap으로 필요한 구간만 읽음)"
+    )
+
+    mode_group.add_argument(
+        "--streaming",
+        action="store_true",
+        help="염색체 단위 streaming 모드 (게놈 순서로 출력, 최대 메모리 = 가장 큰 염색체)"
+    )
+
+    parser.add_argument(
+        "-g", "--genetic-code",
+        type=int,
+        default=1,
+        choices=sorted(GENETIC_CODES),
+        metavar="ID",
+        help="NCBI genetic code 번호 (기본값: 1, 표준 / 5: 무척추동물 미토콘드리아)"
+    )
+
+    parser.add_argument(
+        "-j", "--workers",
+        type=int,
+        default=1,
+        metavar="N",
+        help="번역에 사용할 process 수 (기본값: 1, --in-memory/--streaming과 함께 사용 불가)"
     )
 
     parser.add_argument(
@@ -286,12 +543,40 @@ def main():
         help="상세 출력"
     )
 
+    add_cache_arguments(parser)
+    add_metrics_arguments(parser)
+
     args = parser.parse_args()
 
-    extract_proteins(args.gtf_file, args.genome_file, args.output, args.verbose)
+    if args.workers < 1:
+        parser.error("--workers must be >= 1")
+    if args.workers > 1 and (args.in_memory or args.streaming):
+        parser.error("--workers cannot be combined with --in-memory or --streaming")
+
+    if is_twobit(args.genome_file) and (args.in_memory or args.streaming):
+        parser.error(".2bit genomes are always read via mmap; --in-memory/--streaming require a FASTA genome")
 
-    if args.output != sys.stdout:
-        args.output.close()
+    regions = None
+    if args.region or args.bed:
+        try:
+            regions = regions_from_args(args.region, args.bed)
+        except (IOError, ValueError) as e:
+            parser.error(str(e))
+
+    compression = detect_compression(args.genome_file)
+    if compression in ("gzip", "zstd") and not (args.in_memory or args.streaming):
+        parser.error(f"{args.genome_file} is {compression}-compressed; use --streaming or --in-memory, "
+                     f"or recompress it with bgzip for indexed access")
+
+    with instrument_from_args(args, "extract_proteins_from_gtf"), \
+            open_output(args.output, background=True) as output:
+        if args.streaming:
+            extract_proteins_streaming(args.gtf_file, args.genome_file, output, args.verbose,
+                                       args.genetic_code, args.cds_table, cache_from_args(args), regions)
+        else:
+            extract_proteins(args.gtf_file, args.genome_file, output, args.verbose,
+                             args.in_memory, args.workers, args.genetic_code, args.cds_table,
+                             cache_from_args(args), regions)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,547 @@
+#!/usr/bin/env python3
+"""
+FASTA 파일 random access 모듈.
+
+samtools faidx와 호환되는 .fai 인덱스를 한 번 생성해 두고,
+memory-map된 파일에서 필요한 구간만 읽어 서열을 돌려줍니다.
+
+  genome = IndexedFasta("genome.fna")
+  dna = genome["NC_089186.1"][1000:2000]   # 대문자 str
+
+.fai 형식 (탭 구분): name, length, offset, linebases, linewidth
+
+bgzip으로 압축된 FASTA도 .gzi 인덱스를 통해 같은 방식으로 random access 할 수 있습니다
+(offset은 samtools와 마찬가지로 압축 해제된 데이터 기준). 일반 gzip/zstd는 random access가
+불가능하므로 iter_fasta()로 순차적으로만 읽을 수 있습니다.
+
+줄 길이가 일정하지 않은 FASTA(예: 단백질 DB)에서 ID로 레코드를 꺼낼 때는 .fai 대신
+레코드 단위 .fxi 인덱스(name, offset, size를 담은 SQLite 파일)를 사용합니다 (iter_records_by_id).
+"""
+
+import sys
+import os
+import mmap
+import sqlite3
+from contextlib import closing
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from compressed_io import BgzfRandomReader, detect_compression, open_input
+
+# 서열 구간을 읽을 때 대문자 변환과 개행 제거를 한 번에 처리
+_UPPER_TABLE = bytes.maketrans(b"abcdefghijklmnopqrstuvwxyz", b"ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+_NEWLINES = b"\r\n"
+
+
+# 요청한 레코드가 파일의 이 비율(바이트 기준)을 넘으면 random access 대신 순차 읽기로 처리
+SEQUENTIAL_READ_FRACTION = 0.25
+
+# 레코드 인덱스에서 ID별 검색 대신 전체 스캔으로 바꾸는 기준 ID 수
+_MAX_LOOKUP_IDS = 20000
+
+
+class FaiEntry(NamedTuple):
+    """.fai 인덱스의 한 행."""
+    name: str
+    length: int
+    offset: int
+    line_bases: int
+    line_width: int
+
+
+def iter_fasta(fasta_file: str, upper: bool = True) -> Iterator[Tuple[str, str]]:
+    """
+    FASTA 파일을 서열 하나씩 순서대로 읽습니다 (streaming).
+
+    한 번에 메모리에 올라가는 것은 현재 서열 하나뿐입니다.
+
+    Yields:
+        (서열 ID, 서열) - ID는 header의 첫 번째 공백 이전까지
+    """
+    current_id = None
+    current_seq = []
+
+    with open_input(fasta_file) as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+
+            if line.startswith(">"):
+                if current_id is not None:
+                    yield current_id, "".join(current_seq)
+                    current_seq = []
+
+                header = line[1:].strip()
+                current_id = header.split()[0] if header else ""
+
+            elif current_id is not None:
+                current_seq.append(line.upper() if upper else line)
+
+        if current_id is not None:
+            yield current_id, "".join(current_seq)
+
+
+def fai_path_for(fasta_file: str) -> str:
+    """FASTA 파일에 대응하는 .fai 경로."""
+    return fasta_file + ".fai"
+
+
+def _index_record(mm, name: str, seq_start: int, seq_end: int) -> FaiEntry:
+    """서열 본문 [seq_start, seq_end)의 줄 길이를 검사하고 FaiEntry를 만듭니다."""
+    body = mm[seq_start:seq_end]
+    if not body:
+        return FaiEntry(name, 0, seq_start, 0, 0)
+
+    first_nl = body.find(b"\n")
+    if first_nl == -1:
+        # 개행 없이 파일이 끝나는 한 줄짜리 서열
+        line_bases = len(body.rstrip(b"\r"))
+        return FaiEntry(name, line_bases, seq_start, line_bases, len(body))
+
+    line_width = first_nl + 1
+    line_bases = first_nl - 1 if body[first_nl - 1:first_nl] == b"\r" else first_nl
+
+    # 마지막 줄을 제외한 모든 줄은 길이가 같아야 함 (samtools faidx와 동일한 제약)
+    full_lines = len(body) // line_width
+    tail = body[full_lines * line_width:]
+    newline_positions = body[line_width - 1:full_lines * line_width:line_width]
+    tail_newlines = tail.count(b"\n")
+    if (newline_positions.count(b"\n") != full_lines
+            or body.count(b"\n") != full_lines + tail_newlines
+            or (tail_newlines and not tail.endswith(b"\n"))):
+        raise ValueError(f"Different line length in sequence '{name}'")
+
+    length = full_lines * line_bases + len(tail.rstrip(b"\r\n"))
+    return FaiEntry(name, length, seq_start, line_bases, line_width)
+
+
+def build_fai(fasta_file: str, fai_file: Optional[str] = None) -> List[FaiEntry]:
+    """
+    FASTA 파일을 한 번 훑어 .fai 인덱스를 생성합니다.
+
+    Args:
+        fasta_file: 입력 FASTA 파일
+        fai_file: 저장할 .fai 경로 (None이면 저장하지 않음)
+
+    Returns:
+        FaiEntry 리스트 (파일 순서)
+    """
+    print(f"Building FASTA index for {fasta_file}...", file=sys.stderr)
+    signature = source_signature(fasta_file)
+
+    if detect_compression(fasta_file) is not None:
+        with open_input(fasta_file, "rb") as f:
+            entries = _build_fai_stream(f)
+    else:
+        entries = _build_fai_mmap(fasta_file)
+
+    if fai_file:
+        write_fai(entries, fai_file, signature)
+
+    print(f"Indexed {len(entries)} sequences", file=sys.stderr)
+    return entries
+
+
+def _build_fai_mmap(fasta_file: str) -> List[FaiEntry]:
+    """비압축 FASTA: mmap에서 header 위치를 찾고 서열 본문은 통째로 검사."""
+    entries = []
+
+    with open(fasta_file, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return entries
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = 0 if mm[:1] == b">" else mm.find(b"\n>") + 1
+            while pos > 0 or mm[:1] == b">":
+                header_end = mm.find(b"\n", pos)
+                if header_end == -1:
+                    header_end = len(mm)
+                header = mm[pos + 1:header_end].decode().strip()
+                name = header.split()[0] if header else ""
+
+                seq_start = min(header_end + 1, len(mm))
+                next_header = mm.find(b"\n>", seq_start - 1)
+                seq_end = next_header + 1 if next_header != -1 else len(mm)
+
+                entries.append(_index_record(mm, name, seq_start, seq_end))
+
+                if next_header == -1:
+                    break
+                pos = seq_end
+
+    return entries
+
+
+def _build_fai_stream(stream) -> List[FaiEntry]:
+    """압축 FASTA: 압축 해제된 stream을 줄 단위로 읽으며 인덱스 생성 (offset은 비압축 기준)."""
+    entries = []
+    offset = 0
+    name = None
+    seq_offset = length = line_bases = line_width = 0
+    last_line_seen = False  # 다른 줄보다 짧은(= 마지막이어야 하는) 줄이 이미 나왔는지
+
+    for line in stream:
+        offset += len(line)
+
+        if line.startswith(b">"):
+            if name is not None:
+                entries.append(FaiEntry(name, length, seq_offset, line_bases, line_width))
+            header = line[1:].decode().strip()
+            name = header.split()[0] if header else ""
+            seq_offset = offset
+            length = line_bases = line_width = 0
+            last_line_seen = False
+            continue
+
+        if name is None:
+            continue
+
+        bases = len(line.rstrip(b"\r\n"))
+        if line_width == 0:
+            line_bases, line_width = bases, len(line)
+        elif last_line_seen or bases > line_bases:
+            raise ValueError(f"Different line length in sequence '{name}'")
+        elif bases < line_bases or len(line) != line_width:
+            last_line_seen = True
+        length += bases
+
+    if name is not None:
+        entries.append(FaiEntry(name, length, seq_offset, line_bases, line_width))
+
+    return entries
+
+
+def source_signature(fasta_file: str) -> Tuple[int, int]:
+    """인덱스가 어떤 FASTA로 만들어졌는지 확인하기 위한 (크기, mtime_ns)."""
+    st = os.stat(fasta_file)
+    return st.st_size, st.st_mtime_ns
+
+
+def fai_signature_path_for(fai_file: str) -> str:
+    """.fai를 만든 FASTA의 (크기, mtime_ns)를 기록하는 파일 (.fai는 samtools 형식 그대로 유지)."""
+    return fai_file + ".src"
+
+
+def write_fai(entries: List[FaiEntry], fai_file: str, signature: Optional[Tuple[int, int]] = None):
+    """FaiEntry 리스트를 .fai 파일로 저장. signature가 있으면 옆에 .fai.src로 함께 기록."""
+    tmp_file = fai_file + ".tmp"
+    with open(tmp_file, "w") as f:
+        for e in entries:
+            f.write(f"{e.name}\t{e.length}\t{e.offset}\t{e.line_bases}\t{e.line_width}\n")
+    os.replace(tmp_file, fai_file)
+
+    if signature is not None:
+        sig_file = fai_signature_path_for(fai_file)
+        with open(sig_file + ".tmp", "w") as f:
+            f.write(f"{signature[0]}\t{signature[1]}\n")
+        os.replace(sig_file + ".tmp", sig_file)
+
+
+def read_fai(fai_file: str) -> List[FaiEntry]:
+    """.fai 파일을 읽습니다."""
+    entries = []
+    with open(fai_file, "r") as f:
+        for line in f:
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) < 5:
+                continue
+            entries.append(FaiEntry(cols[0], int(cols[1]), int(cols[2]), int(cols[3]), int(cols[4])))
+    return entries
+
+
+def read_fai_signature(fai_file: str) -> Optional[Tuple[int, int]]:
+    """.fai.src에 기록된 (크기, mtime_ns). 없거나 읽을 수 없으면 None."""
+    try:
+        with open(fai_signature_path_for(fai_file), "r") as f:
+            size, mtime_ns = f.readline().split("\t")
+            return int(size), int(mtime_ns)
+    except (OSError, ValueError):
+        return None
+
+
+def load_or_build_fai(fasta_file: str) -> List[FaiEntry]:
+    """
+    .fai가 지금의 FASTA로 만들어졌으면 (.fai.src의 크기/mtime_ns가 같으면) 읽고, 아니면 새로 생성합니다.
+    mtime 선후만 비교하면 cp -p, rsync -t 등으로 더 오래된 mtime의 FASTA로 바뀐 경우를 놓치므로
+    FASTA의 (크기, mtime_ns)를 그대로 비교합니다. .src가 없는 .fai (samtools 등)도 다시 만듭니다.
+    디렉토리에 쓸 수 없으면 인덱스를 메모리에만 만듭니다.
+    """
+    fai_file = fai_path_for(fasta_file)
+    signature = source_signature(fasta_file)
+    if os.path.exists(fai_file) and read_fai_signature(fai_file) == signature:
+        return read_fai(fai_file)
+
+    entries = build_fai(fasta_file)
+    try:
+        write_fai(entries, fai_file, signature)
+    except OSError as e:
+        print(f"Warning: could not write {fai_file}: {e}", file=sys.stderr)
+    return entries
+
+
+class RecordOffset(NamedTuple):
+    """.fxi 인덱스의 한 행: 서열 본문(header 다음 줄부터 다음 header 직전까지)의 byte 위치."""
+    name: str
+    offset: int
+    size: int
+
+
+def record_index_path_for(fasta_file: str) -> str:
+    """FASTA 파일에 대응하는 레코드 인덱스(.fxi, SQLite) 경로."""
+    return fasta_file + ".fxi"
+
+
+def build_record_index(fasta_file: str) -> List[RecordOffset]:
+    """
+    비압축 FASTA의 header 위치만 찾아 레코드 인덱스를 만듭니다 (줄 길이 제약 없음).
+    ID가 비어 있는 header는 제외하고, 같은 ID가 여러 번 나오면 모두 기록합니다.
+    """
+    entries = []
+
+    with open(fasta_file, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return entries
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = 0 if mm[:1] == b">" else mm.find(b"\n>") + 1
+            while pos > 0 or mm[:1] == b">":
+                header_end = mm.find(b"\n", pos)
+                if header_end == -1:
+                    header_end = len(mm)
+                header = mm[pos + 1:header_end].decode().strip()
+
+                seq_start = min(header_end + 1, len(mm))
+                next_header = mm.find(b"\n>", seq_start - 1)
+                seq_end = next_header + 1 if next_header != -1 else len(mm)
+
+                if header:
+                    entries.append(RecordOffset(header.split()[0], seq_start, seq_end - seq_start))
+
+                if next_header == -1:
+                    break
+                pos = seq_end
+
+    return entries
+
+
+def write_record_index(entries: List[RecordOffset], index_file: str,
+                       signature: Optional[Tuple[int, int]] = None):
+    """
+    RecordOffset 리스트를 SQLite 파일로 저장 (name 컬럼에 B-tree 인덱스).
+    signature(FASTA의 크기, mtime_ns)는 source 테이블에 기록합니다.
+    """
+    tmp_file = f"{index_file}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+
+    with closing(sqlite3.connect(tmp_file)) as conn, conn:
+        conn.execute("CREATE TABLE records (name TEXT, offset INTEGER, size INTEGER)")
+        conn.executemany("INSERT INTO records VALUES (?, ?, ?)", entries)
+        conn.execute("CREATE INDEX records_name ON records (name)")
+        conn.execute("CREATE TABLE source (size INTEGER, mtime_ns INTEGER)")
+        if signature is not None:
+            conn.execute("INSERT INTO source VALUES (?, ?)", signature)
+
+    os.replace(tmp_file, index_file)
+
+
+def read_record_index_signature(index_file: str) -> Optional[Tuple[int, int]]:
+    """레코드 인덱스를 만든 FASTA의 (크기, mtime_ns). 기록이 없거나 읽을 수 없으면 None."""
+    try:
+        with closing(sqlite3.connect(f"file:{index_file}?mode=ro", uri=True)) as conn:
+            row = conn.execute("SELECT size, mtime_ns FROM source").fetchone()
+    except sqlite3.Error:
+        return None
+    return tuple(row) if row else None
+
+
+def query_record_index(index_file: str, ids) -> List[RecordOffset]:
+    """레코드 인덱스에서 ids에 해당하는 항목을 offset 순으로 찾습니다."""
+    ids = set(ids)
+    rows = []
+
+    with closing(sqlite3.connect(f"file:{index_file}?mode=ro", uri=True)) as conn:
+        if len(ids) > _MAX_LOOKUP_IDS:
+            # 요청이 많으면 ID별 검색보다 전체를 한 번 훑는 편이 빠름
+            rows = [row for row in conn.execute("SELECT name, offset, size FROM records") if row[0] in ids]
+        else:
+            id_list = list(ids)
+            for i in range(0, len(id_list), 500):
+                chunk = id_list[i:i + 500]
+                rows += conn.execute(
+                    f"SELECT name, offset, size FROM records WHERE name IN ({','.join('?' * len(chunk))})",
+                    chunk).fetchall()
+
+    return sorted(map(RecordOffset._make, rows), key=lambda e: e.offset)
+
+
+def select_records(fasta_file: str, ids) -> List[RecordOffset]:
+    """
+    ids에 해당하는 레코드 위치를 offset(파일) 순으로 돌려줍니다.
+
+    레코드 인덱스에 기록된 FASTA의 (크기, mtime_ns)가 지금과 같으면 그대로 사용하고,
+    아니면 (FASTA가 바뀌었거나 이전 형식의 인덱스) 새로 만들어 저장합니다.
+    디렉토리에 쓸 수 없으면 인덱스를 메모리에만 만듭니다.
+    """
+    index_file = record_index_path_for(fasta_file)
+    signature = source_signature(fasta_file)
+    if os.path.exists(index_file) and read_record_index_signature(index_file) == signature:
+        return query_record_index(index_file, ids)
+
+    print(f"Building record index for {fasta_file}...", file=sys.stderr)
+    entries = build_record_index(fasta_file)
+    try:
+        write_record_index(entries, index_file, signature)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Warning: could not write {index_file}: {e}", file=sys.stderr)
+        return [e for e in entries if e.name in ids]
+    return query_record_index(index_file, ids)
+
+
+def iter_records_by_id(fasta_file: str, ids) -> Iterator[Tuple[str, str]]:
+    """
+    ID 집합에 해당하는 레코드만 파일 순서대로 돌려줍니다 (대소문자는 그대로).
+
+    비압축 FASTA는 .fxi 인덱스로 필요한 레코드의 byte 구간만 mmap에서 읽습니다.
+    요청한 레코드가 파일의 상당 부분(SEQUENTIAL_READ_FRACTION 이상)이면 같은 mmap을
+    순차 읽기 모드로 처음부터 끝까지 훑습니다. 압축 파일은 iter_fasta()로 순차 스캔합니다.
+
+    Yields:
+        (서열 ID, 서열)
+    """
+    if detect_compression(fasta_file) is not None:
+        for name, seq in iter_fasta(fasta_file, upper=False):
+            if name and name in ids:
+                yield name, seq
+        return
+
+    selected = select_records(fasta_file, ids)
+    if not selected:
+        return
+
+    with open(fasta_file, "rb") as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        selected_bytes = sum(e.size for e in selected)
+        advice = "MADV_SEQUENTIAL" if selected_bytes >= len(mm) * SEQUENTIAL_READ_FRACTION else "MADV_RANDOM"
+        if hasattr(mm, "madvise") and hasattr(mmap, advice):
+            mm.madvise(getattr(mmap, advice))
+
+        # offset 순으로 읽으므로 디스크 읽기가 항상 앞으로만 진행
+        for e in selected:
+            yield e.name, mm[e.offset:e.offset + e.size].translate(None, _NEWLINES).decode()
+
+
+class IndexedSequence:
+    """하나의 서열에 대한 slice 전용 view. ``seq[start:end]``는 대문자 str을 돌려줍니다."""
+
+    __slots__ = ("_fasta", "_entry")
+
+    def __init__(self, fasta: "IndexedFasta", entry: FaiEntry):
+        self._fasta = fasta
+        self._entry = entry
+
+    def __len__(self) -> int:
+        return self._entry.length
+
+    def __getitem__(self, key) -> str:
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._entry.length)
+            if step != 1:
+                return self._fasta.fetch_entry(self._entry, 0, self._entry.length)[key]
+            return self._fasta.fetch_entry(self._entry, start, stop)
+
+        if key < 0:
+            key += self._entry.length
+        if not 0 <= key < self._entry.length:
+            raise IndexError("sequence index out of range")
+        return self._fasta.fetch_entry(self._entry, key, key + 1)
+
+    def __str__(self) -> str:
+        return self[:]
+
+
+class IndexedFasta:
+    """
+    .fai 인덱스 + mmap 기반 FASTA reader.
+
+    load_genome_fasta()가 반환하는 dict와 같은 방식(``chrom in genome``,
+    ``genome[chrom][start:end]``)으로 사용할 수 있지만, 실제로 읽는 것은
+    요청된 구간이 걸친 페이지뿐입니다.
+    """
+
+    def __init__(self, fasta_file: str, entries: Optional[List[FaiEntry]] = None):
+        self.fasta_file = fasta_file
+
+        compression = detect_compression(fasta_file)
+        if compression not in (None, "bgzip"):
+            raise ValueError(f"{fasta_file} is {compression}-compressed and cannot be randomly accessed; "
+                             f"recompress it with bgzip or read it sequentially (--streaming)")
+
+        if entries is None:
+            entries = load_or_build_fai(fasta_file)
+        self._entries: Dict[str, FaiEntry] = {e.name: e for e in entries}
+
+        self._file = None
+        self._mm = b""
+        self._bgzf = None
+        if compression == "bgzip":
+            self._bgzf = BgzfRandomReader(fasta_file)
+            self._read = lambda first, last: self._bgzf.read(first, last - first)
+        else:
+            self._file = open(fasta_file, "rb")
+            if os.fstat(self._file.fileno()).st_size:
+                self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                if hasattr(self._mm, "madvise") and hasattr(mmap, "MADV_RANDOM"):
+                    self._mm.madvise(mmap.MADV_RANDOM)
+            self._read = lambda first, last: self._mm[first:last]
+
+    def fetch_entry(self, entry: FaiEntry, start: int, end: int) -> str:
+        """entry의 0-based [start, end) 구간을 대문자 str로 반환 (범위는 서열 길이로 잘림)."""
+        start = max(start, 0)
+        end = min(end, entry.length)
+        if start >= end:
+            return ""
+
+        lb, lw, offset = entry.line_bases, entry.line_width, entry.offset
+        first = offset + (start // lb) * lw + start % lb
+        last = offset + ((end - 1) // lb) * lw + (end - 1) % lb + 1
+
+        return self._read(first, last).translate(_UPPER_TABLE, _NEWLINES).decode("ascii")
+
+    def fetch(self, name: str, start: int, end: int) -> str:
+        """서열 이름과 0-based [start, end) 구간으로 서열을 가져옵니다."""
+        return self.fetch_entry(self._entries[name], start, end)
+
+    def entry(self, name: str) -> FaiEntry:
+        return self._entries[name]
+
+    def entries(self) -> Iterator[FaiEntry]:
+        """FaiEntry들을 파일 순서대로 반환 (worker process에 인덱스를 넘길 때 사용)."""
+        return iter(self._entries.values())
+
+    def __contains__(self, name) -> bool:
+        return name in self._entries
+
+    def __getitem__(self, name: str) -> IndexedSequence:
+        return IndexedSequence(self, self._entries[name])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def keys(self):
+        return self._entries.keys()
+
+    def close(self):
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        if self._file is not None:
+            self._file.close()
+        if self._bgzf is not None:
+            self._bgzf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+GTF 파일 reader (1_extract_loc_to_protein.py, extract_proteins_from_gtf.py 공용).
+
+- feature 컬럼(3번째)을 먼저 확인하고, 필요한 feature 행만 9번째 컬럼을 봅니다.
+- attribute는 dict 전체를 만들지 않고, 요청한 key의 값만 문자열 검색으로 꺼냅니다.
+
+  for chrom, start, end, strand, frame, (gene_id, protein_id) in iter_gtf_features(
+          "annotation.gtf", ("gene_id", "protein_id")):
+      ...
+
+값 해석 규칙은 parse_attributes()와 같습니다: ';'로 나뉜 항목이 `key "value"` 형식이어야 하고
+(key는 항목의 첫 단어, key와 값 사이는 공백 또는 tab 하나 이상), 값이 비어 있으면 없는 것으로 봅니다.
+"""
+
+import sys
+import re
+from typing import Iterator, Optional, Sequence, Tuple
+
+from compressed_io import open_input
+
+_ATTRIBUTE_RE = re.compile(r'([^ ]+)\s+"(.+)"')
+
+# CDS 레코드를 쓰는 곳(gtf_scan의 sink들, cds_cache)이 공통으로 꺼내는 attribute
+CDS_KEYS = ("gene_id", "transcript_id", "protein_id", "product")
+
+# (chrom, start(0-based), end, strand, frame, 요청한 attribute 값들)
+GtfRecord = Tuple[str, int, int, str, int, Tuple[Optional[str], ...]]
+
+
+def parse_attributes(attr_field: str) -> dict:
+    """GTF 9번째 컬럼 전체를 dict로 파싱."""
+    attrs = {}
+    for item in attr_field.strip().strip(";").split(";"):
+        item = item.strip()
+        if not item:
+            continue
+        # key "value" 형식 파싱
+        m = _ATTRIBUTE_RE.match(item)
+        if m:
+            attrs[m.group(1)] = m.group(2)
+    return attrs
+
+
+def get_attribute(attr_field: str, key: str) -> Optional[str]:
+    """
+    9번째 컬럼에서 key 하나의 값만 꺼냅니다 (parse_attributes(attr_field).get(key)와 동일).
+
+    문자열 검색으로 key로 시작하는 ';' 항목을 뒤에서부터 찾고, 그 항목 하나에만
+    parse_attributes()와 같은 규칙을 적용합니다. 같은 key가 여러 번 나오면
+    형식에 맞는 마지막 항목을 사용합니다 (값이 빈 항목은 건너뜀).
+    """
+    pos = attr_field.rfind(key)
+    if pos == -1:
+        return None
+
+    # 대부분의 행: 마지막 key가 `; key "value"` 형식 → 값은 항목의 마지막 '"'까지 (정규식과 같은 결과)
+    value_start = pos + len(key)
+    if attr_field.startswith(' "', value_start) and \
+            (attr_field.startswith("; ", pos - 2) or pos == 0 or attr_field[pos - 1] == ";"):
+        value_start += 2
+        item_end = attr_field.find(";", value_start)
+        if item_end == -1:
+            item_end = len(attr_field)
+        value_end = attr_field.rfind('"', value_start + 1, item_end)
+        if value_end != -1:
+            return attr_field[value_start:value_end]
+
+    n = len(attr_field)
+    while pos != -1:
+        # 항목의 첫 단어여야 함: 앞은 (공백을 건너뛰고) ';' 또는 컬럼 시작 - "xgene_id", `a "b" gene_id` 제외
+        before = pos
+        while before > 0 and attr_field[before - 1] in " \t":
+            before -= 1
+        if before == 0 or attr_field[before - 1] == ";":
+            item_end = attr_field.find(";", pos)
+            m = _ATTRIBUTE_RE.match(attr_field, pos, n if item_end == -1 else item_end)
+            if m is not None and m.group(1) == key:
+                return m.group(2)
+
+        key_end = pos + len(key) - 1
+        pos = attr_field.rfind(key, 0, key_end)
+    return None
+
+
+def iter_gtf_features(gtf_file: str, keys: Sequence[str], feature: str = "CDS",
+                      progress: bool = False) -> Iterator[GtfRecord]:
+    """
+    GTF 파일에서 지정한 feature 행만 골라 좌표와 요청한 attribute 값을 돌려줍니다.
+
+    Args:
+        gtf_file: 입력 GTF 파일
+        keys: 꺼낼 attribute key 목록 (값은 같은 순서의 tuple, 없으면 None)
+        feature: 3번째 컬럼 값 (기본값: CDS)
+        progress: 100,000줄마다 진행상황을 stderr로 출력
+
+    Yields:
+        (chrom, start, end, strand, frame, values) - start는 0-based, end는 exclusive, frame이 '.'이면 0
+
+    Raises:
+        ValueError: start/end/frame 컬럼을 정수로 읽을 수 없을 때 (파일:줄 번호 포함)
+    """
+    feature_token = "\t" + feature + "\t"
+
+    with open_input(gtf_file) as f:
+        for line_num, line in enumerate(f, 1):
+            if progress and line_num % 100000 == 0:
+                print(f"  Processed {line_num:,} lines...", file=sys.stderr)
+
+            # 대부분의 행은 여기서 걸러짐 (split 전에 문자열 검색만)
+            if feature_token not in line or line.startswith("#"):
+                continue
+
+            cols = line.rstrip("\n").split("\t", 8)
+            if len(cols) < 9 or cols[2] != feature:
+                continue
+
+            attr_field = cols[8]
+            try:
+                start = int(cols[3]) - 1  # GTF는 1-based, Python은 0-based
+                end = int(cols[4])
+                # frame은 번역에 쓰지 않으므로 '.'(미지정)이면 0으로 봄
+                frame = int(cols[7]) if cols[7] != "." else 0
+            except ValueError:
+                raise ValueError(f"{gtf_file}:{line_num}: invalid start/end/frame "
+                                 f"({cols[3]!r}, {cols[4]!r}, {cols[7]!r})")
+            yield (
+                cols[0],
+                start,
+                end,
+                cols[6],
+                frame,
+                tuple(get_attribute(attr_field, key) for key in keys),
+            )
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+GTF 파일을 한 번만 읽어서 여러 산출물을 동시에 만듭니다.
+
+  - LOC → protein_id 매핑 (1_extract_loc_to_protein.py와 동일한 형식)
+  - CDS 좌표 테이블 (extract_proteins_from_gtf.py --cds-table 입력)
+  - 통계 (CDS 수, gene/transcript/protein 수 등)
+
+각 산출물은 sink 객체로 구현되어 있고, scan_gtf()가 CDS 레코드를 읽으면서
+모든 sink에 차례로 넘겨줍니다.
+"""
+
+import sys
+import argparse
+import os
+from contextlib import ExitStack
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from compressed_io import open_input
+from gtf_reader import CDS_KEYS, GtfRecord, iter_gtf_features
+from cds_cache import CdsCache, add_cache_arguments, cache_from_args
+from output_io import open_output
+from table_io import detect_table_format, read_column_lists
+
+# 스크립트 기본 경로 설정
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
+INTERMEDIATE_DIR = os.path.join(PROJECT_ROOT, 'intermediate')
+
+CDS_TABLE_HEADER = "chrom\tstart\tend\tstrand\tframe\ttranscript_id\tprotein_id\tgene_id"
+
+
+class LocProteinMapSink:
+    """LOC (gene_id) → protein_id 매핑 TSV. (gene_id, protein_id) 쌍은 처음 나온 것만 출력."""
+
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.seen_pairs = set()
+        print("gene_id\tprotein_id\tproduct\ttranscript_id", file=output_file)
+
+    def add(self, record: GtfRecord):
+        gene_id, transcript_id, protein_id, product = record[5]
+
+        # protein_id가 없으면 스킵
+        if not gene_id or not protein_id:
+            return
+
+        # 중복 쌍 제거
+        pair = (gene_id, protein_id)
+        if pair in self.seen_pairs:
+            return
+        self.seen_pairs.add(pair)
+
+        self.output_file.write(f"{gene_id}\t{protein_id}\t{product or ''}\t{transcript_id or ''}\n")
+
+    def close(self):
+        pass
+
+
+class CdsRegionSink:
+    """extract_cds_regions()와 같은 {transcript_id: [(chrom, start, end, strand, frame, protein_id), ...]}."""
+
+    def __init__(self):
+        self.cds_regions: Dict[str, List[Tuple]] = {}
+
+    def add(self, record: GtfRecord):
+        chrom, start, end, strand, frame, (gene_id, transcript_id, protein_id, product) = record
+        if not transcript_id or not protein_id:
+            return
+
+        if transcript_id not in self.cds_regions:
+            self.cds_regions[transcript_id] = []
+
+        self.cds_regions[transcript_id].append((chrom, start, end, strand, frame, protein_id))
+
+    def close(self):
+        pass
+
+
+class CdsTableSink:
+    """CDS 좌표 테이블 TSV (좌표는 GTF와 같은 1-based)."""
+
+    def __init__(self, output_file):
+        self.output_file = output_file
+        print(CDS_TABLE_HEADER, file=output_file)
+
+    def add(self, record: GtfRecord):
+        chrom, start, end, strand, frame, (gene_id, transcript_id, protein_id, product) = record
+        if not transcript_id or not protein_id:
+            return
+
+        self.output_file.write(
+            f"{chrom}\t{start + 1}\t{end}\t{strand}\t{frame}\t{transcript_id}\t{protein_id}\t{gene_id or ''}\n")
+
+    def close(self):
+        pass
+
+
+class GtfStatsSink:
+    """CDS 레코드 기준 통계 (metric, value TSV)."""
+
+    def __init__(self, output_file=None):
+        self.output_file = output_file
+        self.cds_count = 0
+        self.cds_bases = 0
+        self.genes = set()
+        self.transcripts = set()
+        self.proteins = set()
+        self.chroms = set()
+
+    def add(self, record: GtfRecord):
+        chrom, start, end, strand, frame, (gene_id, transcript_id, protein_id, product) = record
+        self.cds_count += 1
+        self.cds_bases += end - start
+        self.chroms.add(chrom)
+        if gene_id:
+            self.genes.add(gene_id)
+        if transcript_id:
+            self.transcripts.add(transcript_id)
+        if protein_id:
+            self.proteins.add(protein_id)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "cds_records": self.cds_count,
+            "cds_bases": self.cds_bases,
+            "genes": len(self.genes),
+            "transcripts": len(self.transcripts),
+            "proteins": len(self.proteins),
+            "sequences": len(self.chroms),
+        }
+
+    def close(self):
+        if self.output_file is None:
+            return
+        print("metric\tvalue", file=self.output_file)
+        for name, value in self.stats().items():
+            print(f"{name}\t{value}", file=self.output_file)
+
+
+def scan_gtf(gtf_file: str, sinks: Sequence, progress: bool = False, cache: Optional[CdsCache] = None) -> int:
+    """
+    GTF의 CDS 레코드를 한 번 읽으면서 모든 sink에 넘겨줍니다.
+
+    Args:
+        cache: 지정하면 파싱된 CDS 테이블 캐시를 사용 (GTF가 바뀌지 않았으면 재파싱 생략)
+
+    Returns:
+        읽은 CDS 레코드 수
+    """
+    adders = [sink.add for sink in sinks]
+    record_count = 0
+
+    if cache is not None:
+        records = cache.records(gtf_file, progress=progress)
+    else:
+        records = iter_gtf_features(gtf_file, CDS_KEYS, progress=progress)
+
+    for record in records:
+        record_count += 1
+        for add in adders:
+            add(record)
+
+    for sink in sinks:
+        sink.close()
+
+    return record_count
+
+
+def read_cds_table(cds_table_file: str) -> Dict[str, List[Tuple]]:
+    """
+    CdsTableSink가 만든 CDS 좌표 테이블을 읽어 extract_cds_regions()와 같은 dict로 돌려줍니다.
+    Parquet/Arrow로 저장한 테이블이면 앞의 7개 컬럼을 바로 읽습니다.
+    """
+    cds_regions = {}
+
+    for chrom, start, end, strand, frame, transcript_id, protein_id in _iter_cds_table_rows(cds_table_file):
+        if transcript_id not in cds_regions:
+            cds_regions[transcript_id] = []
+
+        cds_regions[transcript_id].append((chrom, int(start) - 1, int(end), strand, int(frame), protein_id))
+
+    return cds_regions
+
+
+def read_cds_table_records(cds_table_file: str) -> Iterator[GtfRecord]:
+    """CDS 좌표 테이블 → iter_gtf_features(gtf, CDS_KEYS)와 같은 형식의 레코드 (product는 None)."""
+    rows = _iter_cds_table_rows(cds_table_file, 8)
+    for chrom, start, end, strand, frame, transcript_id, protein_id, gene_id in rows:
+        yield chrom, int(start) - 1, int(end), strand, int(frame), (gene_id or None, transcript_id, protein_id, None)
+
+
+def _iter_cds_table_rows(cds_table_file: str, column_count: int = 7):
+    if detect_table_format(cds_table_file) is not None:
+        yield from zip(*read_column_lists(cds_table_file, range(column_count)))
+        return
+
+    with open_input(cds_table_file) as f:
+        # 헤더 스킵
+        next(f, None)
+        for line in f:
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) >= 7:
+                # gene_id 컬럼은 없을 수 있음
+                yield (cols + [""] * column_count)[:column_count]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="GTF 파일을 한 번 읽어서 LOC 매핑, CDS 좌표 테이블, 통계를 동시에 생성합니다.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+예시:
+  cd scripts
+  python gtf_scan.py \\
+    --loc-map ../intermediate/loc_protein_map.tsv \\
+    --cds-table ../intermediate/cds_table.tsv \\
+    --stats ../intermediate/gtf_stats.tsv
+
+  # CDS 좌표 테이블로 단백질 번역 (GTF 재파싱 없음)
+  python extract_proteins_from_gtf.py --cds-table ../intermediate/cds_table.tsv -o ../intermediate/proteins.fasta
+        """
+    )
+
+    parser.add_argument(
+        "gtf_file",
+        metavar="GTF_FILE",
+        nargs='?',
+        default=os.path.join(DATA_DIR, 'annotation.gtf'),
+        help="입력 GTF 파일 경로 (기본값: data/annotation.gtf)"
+    )
+
+    parser.add_argument(
+        "--loc-map",
+        metavar="OUTPUT",
+        help="LOC → protein_id 매핑 TSV 출력 경로"
+    )
+
+    parser.add_argument(
+        "--cds-table",
+        metavar="OUTPUT",
+        help="CDS 좌표 테이블 TSV 출력 경로"
+    )
+
+    parser.add_argument(
+        "--stats",
+        metavar="OUTPUT",
+        help="통계 TSV 출력 경로 (gene/transcript/protein 수 등)"
+    )
+
+    add_cache_arguments(parser)
+
+    args = parser.parse_args()
+
+    if not (args.loc_map or args.cds_table or args.stats):
+        parser.error("at least one of --loc-map, --cds-table, --stats is required")
+
+    with ExitStack() as stack:
+        sinks = []
+        if args.loc_map:
+            sinks.append(LocProteinMapSink(stack.enter_context(open_output(args.loc_map, background=True))))
+        if args.cds_table:
+            sinks.append(CdsTableSink(stack.enter_context(open_output(args.cds_table, background=True))))
+        stats_sink = GtfStatsSink(stack.enter_context(open_output(args.stats)) if args.stats else None)
+        sinks.append(stats_sink)
+
+        print(f"Scanning GTF from {args.gtf_file}...", file=sys.stderr)
+        try:
+            record_count = scan_gtf(args.gtf_file, sinks, progress=True, cache=cache_from_args(args))
+        except (IOError, ValueError) as e:
+            print(f"Error reading GTF file: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    stats = stats_sink.stats()
+    print(f"Scanned {record_count:,} CDS records "
+          f"({stats['genes']:,} genes, {stats['transcripts']:,} transcripts, {stats['proteins']:,} proteins)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
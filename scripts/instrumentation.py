@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+단계(phase)별 실행 측정 - wall/CPU 시간, 처리량(records/s, bytes/s), 최대 RSS.
+
+스크립트 main()에서 instrument_from_args()로 측정을 켜고, 함수 안에서는 phase()로 구간을 감쌉니다.
+측정이 켜져 있지 않으면 (라이브러리로 import해서 쓰는 경우 등) phase()는 아무것도 기록하지 않습니다.
+
+  with phase("parse", nbytes=os.path.getsize(gtf_file)) as p:
+      cds_regions = ...
+      p.records = len(cds_regions)
+
+  # main()
+  add_metrics_arguments(parser)
+  args = parser.parse_args()
+  with instrument_from_args(args, "extract_proteins_from_gtf"):
+      ...
+
+옵션:
+  --metrics-json FILE    phase별 측정값을 JSON으로 저장
+  --profile FILE         cProfile 결과(.prof, pstats/snakeviz 등으로 열기) 저장 + 상위 함수 stderr 출력
+  --profile-sample FILE  sampling profiler 결과를 folded stack 형식으로 저장 (flamegraph.pl, speedscope)
+"""
+
+import os
+import sys
+import json
+import time
+import cProfile
+import pstats
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# sampling profiler 기본 간격 (초)
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+# --profile일 때 stderr로 출력할 함수 수
+PROFILE_TOP_FUNCTIONS = 25
+
+
+def cpu_seconds() -> float:
+    """이 프로세스와 종료된 자식 프로세스(worker pool 등)의 user + system CPU 시간."""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def peak_rss_mb(children: bool = False) -> Optional[float]:
+    """최대 RSS (MB). children이면 종료된 자식 프로세스 중 최댓값."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # Linux는 KB, macOS는 byte 단위
+    return round(usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def input_bytes(path: Optional[str]) -> int:
+    """입력 파일 크기 (bytes/s 계산용). stdin이거나 파일이 없으면 0."""
+    try:
+        return os.path.getsize(path) if path and path != "-" else 0
+    except OSError:
+        return 0
+
+
+class Phase:
+    """phase 하나의 측정값. records/bytes는 phase 안에서 채웁니다."""
+
+    __slots__ = ("name", "records", "bytes", "wall_seconds", "cpu_seconds", "peak_rss_mb")
+
+    def __init__(self, name: str, records: int = 0, nbytes: int = 0):
+        self.name = name
+        self.records = records
+        self.bytes = nbytes
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_rss_mb = None
+
+    def to_dict(self) -> Dict:
+        wall = self.wall_seconds
+        return {
+            "name": self.name,
+            "wall_seconds": round(wall, 4),
+            "cpu_seconds": round(self.cpu_seconds, 4),
+            "records": self.records,
+            "bytes": self.bytes,
+            "records_per_second": round(self.records / wall, 1) if wall > 0 and self.records else None,
+            "bytes_per_second": round(self.bytes / wall, 1) if wall > 0 and self.bytes else None,
+            "peak_rss_mb": self.peak_rss_mb,
+        }
+
+
+class Metrics:
+    """스크립트 한 번 실행의 phase 목록."""
+
+    def __init__(self, script: str):
+        self.script = script
+        self.phases: List[Phase] = []
+        self.started = time.strftime("%Y-%m-%d %H:%M:%S")
+        self._wall_start = time.perf_counter()
+        self._cpu_start = cpu_seconds()
+
+    @contextmanager
+    def phase(self, name: str, records: int = 0, nbytes: int = 0) -> Iterator[Phase]:
+        current = Phase(name, records, nbytes)
+        wall_start = time.perf_counter()
+        cpu_start = cpu_seconds()
+        try:
+            yield current
+        finally:
+            current.wall_seconds = time.perf_counter() - wall_start
+            current.cpu_seconds = cpu_seconds() - cpu_start
+            current.peak_rss_mb = peak_rss_mb()
+            self.phases.append(current)
+
+    def to_dict(self, status: str = "ok") -> Dict:
+        return {
+            "script": self.script,
+            "argv": sys.argv[1:],
+            "started": self.started,
+            "status": status,
+            "wall_seconds": round(time.perf_counter() - self._wall_start, 4),
+            "cpu_seconds": round(cpu_seconds() - self._cpu_start, 4),
+            "peak_rss_mb": peak_rss_mb(),
+            "children_peak_rss_mb": peak_rss_mb(children=True),
+            "phases": [p.to_dict() for p in self.phases],
+        }
+
+    def write_json(self, path: str, status: str = "ok"):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(status), f, indent=2)
+        os.replace(tmp_path, path)
+
+
+class SamplingProfiler:
+    """
+    main thread의 call stack을 일정 간격으로 기록하는 sampling profiler.
+    cProfile보다 부하가 작아 실제 규모의 입력에서도 쓸 수 있습니다.
+    결과는 folded stack 형식 ("바깥;...;안쪽 횟수") - flamegraph.pl, speedscope로 시각화.
+    """
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._target = threading.main_thread().ident
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write_folded(self, path: str):
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+# instrument_from_args() 안에서만 설정됨 (None이면 phase()는 기록하지 않음)
+_current: Optional[Metrics] = None
+
+
+@contextmanager
+def _untracked_phase(name: str, records: int = 0, nbytes: int = 0) -> Iterator[Phase]:
+    yield Phase(name, records, nbytes)
+
+
+def phase(name: str, records: int = 0, nbytes: int = 0):
+    """현재 측정(instrument_from_args)에 phase를 기록하는 context manager."""
+    if _current is None:
+        return _untracked_phase(name, records, nbytes)
+    return _current.phase(name, records, nbytes)
+
+
+def add_metrics_arguments(parser):
+    """--metrics-json / --profile / --profile-sample 옵션 추가 (스크립트 공용)."""
+    parser.add_argument(
+        "--metrics-json",
+        metavar="FILE",
+        help="phase별 시간/처리량/최대 메모리를 JSON으로 저장"
+    )
+
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        help="cProfile 결과(.prof) 저장 (상위 함수는 stderr로 출력)"
+    )
+
+    parser.add_argument(
+        "--profile-sample",
+        metavar="FILE",
+        help="sampling profiler 결과를 folded stack 형식으로 저장 (flamegraph용)"
+    )
+
+
+@contextmanager
+def instrument_from_args(args, script: str) -> Iterator[Metrics]:
+    """
+    add_metrics_arguments()로 받은 옵션에 따라 측정/profiling을 켭니다.
+    sys.exit()나 예외로 끝나도 그때까지의 측정값을 저장합니다 (status에 기록).
+    """
+    global _current
+    metrics = Metrics(script)
+    previous, _current = _current, metrics
+
+    profiler = cProfile.Profile() if args.profile else None
+    sampler = SamplingProfiler() if args.profile_sample else None
+    if sampler is not None:
+        sampler.start()
+    if profiler is not None:
+        profiler.enable()
+
+    status = "ok"
+    try:
+        yield metrics
+    except SystemExit as e:
+        status = "ok" if e.code in (None, 0) else f"exit {e.code}"
+        raise
+    except KeyboardInterrupt:
+        status = "interrupted"
+        raise
+    except BaseException as e:
+        status = f"error: {type(e).__name__}"
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        if sampler is not None:
+            sampler.stop()
+            sampler.write_folded(args.profile_sample)
+            print(f"Sampled {sum(sampler.samples.values())} stacks to {args.profile_sample}", file=sys.stderr)
+        if profiler is not None:
+            profiler.dump_stats(args.profile)
+            print(f"\nProfile saved to {args.profile}", file=sys.stderr)
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+        if args.metrics_json:
+            metrics.write_json(args.metrics_json, status)
+            print(f"Metrics saved to {args.metrics_json}", file=sys.stderr)
+        _current = previous
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+출력 파일 공용 writer (open_input()의 출력 쪽 짝).
+
+모든 스크립트의 출력(FASTA, TSV)은 open_output()으로 엽니다.
+
+  - 줄마다 write하지 않고 큰 buffer(기본 1 MB)에 모았다가 한 번에 씀
+  - 임시 파일에 쓰고 정상 종료했을 때만 최종 경로로 rename
+    → 중간에 실패해도 반쯤 쓰인 중간 파일이 남지 않음 (기존 파일도 그대로 유지)
+  - 경로가 .gz로 끝나면 gzip으로 압축
+  - background=True이면 압축과 디스크 쓰기를 별도 thread에서 처리
+  - 경로가 .parquet/.arrow 등이면 같은 TSV 줄을 받아 컬럼 형식으로 저장 (table_io.TableOutput)
+
+  with open_output("proteins.fasta") as out:
+      out.write_fasta("XP_000001.1", seq)
+      print("...", file=out)          # 일반 file object처럼 print()도 사용 가능
+"""
+
+import os
+import sys
+import zlib
+import queue
+import threading
+from typing import Iterable, Optional, Sequence
+
+from table_io import TableOutput, table_format
+
+DEFAULT_BUFFER_SIZE = 1 << 20
+FASTA_LINE_WIDTH = 80
+
+
+def format_fasta(seq_id: str, seq: str, width: int = FASTA_LINE_WIDTH) -> str:
+    """서열 하나를 FASTA 레코드 문자열로 (width자씩 줄바꿈, 마지막 줄바꿈 포함)."""
+    lines = [seq[i:i + width] for i in range(0, len(seq), width)]
+    lines.insert(0, ">" + seq_id)
+    lines.append("")
+    return "\n".join(lines)
+
+
+class BufferedOutput:
+    """
+    buffer + 원자적 rename + 선택적 gzip/background 쓰기를 하는 텍스트 출력.
+
+    path가 None 또는 "-"이면 stdout에 씁니다 (이 경우 rename 없음).
+    """
+
+    def __init__(self, path: Optional[str] = None, buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 compress: Optional[bool] = None, background: bool = False):
+        if path == "-":
+            path = None
+        self.name = path if path is not None else "<stdout>"
+        self.path = path
+        self.closed = False
+        self._buffer_size = buffer_size
+        # stdout에 buffer 없이 쓰면 (--streaming) 줄마다 바로 읽는 쪽에 전달되도록 매번 flush
+        self._flush_each = path is None and buffer_size == 0
+        self._parts = []
+        self._size = 0
+
+        if path is None:
+            sys.stdout.flush()
+            self._raw = sys.stdout.buffer
+            self._tmp_path = None
+        else:
+            self._tmp_path = f"{path}.{os.getpid()}.tmp"
+            self._raw = open(self._tmp_path, "wb")
+
+        if compress is None:
+            compress = path is not None and path.endswith(".gz")
+        # wbits=31: gzip 헤더/트레일러 포함 (gzip/zcat으로 읽을 수 있음)
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+        self._queue = None
+        self._thread = None
+        self._error: Optional[BaseException] = None
+        if background:
+            self._queue = queue.Queue(maxsize=8)
+            self._thread = threading.Thread(target=self._write_loop, daemon=True)
+            self._thread.start()
+
+    # --- file object 호환 ---
+
+    def write(self, text: str) -> int:
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self._buffer_size:
+            self._flush_buffer()
+        return len(text)
+
+    def writelines(self, lines: Iterable[str]):
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        """buffer의 내용을 내보냅니다 (background 모드에서는 쓰기 thread에 넘기기만 함)."""
+        self._flush_buffer()
+
+    def writable(self) -> bool:
+        return True
+
+    # --- 대량 출력 ---
+
+    def write_fasta(self, seq_id: str, seq: str, width: int = FASTA_LINE_WIDTH):
+        """FASTA 레코드 하나 출력."""
+        self.write(format_fasta(seq_id, seq, width))
+
+    def write_rows(self, rows: Iterable[Sequence]):
+        """TSV 행 여러 개를 한 번에 출력 (각 값은 str()로 변환)."""
+        self.write("".join("\t".join(map(str, row)) + "\n" for row in rows))
+
+    # --- 내부 처리 ---
+
+    def _flush_buffer(self):
+        if not self._parts:
+            return
+        data = "".join(self._parts).encode("utf-8")
+        self._parts = []
+        self._size = 0
+
+        if self._queue is None:
+            self._write_bytes(data)
+            return
+
+        if self._error is not None:
+            raise self._error
+        self._queue.put(data)
+
+    def _write_bytes(self, data: bytes):
+        if self._compressor is not None:
+            data = self._compressor.compress(data)
+            if self._flush_each:
+                data += self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            self._raw.write(data)
+        if self._flush_each:
+            self._raw.flush()
+
+    def _write_loop(self):
+        while True:
+            data = self._queue.get()
+            if data is None:
+                return
+            if self._error is not None:
+                continue  # 에러 이후에는 남은 데이터를 버리기만 함 (producer가 막히지 않도록)
+            try:
+                self._write_bytes(data)
+            except BaseException as e:
+                self._error = e
+
+    def _stop_thread(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    # --- 종료 ---
+
+    def close(self):
+        """남은 buffer를 쓰고, 임시 파일을 최종 경로로 rename합니다."""
+        if self.closed:
+            return
+        try:
+            self._flush_buffer()
+            self._stop_thread()
+            if self._error is not None:
+                raise self._error
+            if self._compressor is not None:
+                self._raw.write(self._compressor.flush())
+        except BaseException:
+            self.abort()
+            raise
+
+        self.closed = True
+        if self._tmp_path is None:
+            self._raw.flush()
+            return
+        self._raw.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """지금까지 쓴 내용을 버립니다 (최종 경로의 기존 파일은 건드리지 않음)."""
+        if self.closed:
+            return
+        self.closed = True
+        self._parts = []
+        self._stop_thread()
+        if self._tmp_path is None:
+            self._raw.flush()
+            return
+        self._raw.close()
+        try:
+            os.remove(self._tmp_path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def open_output(path: Optional[str] = None, background: bool = False,
+                columns: Optional[Sequence[str]] = None, **kwargs):
+    """
+    출력 파일을 엽니다 (with 문으로 사용).
+
+    Args:
+        path: 출력 경로 (None 또는 "-"이면 stdout, .gz로 끝나면 gzip 압축,
+              .parquet/.arrow/.feather/.ipc이면 Parquet/Arrow IPC - pyarrow 필요)
+        background: 압축/디스크 쓰기를 별도 thread에서 처리 (TSV 출력만)
+        columns: Parquet/Arrow 출력의 컬럼 이름 (header 없는 TSV를 쓸 때만 지정)
+    """
+    if table_format(path) is not None:
+        return TableOutput(path, columns=columns)
+    return BufferedOutput(path, background=background, **kwargs)
@@ -0,0 +1,637 @@
+#!/usr/bin/env python3
+"""
+전체 파이프라인을 make처럼 실행합니다 (바뀐 단계만 다시 실행).
+
+각 단계가 읽는 파일(inputs)과 만드는 파일(outputs)을 선언해 두고, 실행이 끝날 때마다
+입력/출력 파일 내용 hash와 명령(설정)을 run manifest(intermediate/pipeline_manifest.json)에 기록합니다.
+다음 실행에서는 입력 hash, 명령, 출력 hash가 모두 기록과 같은 단계를 건너뜁니다.
+
+  gtf_scan ─┬─ translate ── query ── [dedup] ── blastp ── map
+            └──────────────────────────────────────────────┘
+  symbol_map ────────────────────────────────────────────┘
+  makeblastdb ─────────────────────────────── blastp
+
+- 서로 의존하지 않는 단계는 동시에 실행 (예: GTF 파싱 중에 symbol 매핑/BLAST DB 생성)
+- 파일 hash는 (크기, mtime)이 같으면 manifest에 기록된 값을 재사용 → 큰 genome을 매번 읽지 않음
+- 스크립트 파일과 스크립트가 import하는 scripts/ 모듈도 입력으로 취급 → 고치면 그 단계부터 다시 실행
+- --min-identity만 바꿔 다시 실행하면 map 단계만 실행
+- symbol_map은 매핑 파일이 없을 때만 생성 (이미 있는 파일은 --rebuild-symbol-map일 때만 덮어씀)
+
+  python pipeline.py --docker
+  python pipeline.py --docker --min-identity 40     # map만 다시 실행
+"""
+
+import sys
+import ast
+import json
+import time
+import shlex
+import argparse
+import os
+import subprocess
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from cds_cache import file_digest
+from run_blastp import BLAST_DB_DIR, DOCKER_IMAGE, docker_prefix
+
+# 스크립트 기본 경로 설정
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
+INTERMEDIATE_DIR = os.path.join(PROJECT_ROOT, 'intermediate')
+RESULTS_DIR = os.path.join(PROJECT_ROOT, 'results')
+
+MANIFEST_FILE = os.path.join(INTERMEDIATE_DIR, 'pipeline_manifest.json')
+
+# makeblastdb가 항상 만드는 파일 (버전에 따라 추가 파일이 더 생김)
+BLAST_DB_EXTENSIONS = (".pin", ".phr", ".psq")
+
+# 실패 시 출력할 log 마지막 줄 수
+LOG_TAIL_LINES = 20
+
+# 명령의 첫 항목이 PYTHON이면 현재 인터프리터로 실행 (manifest에는 "python"으로 기록)
+PYTHON = "python"
+
+
+class Stage(NamedTuple):
+    """
+    파이프라인 단계.
+
+    command: 실행할 명령 (manifest에 기록되며, 바뀌면 다시 실행)
+    runtime_args: 결과에 영향을 주지 않는 실행 옵션 (병렬 수 등, 바뀌어도 다시 실행하지 않음)
+    """
+    name: str
+    command: List[str]
+    inputs: List[str]
+    outputs: List[str]
+    runtime_args: List[str] = []
+
+
+def local_modules(script_path: str) -> List[str]:
+    """
+    스크립트가 (간접적으로라도) import하는 scripts/ 아래 모듈 파일 목록 (스크립트 자신 제외, 정렬).
+    함수 안의 import와 importlib.import_module("...")도 포함합니다.
+    """
+    found: Set[str] = set()
+    pending = [script_path]
+    while pending:
+        path = pending.pop()
+        with open(path, "rb") as f:
+            tree = ast.parse(f.read(), filename=path)
+
+        names = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names += [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names.append(node.module)
+            elif (isinstance(node, ast.Call) and getattr(node.func, "attr", None) == "import_module"
+                  and node.args and isinstance(node.args[0], ast.Constant)
+                  and isinstance(node.args[0].value, str)):
+                names.append(node.args[0].value)
+
+        for name in names:
+            module_path = os.path.join(SCRIPT_DIR, name.split(".")[0] + ".py")
+            if module_path != script_path and module_path not in found and os.path.exists(module_path):
+                found.add(module_path)
+                pending.append(module_path)
+
+    return sorted(found)
+
+
+def python_stage(name: str, script: str, args: List[str], inputs: List[str], outputs: List[str],
+                 runtime_args: Optional[List[str]] = None) -> Stage:
+    """
+    scripts/ 아래 Python 스크립트를 실행하는 단계.
+    스크립트 파일과 스크립트가 import하는 scripts/ 모듈(gtf_reader.py 등)도 입력에 포함합니다.
+    """
+    script_path = os.path.join(SCRIPT_DIR, script)
+    return Stage(name, [PYTHON, script_path] + args, inputs + [script_path] + local_modules(script_path),
+                 outputs, runtime_args or [])
+
+
+def build_stages(args) -> List[Stage]:
+    """명령행 설정으로 단계 목록을 만듭니다 (의존 관계는 inputs/outputs로 결정)."""
+    intermediate = args.intermediate_dir
+    loc_map = os.path.join(intermediate, 'loc_protein_map.tsv')
+    cds_table = os.path.join(intermediate, 'cds_table.tsv')
+    proteins = os.path.join(intermediate, 'proteins.fasta')
+    query = os.path.join(intermediate, 'shrimp_query.fasta')
+    symbol_map = os.path.join(intermediate, 'human_symbol_map_uniprot.tsv')
+    blast_results = os.path.join(intermediate, 'blast_results_complete.txt')
+    db_files = [args.db + ext for ext in BLAST_DB_EXTENSIONS]
+
+    stages = [
+        python_stage("gtf_scan", "gtf_scan.py",
+                     [args.gtf, "--loc-map", loc_map, "--cds-table", cds_table],
+                     [args.gtf], [loc_map, cds_table]),
+        python_stage("translate", "extract_proteins_from_gtf.py",
+                     [args.gtf, args.genome, "--cds-table", cds_table, "-o", proteins],
+                     [cds_table, args.genome], [proteins]),
+        python_stage("query", "2_extract_proteins.py",
+                     [proteins, loc_map, "-c", "1", "-o", query],
+                     [proteins, loc_map], [query]),
+    ]
+
+    # 이미 있는 symbol 매핑(직접 만든 파일 포함)은 덮어쓰지 않고 map 단계의 입력으로만 사용
+    if args.rebuild_symbol_map or "symbol_map" in args.force or not os.path.exists(symbol_map):
+        symbol_args = [args.reference, "-o", symbol_map] + (["--gene-name"] if args.symbol_gene_name else [])
+        stages.append(python_stage("symbol_map", "build_symbol_map.py", symbol_args,
+                                   [args.reference], [symbol_map]))
+
+    makeblastdb = ["makeblastdb", "-in", args.reference, "-dbtype", "prot", "-out", args.db]
+    if args.docker:
+        mount_dirs = [os.path.dirname(os.path.abspath(args.reference)), os.path.dirname(os.path.abspath(args.db))]
+        makeblastdb = shlex.split(docker_prefix(args.docker, mount_dirs)) + makeblastdb
+    elif args.makeblastdb_command:
+        makeblastdb = shlex.split(args.makeblastdb_command.format(reference=args.reference, db=args.db))
+    stages.append(Stage("makeblastdb", makeblastdb, [args.reference], db_files))
+
+    blast_query = query
+    map_args = []
+    map_inputs = []
+    if args.dedup:
+        blast_query = os.path.join(intermediate, 'shrimp_query.dedup.fasta')
+        members = os.path.join(intermediate, 'dedup_members.tsv')
+        stages.append(python_stage("dedup", "dedup_proteins.py",
+                                   [query, "-o", blast_query, "-m", members],
+                                   [query], [blast_query, members]))
+        map_args = ["--dedup-members", members]
+        map_inputs = [members]
+
+    blast_args = ["-q", blast_query, "-d", args.db, "-o", blast_results,
+                  "--evalue", args.evalue, "--max-target-seqs", str(args.max_target_seqs)]
+    if args.docker:
+        blast_args += ["--docker", args.docker]
+    elif args.blast_command:
+        blast_args += ["--command", args.blast_command]
+    runtime_args = ["-j", str(args.jobs)] if args.jobs else []
+    stages.append(python_stage("blastp", "run_blastp.py", blast_args,
+                               [blast_query] + db_files, [blast_results], runtime_args))
+
+    stages.append(python_stage("map", "5_map_blast_to_symbol.py",
+                               ["-l", loc_map, "-b", blast_results, "-a", symbol_map, "-o", args.output,
+                                "--min-identity", str(args.min_identity),
+                                "--min-coverage", str(args.min_coverage),
+                                "-k", str(args.top_hits)] + map_args,
+                               [loc_map, blast_results, symbol_map] + map_inputs, [args.output]))
+    return stages
+
+
+def stage_dependencies(stages: List[Stage]) -> Dict[str, Set[str]]:
+    """단계 이름 → 그 단계의 입력을 만드는 단계 이름들."""
+    producers = {os.path.abspath(path): stage.name for stage in stages for path in stage.outputs}
+    return {stage.name: {producers[os.path.abspath(path)] for path in stage.inputs
+                         if os.path.abspath(path) in producers}
+            for stage in stages}
+
+
+def select_stages(stages: List[Stage], dependencies: Dict[str, Set[str]], until: str) -> List[Stage]:
+    """until 단계와 그 상위 단계만 남깁니다."""
+    needed = set()
+    pending = [until]
+    while pending:
+        name = pending.pop()
+        if name not in needed:
+            needed.add(name)
+            pending.extend(dependencies[name])
+    return [stage for stage in stages if stage.name in needed]
+
+
+class RunManifest:
+    """
+    단계별 마지막 성공 실행 기록 (JSON).
+
+    stages:   단계 이름 → {"command", "inputs": {경로: hash}, "outputs": {경로: hash}, "finished", "seconds"}
+    files:    경로 → {"size", "mtime_ns", "digest"} (hash 재계산을 피하기 위한 memo)
+    last_run: 마지막 실행의 단계별 상태/시간
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        previous = self._load() or {}
+        self.stages: Dict[str, Dict] = previous.get("stages", {})
+        self.files: Dict[str, Dict] = previous.get("files", {})
+        self.last_run: Dict = {}
+
+    def _load(self) -> Optional[Dict]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            return None
+
+    def save(self):
+        with self.lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"stages": self.stages, "files": self.files, "last_run": self.last_run},
+                          f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def digest(self, path: str) -> Optional[str]:
+        """파일 내용 hash. 파일이 없으면 None, (크기, mtime)이 기록과 같으면 기록된 hash."""
+        path = os.path.abspath(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+
+        with self.lock:
+            memo = self.files.get(path)
+        if memo and memo["size"] == st.st_size and memo["mtime_ns"] == st.st_mtime_ns:
+            return memo["digest"]
+
+        digest = file_digest(path)
+        with self.lock:
+            self.files[path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "digest": digest}
+        return digest
+
+    def digests(self, paths: List[str]) -> Dict[str, Optional[str]]:
+        return {os.path.abspath(path): self.digest(path) for path in paths}
+
+    def outdated_reason(self, stage: Stage) -> Optional[str]:
+        """다시 실행해야 하는 이유 (최신이면 None)."""
+        record = self.stages.get(stage.name)
+        if record is None:
+            return "no previous run"
+        if record.get("command") != stage.command:
+            return "command changed"
+
+        for path, digest in self.digests(stage.inputs).items():
+            if digest is None:
+                return f"missing input {path}"
+            if record["inputs"].get(path) != digest:
+                return f"input changed: {os.path.basename(path)}"
+
+        for path, digest in self.digests(stage.outputs).items():
+            if digest is None:
+                return f"missing output {os.path.basename(path)}"
+            if record["outputs"].get(path) != digest:
+                return f"output modified: {os.path.basename(path)}"
+        return None
+
+    def record(self, stage: Stage, input_digests: Dict[str, Optional[str]], seconds: float):
+        """성공한 실행을 기록합니다 (입력 hash는 실행 전에 계산한 값)."""
+        output_digests = self.digests(stage.outputs)
+        with self.lock:
+            self.stages[stage.name] = {
+                "command": stage.command,
+                "inputs": input_digests,
+                "outputs": output_digests,
+                "finished": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "seconds": round(seconds, 1),
+            }
+
+
+def print_log_tail(log_file: str, lines: int = LOG_TAIL_LINES):
+    try:
+        with open(log_file, errors="replace") as f:
+            tail = f.readlines()[-lines:]
+    except IOError:
+        return
+    for line in tail:
+        print(f"    {line.rstrip()}", file=sys.stderr)
+
+
+def run_stage(stage: Stage, manifest: RunManifest, log_dir: str) -> float:
+    """
+    단계 하나를 실행하고 manifest에 기록합니다. stdout/stderr는 <log_dir>/<단계>.log로 저장합니다.
+
+    Returns:
+        실행 시간(초)
+
+    Raises:
+        RuntimeError: 입력 파일이 없거나, 명령이 실패했거나, 출력 파일이 만들어지지 않음
+    """
+    input_digests = manifest.digests(stage.inputs)
+    missing = [path for path, digest in input_digests.items() if digest is None]
+    if missing:
+        raise RuntimeError(f"missing input {missing[0]}")
+
+    for path in stage.outputs:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    os.makedirs(log_dir, exist_ok=True)
+    log_file = os.path.join(log_dir, stage.name + ".log")
+
+    command = stage.command + stage.runtime_args
+    if command[0] == PYTHON:
+        command = [sys.executable] + command[1:]
+
+    start = time.time()
+    with open(log_file, "w") as log:
+        print(f"# {' '.join(shlex.quote(c) for c in command)}", file=log, flush=True)
+        try:
+            result = subprocess.run(command, stdout=log, stderr=subprocess.STDOUT)
+        except OSError as e:
+            raise RuntimeError(f"cannot run {command[0]}: {e}")
+    seconds = time.time() - start
+
+    if result.returncode != 0:
+        print(f"Error: {stage.name} failed (exit code {result.returncode}), see {log_file}", file=sys.stderr)
+        print_log_tail(log_file)
+        raise RuntimeError(f"exit code {result.returncode}")
+
+    missing = [path for path in stage.outputs if not os.path.exists(path)]
+    if missing:
+        raise RuntimeError(f"output not created: {missing[0]}")
+
+    manifest.record(stage, input_digests, seconds)
+    return seconds
+
+
+def run_pipeline(stages: List[Stage], manifest: RunManifest, jobs: int, log_dir: str,
+                 force: Tuple[str, ...] = (), dry_run: bool = False) -> bool:
+    """
+    의존 관계 순서대로 단계를 실행합니다. 준비된 단계는 최대 jobs개까지 동시에 실행합니다.
+    단계가 실패하면 그 하위 단계는 실행하지 않고, 관계없는 단계는 계속 실행합니다.
+
+    Returns:
+        모든 단계가 성공(또는 최신)이면 True
+    """
+    dependencies = stage_dependencies(stages)
+    by_name = {stage.name: stage for stage in stages}
+    status: Dict[str, str] = {}
+    seconds: Dict[str, float] = {}
+    rerun: Set[str] = set()
+    started = time.strftime("%Y-%m-%d %H:%M:%S")
+
+    def check(stage: Stage) -> Optional[str]:
+        if "all" in force or stage.name in force:
+            return "forced"
+        # 실제 실행에서는 상위 단계를 다시 실행해도 출력 내용이 같으면 건너뜀 (입력 hash로 판단)
+        upstream = dependencies[stage.name] & rerun
+        if dry_run and upstream:
+            return f"upstream {', '.join(sorted(upstream))} would run"
+        return manifest.outdated_reason(stage)
+
+    def execute(stage: Stage) -> Tuple[str, float]:
+        reason = check(stage)
+        if reason is None:
+            return "up-to-date", 0.0
+        if dry_run:
+            print(f"[{stage.name}] would run ({reason})", file=sys.stderr)
+            return "would run", 0.0
+        print(f"[{stage.name}] running ({reason})", file=sys.stderr)
+        return "done", run_stage(stage, manifest, log_dir)
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        running = {}
+        while True:
+            for stage in stages:
+                if stage.name in status or stage.name in running.values():
+                    continue
+                deps = dependencies[stage.name]
+                if any(status.get(dep) in ("failed", "blocked") for dep in deps):
+                    status[stage.name] = "blocked"
+                    print(f"[{stage.name}] skipped (upstream failed)", file=sys.stderr)
+                elif all(dep in status for dep in deps):
+                    running[executor.submit(execute, stage)] = stage.name
+
+            if not running:
+                if len(status) == len(stages):
+                    break
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    status[name], seconds[name] = future.result()
+                except RuntimeError as e:
+                    status[name] = "failed"
+                    print(f"[{name}] failed: {e}", file=sys.stderr)
+                    continue
+
+                if status[name] == "up-to-date":
+                    print(f"[{name}] up to date", file=sys.stderr)
+                else:
+                    rerun.add(name)
+                    if status[name] == "done":
+                        print(f"[{name}] done in {seconds[name]:.1f}s", file=sys.stderr)
+                        manifest.save()
+
+    if not dry_run:
+        manifest.last_run = {
+            "started": started,
+            "finished": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "stages": {name: {"status": status[name], "seconds": round(seconds.get(name, 0.0), 1)}
+                       for name in by_name},
+        }
+        manifest.save()
+
+    return all(s in ("done", "up-to-date", "would run") for s in status.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="전체 파이프라인을 실행합니다 (입력 hash와 설정이 바뀐 단계만 다시 실행).",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+예시:
+  cd scripts
+  # 전체 실행 (BLAST는 Docker)
+  python pipeline.py --docker
+
+  # threshold만 바꿔 다시 실행 → map 단계만 실행
+  python pipeline.py --docker --min-identity 40
+
+  # 실행할 단계만 확인
+  python pipeline.py --docker --dry-run
+
+  # BLAST 전까지만 실행 / 특정 단계 강제 실행
+  python pipeline.py --until query
+  python pipeline.py --docker --force blastp
+
+단계: gtf_scan, translate, query, dedup(--dedup), symbol_map, makeblastdb, blastp, map
+(symbol_map은 매핑 파일이 없거나 --rebuild-symbol-map일 때만)
+        """
+    )
+
+    parser.add_argument(
+        "--gtf",
+        default=os.path.join(DATA_DIR, 'annotation.gtf'),
+        help="입력 GTF 파일 (기본값: data/annotation.gtf)"
+    )
+
+    parser.add_argument(
+        "--genome",
+        default=os.path.join(DATA_DIR, 'genome.fna'),
+        help="게놈 FASTA 파일 (기본값: data/genome.fna)"
+    )
+
+    parser.add_argument(
+        "--reference",
+        default=os.path.join(INTERMEDIATE_DIR, 'human_complete.fasta'),
+        help="UniProt reference FASTA (기본값: intermediate/human_complete.fasta)"
+    )
+
+    parser.add_argument(
+        "--db",
+        default=os.path.join(BLAST_DB_DIR, 'human_complete'),
+        help="BLAST database 경로 (기본값: blast_db/human_complete)"
+    )
+
+    parser.add_argument(
+        "--intermediate-dir",
+        metavar="DIR",
+        default=INTERMEDIATE_DIR,
+        help="중간 파일 디렉토리 (기본값: intermediate)"
+    )
+
+    parser.add_argument(
+        "-o", "--output",
+        default=os.path.join(RESULTS_DIR, 'final_gene_symbol_map_COMPLETE.tsv'),
+        help="최종 매핑 결과 (기본값: results/final_gene_symbol_map_COMPLETE.tsv)"
+    )
+
+    parser.add_argument(
+        "--min-identity",
+        type=float,
+        default=30.0,
+        metavar="PERCENT",
+        help="최소 identity 퍼센트 (기본값: 30.0)"
+    )
+
+    parser.add_argument(
+        "--min-coverage",
+        type=float,
+        default=30.0,
+        metavar="PERCENT",
+        help="최소 query coverage 퍼센트 (기본값: 30.0)"
+    )
+
+    parser.add_argument(
+        "-k", "--top-hits",
+        type=int,
+        default=1,
+        metavar="K",
+        help="query마다 출력할 hit 수 (기본값: 1)"
+    )
+
+    parser.add_argument(
+        "--evalue",
+        default="1e-5",
+        help="blastp -evalue (기본값: 1e-5)"
+    )
+
+    parser.add_argument(
+        "--max-target-seqs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="blastp -max_target_seqs (기본값: 1)"
+    )
+
+    parser.add_argument(
+        "--rebuild-symbol-map",
+        action="store_true",
+        help="intermediate/human_symbol_map_uniprot.tsv가 이미 있어도 reference FASTA에서 다시 생성 "
+             "(기본값: 없을 때만 생성)"
+    )
+
+    parser.add_argument(
+        "--symbol-gene-name",
+        action="store_true",
+        help="symbol 매핑을 생성할 때 entry name 대신 GN= 값 사용 (build_symbol_map.py --gene-name)"
+    )
+
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="서열이 같은 단백질을 합쳐서 BLAST (dedup_proteins.py)"
+    )
+
+    command_group = parser.add_mutually_exclusive_group()
+    command_group.add_argument(
+        "--docker",
+        nargs="?",
+        const=DOCKER_IMAGE,
+        metavar="IMAGE",
+        help=f"makeblastdb/blastp를 Docker로 실행 (기본 이미지: {DOCKER_IMAGE})"
+    )
+    command_group.add_argument(
+        "--blast-command",
+        metavar="TEMPLATE",
+        help="run_blastp.py --command로 전달할 blastp 명령 template"
+    )
+
+    parser.add_argument(
+        "--makeblastdb-command",
+        metavar="TEMPLATE",
+        help="makeblastdb 대신 실행할 명령 template ({reference} {db} 치환, --docker와 함께 사용 불가)"
+    )
+
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        metavar="N",
+        help="run_blastp.py에 전달할 동시 shard 수 (기본값: run_blastp.py 기본값)"
+    )
+
+    parser.add_argument(
+        "--stage-jobs",
+        type=int,
+        default=3,
+        metavar="N",
+        help="동시에 실행할 단계 수 (기본값: 3)"
+    )
+
+    parser.add_argument(
+        "--force",
+        action="append",
+        default=[],
+        metavar="STAGE",
+        help="최신이어도 다시 실행할 단계 (여러 번 지정 가능, all: 전체)"
+    )
+
+    parser.add_argument(
+        "--until",
+        metavar="STAGE",
+        help="이 단계와 그 상위 단계만 실행"
+    )
+
+    parser.add_argument(
+        "-n", "--dry-run",
+        action="store_true",
+        help="실행하지 않고 다시 실행할 단계만 출력"
+    )
+
+    parser.add_argument(
+        "--manifest",
+        default=MANIFEST_FILE,
+        help="run manifest 경로 (기본값: intermediate/pipeline_manifest.json)"
+    )
+
+    args = parser.parse_args()
+
+    if args.docker and args.makeblastdb_command:
+        parser.error("--makeblastdb-command cannot be combined with --docker")
+    if args.stage_jobs < 1:
+        parser.error("--stage-jobs must be >= 1")
+
+    stages = build_stages(args)
+    names = [stage.name for stage in stages]
+    for name in args.force + ([args.until] if args.until else []):
+        if name not in names and name != "all":
+            parser.error(f"unknown stage: {name} (choose from {', '.join(names)})")
+
+    if args.until:
+        stages = select_stages(stages, stage_dependencies(stages), args.until)
+
+    manifest = RunManifest(args.manifest)
+    start = time.time()
+    ok = run_pipeline(stages, manifest, args.stage_jobs, os.path.join(args.intermediate_dir, 'logs'),
+                      force=tuple(args.force), dry_run=args.dry_run)
+
+    print(f"Pipeline {'finished' if ok else 'failed'} in {time.time() - start:.1f}s", file=sys.stderr)
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""
+Query FASTA를 shard로 나눠 BLASTP를 병렬로 실행하고 결과를 하나로 합칩니다.
+
+  1. query FASTA를 residue 수가 비슷한 N개 shard로 나눔 (2_extract_proteins.py --shards와 같은 방식)
+  2. shard마다 blastp 명령(로컬 binary, Docker, 또는 테스트용 스크립트)을 worker pool에서 실행
+  3. 끝난 shard를 작업 디렉토리의 manifest.json에 기록
+     → 중간에 중단되어도 다시 실행하면 끝나지 않은 shard만 실행
+  4. shard 결과를 shard 순서대로 이어 붙여 5_map_blast_to_symbol.py 입력 파일로 저장
+
+BLAST 결과 캐시(blast_cache.py)를 사용하면 (기본값) 1 전에 모든 query 서열을 캐시에서 찾고,
+캐시에 없는 서열(서열이 같으면 하나만)만 BLAST를 실행한 뒤, 캐시된 hit에 새 protein ID를 붙여
+query FASTA 순서대로 합칩니다. 새 결과는 캐시에 추가됩니다.
+
+각 query는 한 shard에만 들어가므로 합친 결과에서도 query별 hit가 연속으로 나옵니다 (--streaming 가능).
+"""
+
+import sys
+import json
+import time
+import shlex
+import argparse
+import importlib
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from typing import Dict, List, Optional
+
+from blast_cache import BlastCache, group_hits_by_query, rekey_hits, sequence_hash
+from cds_cache import DEFAULT_CACHE_DIR, file_digest
+from fasta_index import iter_fasta
+from output_io import open_output
+
+# 스크립트 기본 경로 설정
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+INTERMEDIATE_DIR = os.path.join(PROJECT_ROOT, 'intermediate')
+BLAST_DB_DIR = os.path.join(PROJECT_ROOT, 'blast_db')
+
+MANIFEST_NAME = "manifest.json"
+
+# {query} {db} {out} {threads} {evalue} {max_target_seqs}는 shard마다 채워짐
+DEFAULT_COMMAND = ("blastp -query {query} -db {db} -out {out} -outfmt 6 "
+                   "-evalue {evalue} -max_target_seqs {max_target_seqs} -num_threads {threads}")
+DOCKER_IMAGE = "ncbi/blast:latest"
+
+
+def docker_prefix(image: str, mount_dirs: List[str]) -> str:
+    """
+    BLAST 명령을 Docker 안에서 실행하기 위한 앞부분 (뒤에 blastp/makeblastdb 명령을 붙여 사용).
+    경로가 컨테이너 안에서도 같도록 필요한 디렉토리를 같은 경로로 mount합니다.
+    """
+    mounts = " ".join(f"-v {shlex.quote(d)}:{shlex.quote(d)}" for d in sorted(set(mount_dirs)))
+    return f"docker run --rm -u {os.getuid()}:{os.getgid()} {mounts} {image}"
+
+
+def docker_command(image: str, mount_dirs: List[str]) -> str:
+    """DEFAULT_COMMAND를 Docker 안에서 실행하는 명령 template."""
+    return f"{docker_prefix(image, mount_dirs)} {DEFAULT_COMMAND}"
+
+
+def shard_name(index: int) -> str:
+    return f"shard_{index:03d}"
+
+
+class Manifest:
+    """
+    작업 디렉토리의 실행 기록 (JSON).
+
+    입력 파일/설정이 같을 때만 이전 기록을 이어서 사용하고, 다르면 처음부터 다시 실행합니다.
+    shard가 끝날 때마다 임시 파일에 쓴 뒤 rename으로 교체하므로, 언제 중단되어도 깨진 manifest가 남지 않습니다.
+    """
+
+    def __init__(self, work_dir: str, settings: Dict):
+        self.path = os.path.join(work_dir, MANIFEST_NAME)
+        self.settings = settings
+        self.completed: Dict[str, Dict] = {}
+        self.sharded = False
+
+        previous = self._load()
+        if previous is not None and previous.get("settings") == settings:
+            self.sharded = previous.get("sharded", False)
+            self.completed = previous.get("completed", {})
+
+    def _load(self) -> Optional[Dict]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            return None
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"settings": self.settings, "sharded": self.sharded, "completed": self.completed},
+                      f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def is_done(self, shard: str, output_file: str) -> bool:
+        return shard in self.completed and os.path.exists(output_file)
+
+    def mark_done(self, shard: str, seconds: float, attempts: int):
+        self.completed[shard] = {"seconds": round(seconds, 1), "attempts": attempts}
+        self.save()
+
+
+def split_query(query_file: str, work_dir: str, shards: int) -> List[str]:
+    """query FASTA를 residue 수 기준으로 균등하게 나눠 shard FASTA 경로 목록을 돌려줍니다."""
+    # 숫자로 시작하는 스크립트 이름이라 importlib로 불러옴
+    extract_proteins = importlib.import_module("2_extract_proteins")
+
+    shard_files = [os.path.join(work_dir, shard_name(i) + ".fasta") for i in range(shards)]
+    with ExitStack() as stack:
+        outputs = [stack.enter_context(open_output(path)) for path in shard_files]
+        extract_proteins.shard_sequences(query_file, outputs)
+    return shard_files
+
+
+def run_shard(command: List[str], output_file: str, retries: int, log_file: str,
+              stop: Optional[threading.Event] = None):
+    """
+    shard 하나를 실행합니다. blastp는 <출력>.part에 쓰고 성공했을 때만 rename합니다.
+    stop이 설정되면 (Ctrl-C 등) 새 시도를 시작하지 않습니다.
+
+    Returns:
+        (실행 시간(초), 시도 횟수)
+
+    Raises:
+        RuntimeError: retries번 재시도 후에도 실패
+    """
+    part_file = output_file + ".part"
+    start = time.time()
+    for attempt in range(1, retries + 2):
+        if stop is not None and stop.is_set():
+            raise RuntimeError(f"{os.path.basename(output_file)} cancelled")
+        with open(log_file, "a") as log:
+            print(f"# attempt {attempt}: {' '.join(shlex.quote(c) for c in command)}", file=log, flush=True)
+            result = subprocess.run(command, stdout=log, stderr=subprocess.STDOUT)
+        if result.returncode == 0 and os.path.exists(part_file):
+            os.replace(part_file, output_file)
+            return time.time() - start, attempt
+        print(f"Warning: {os.path.basename(output_file)} failed (exit code {result.returncode}, "
+              f"attempt {attempt}/{retries + 1}), see {log_file}", file=sys.stderr)
+
+    raise RuntimeError(f"{os.path.basename(output_file)} failed after {retries + 1} attempts")
+
+
+def merge_outputs(output_files: List[str], output_path: str):
+    """shard 결과를 순서대로 이어 붙입니다 (원자적으로 교체)."""
+    with open_output(output_path, background=True) as output:
+        for path in output_files:
+            with open(path) as f:
+                for chunk in iter(lambda: f.read(1 << 20), ""):
+                    output.write(chunk)
+
+
+def run_shards(query_file: str, db: str, work_dir: str, command_template: str, shards: int, jobs: int,
+               threads: int = 1, evalue: str = "1e-5", max_target_seqs: int = 1, retries: int = 2,
+               restart: bool = False) -> List[str]:
+    """
+    query FASTA를 shard로 나눠 blastp를 병렬로 실행합니다 (manifest로 이어서 실행).
+
+    Args:
+        command_template: shard별 명령 ({query} {db} {out} {threads} {evalue} {max_target_seqs} 치환)
+        shards: shard 수 (작업 단위, 재시작도 shard 단위)
+        jobs: 동시에 실행할 shard 수
+        threads: shard 하나의 blastp thread 수 (-num_threads)
+        restart: 이전 manifest를 무시하고 처음부터 실행
+
+    Returns:
+        shard 순서대로의 결과 파일 경로 (실패한 shard가 있으면 종료)
+    """
+    settings = {
+        "query": os.path.abspath(query_file),
+        "query_digest": file_digest(query_file),
+        "db": db,
+        "command": command_template,
+        "shards": shards,
+        "evalue": evalue,
+        "max_target_seqs": max_target_seqs,
+    }
+    manifest = Manifest(work_dir, settings)
+    if restart:
+        manifest.sharded = False
+        manifest.completed = {}
+
+    shard_files = [os.path.join(work_dir, shard_name(i) + ".fasta") for i in range(shards)]
+    output_files = [os.path.join(work_dir, shard_name(i) + ".tsv") for i in range(shards)]
+
+    if not (manifest.sharded and all(os.path.exists(path) for path in shard_files)):
+        print(f"Splitting {query_file} into {shards} shards...", file=sys.stderr)
+        manifest.completed = {}
+        split_query(query_file, work_dir, shards)
+        manifest.sharded = True
+        manifest.save()
+
+    pending = [i for i in range(shards) if not manifest.is_done(shard_name(i), output_files[i])]
+    if len(pending) < shards:
+        print(f"Resuming: {shards - len(pending)}/{shards} shards already done", file=sys.stderr)
+
+    failed = []
+    stop = threading.Event()
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {}
+        for i in pending:
+            if os.path.getsize(shard_files[i]) == 0:
+                # 서열 수가 shard 수보다 적으면 빈 shard가 생김 - blastp 없이 빈 결과로 처리
+                open(output_files[i], "w").close()
+                manifest.mark_done(shard_name(i), 0.0, 0)
+                continue
+            values = {"query": shard_files[i], "db": db, "out": output_files[i] + ".part",
+                      "threads": threads, "evalue": evalue, "max_target_seqs": max_target_seqs}
+            command = [arg.format(**values) for arg in shlex.split(command_template)]
+            log_file = os.path.join(work_dir, shard_name(i) + ".log")
+            futures[executor.submit(run_shard, command, output_files[i], retries, log_file, stop)] = i
+
+        try:
+            for done_count, future in enumerate(as_completed(futures), 1):
+                i = futures[future]
+                try:
+                    seconds, attempts = future.result()
+                except (RuntimeError, OSError) as e:
+                    print(f"Error: {e}", file=sys.stderr)
+                    failed.append(shard_name(i))
+                    continue
+                manifest.mark_done(shard_name(i), seconds, attempts)
+                print(f"  {shard_name(i)} done in {seconds:.1f}s ({done_count}/{len(futures)}, "
+                      f"elapsed {time.time() - start:.0f}s)", file=sys.stderr)
+        except KeyboardInterrupt:
+            # 대기 중인 shard는 시작하지 않음 - 끝난 shard는 manifest에 남아 있으므로 다시 실행하면 이어서 진행
+            stop.set()
+            print("Interrupted; re-run the same command to resume.", file=sys.stderr)
+            raise
+
+    if failed:
+        print(f"{len(failed)} shards failed: {', '.join(sorted(failed))}", file=sys.stderr)
+        print("Re-run the same command to retry only the failed shards.", file=sys.stderr)
+        sys.exit(1)
+
+    return output_files
+
+
+def run_blastp(query_file: str, db: str, output_path: str, work_dir: str, command_template: str,
+               shards: int, jobs: int, threads: int = 1, evalue: str = "1e-5", max_target_seqs: int = 1,
+               retries: int = 2, restart: bool = False, cache: Optional[BlastCache] = None,
+               cache_params: Optional[Dict] = None):
+    """
+    query FASTA의 BLASTP 결과를 output_path에 저장합니다 (run_shards() 참고).
+
+    Args:
+        cache: BLAST 결과 캐시 (None이면 모든 query를 BLAST)
+        cache_params: 캐시 context에 넣을 BLAST 설정 (결과에 영향을 주는 것만)
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    run = dict(db=db, work_dir=work_dir, command_template=command_template, shards=shards, jobs=jobs,
+               threads=threads, evalue=evalue, max_target_seqs=max_target_seqs, retries=retries, restart=restart)
+
+    if cache is None:
+        output_files = run_shards(query_file, **run)
+        print(f"Merging {shards} shard results into {output_path}...", file=sys.stderr)
+        merge_outputs(output_files, output_path)
+        return
+
+    print(f"Looking up {query_file} in BLAST cache {cache.path}...", file=sys.stderr)
+    context = cache.context(db, cache_params or {})
+    query_hashes = []
+    sequences: Dict[str, str] = {}
+    for seq_id, seq in iter_fasta(query_file, upper=False):
+        if not seq_id:
+            continue
+        seq_hash = sequence_hash(seq)
+        query_hashes.append((seq_id, seq_hash))
+        sequences.setdefault(seq_hash, seq)
+
+    cached = cache.lookup(context, sequences)
+    misses = [seq_hash for seq_hash in sequences if seq_hash not in cached]
+    cached_count = sum(1 for _, seq_hash in query_hashes if seq_hash in cached)
+    print(f"  {cached_count:,} of {len(query_hashes):,} queries cached, "
+          f"{len(misses):,} unique sequences to BLAST", file=sys.stderr)
+
+    new_hits: Dict[str, str] = {}
+    if misses:
+        # 캐시에 없는 서열만 (서열 hash를 ID로) BLAST
+        misses_file = os.path.join(work_dir, "cache_misses.fasta")
+        with open_output(misses_file) as output:
+            for seq_hash in misses:
+                output.write_fasta(seq_hash, sequences[seq_hash])
+
+        output_files = run_shards(misses_file, **run)
+        for path in output_files:
+            with open(path) as f:
+                for seq_hash, hits in group_hits_by_query(f):
+                    new_hits[seq_hash] = new_hits.get(seq_hash, "") + hits
+
+        # hit이 없는 서열도 빈 결과로 저장 (다음에 다시 BLAST하지 않도록)
+        cache.store(context, {seq_hash: new_hits.get(seq_hash, "") for seq_hash in misses})
+
+    print(f"Writing {output_path}...", file=sys.stderr)
+    with open_output(output_path, background=True) as output:
+        for seq_id, seq_hash in query_hashes:
+            hits = cached.get(seq_hash)
+            if hits is None:
+                hits = new_hits.get(seq_hash, "")
+            output.write(rekey_hits(seq_id, hits))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Query FASTA를 shard로 나눠 BLASTP를 병렬로 실행하고 결과를 합칩니다 (중단 후 재실행 시 이어서 실행).",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+예시:
+  cd scripts
+  # 로컬 blastp, 코어 수만큼 병렬
+  python run_blastp.py
+
+  # Docker (ncbi/blast 이미지)
+  python run_blastp.py --docker
+
+  # 임의의 명령 (테스트용 stub 등)
+  python run_blastp.py --command "python fake_blastp.py {query} {out}"
+
+  # 캐시 없이 전체 query를 BLAST
+  python run_blastp.py --no-cache
+
+명령 template 치환: {query} {db} {out} {threads} {evalue} {max_target_seqs}
+        """
+    )
+
+    parser.add_argument(
+        "-q", "--query",
+        default=os.path.join(INTERMEDIATE_DIR, 'shrimp_query.fasta'),
+        help="Query FASTA (기본값: ../intermediate/shrimp_query.fasta)"
+    )
+
+    parser.add_argument(
+        "-d", "--db",
+        default=os.path.join(BLAST_DB_DIR, 'human_complete'),
+        help="BLAST database (기본값: ../blast_db/human_complete)"
+    )
+
+    parser.add_argument(
+        "-o", "--output",
+        default=os.path.join(INTERMEDIATE_DIR, 'blast_results_complete.txt'),
+        help="합친 BLAST 결과 (outfmt 6, 기본값: ../intermediate/blast_results_complete.txt)"
+    )
+
+    parser.add_argument(
+        "-w", "--work-dir",
+        metavar="DIR",
+        help="shard FASTA/결과/manifest 디렉토리 (기본값: <OUTPUT>.shards)"
+    )
+
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        metavar="N",
+        help="동시에 실행할 shard 수 (기본값: CPU 코어 수 / --threads)"
+    )
+
+    parser.add_argument(
+        "-t", "--threads",
+        type=int,
+        default=1,
+        metavar="N",
+        help="shard 하나의 blastp thread 수 (기본값: 1)"
+    )
+
+    parser.add_argument(
+        "-n", "--shards",
+        type=int,
+        metavar="N",
+        help="shard 수 (기본값: --jobs x 4, 많을수록 중단 시 다시 실행할 양이 적음)"
+    )
+
+    parser.add_argument(
+        "--evalue",
+        default="1e-5",
+        help="blastp -evalue (기본값: 1e-5)"
+    )
+
+    parser.add_argument(
+        "--max-target-seqs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="blastp -max_target_seqs (기본값: 1)"
+    )
+
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=2,
+        metavar="N",
+        help="실패한 shard 재시도 횟수 (기본값: 2)"
+    )
+
+    command_group = parser.add_mutually_exclusive_group()
+    command_group.add_argument(
+        "--docker",
+        nargs="?",
+        const=DOCKER_IMAGE,
+        metavar="IMAGE",
+        help=f"blastp를 Docker로 실행 (기본 이미지: {DOCKER_IMAGE})"
+    )
+    command_group.add_argument(
+        "--command",
+        metavar="TEMPLATE",
+        help="shard별로 실행할 명령 template (기본값: 로컬 blastp)"
+    )
+
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="이전 실행 기록을 무시하고 처음부터 실행"
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="BLAST 결과 캐시를 사용하지 않음 (모든 query를 BLAST)"
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        metavar="DIR",
+        default=DEFAULT_CACHE_DIR,
+        help="BLAST 결과 캐시 디렉토리 (기본값: intermediate/cache)"
+    )
+
+    args = parser.parse_args()
+
+    if args.threads < 1:
+        parser.error("--threads must be >= 1")
+    jobs = args.jobs or max(1, (os.cpu_count() or 1) // args.threads)
+    if jobs < 1:
+        parser.error("--jobs must be >= 1")
+    shards = args.shards or jobs * 4
+    if shards < 1:
+        parser.error("--shards must be >= 1")
+    if args.retries < 0:
+        parser.error("--retries must be >= 0")
+    if not os.path.exists(args.query):
+        parser.error(f"query FASTA not found: {args.query}")
+
+    work_dir = os.path.abspath(args.work_dir or args.output + ".shards")
+
+    if args.docker:
+        command_template = docker_command(args.docker, [work_dir, os.path.dirname(os.path.abspath(args.db))])
+    else:
+        command_template = args.command or DEFAULT_COMMAND
+
+    print(f"Running {shards} shards with {jobs} parallel jobs x {args.threads} threads", file=sys.stderr)
+    try:
+        run_blastp(
+            args.query,
+            os.path.abspath(args.db),
+            args.output,
+            work_dir,
+            command_template,
+            shards,
+            jobs,
+            threads=args.threads,
+            evalue=args.evalue,
+            max_target_seqs=args.max_target_seqs,
+            retries=args.retries,
+            restart=args.restart,
+            cache=None if args.no_cache else BlastCache(args.cache_dir),
+            # 실행 방식(로컬/Docker)은 결과에 영향이 없으므로 context에서 제외, 직접 준 명령은 포함
+            cache_params={"command": args.command or "blastp", "evalue": args.evalue,
+                          "max_target_seqs": args.max_target_seqs}
+        )
+    except KeyboardInterrupt:
+        sys.exit(130)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+파이프라인 단계를 한 프로세스 안에서 generator로 이어 실행하는 API.
+
+스크립트를 차례로 실행하면 단계마다 TSV/FASTA를 쓰고 다음 단계가 바로 다시 파싱합니다.
+여기서는 각 단계가 typed record(NamedTuple)를 주고받으므로 직렬화 → 파싱 왕복이 없고,
+중간 파일은 필요할 때만 씁니다 (write_* 단계를 사이에 끼우면 record를 그대로 넘기면서 파일로도 저장).
+
+  regions = CdsRegionSink()
+  loc_records = list(extract_loc_to_protein(tap(gtf_records(gtf), regions.add)))   # GTF는 한 번만 읽음
+  proteins = extract_proteins(regions.cds_regions, genome)
+  query = extract_sequences(proteins, {r.protein_id for r in loc_records})
+  ...  (query FASTA로 BLAST)
+  for mapping in map_blast_to_symbol(load_blast_queries(blast_file), loc_records, symbol_map):
+      ...
+
+BLAST는 외부 프로그램이므로 query FASTA와 결과 파일은 디스크를 거칩니다 (run_chain() 참고).
+"""
+
+import sys
+import argparse
+import importlib
+import os
+import shutil
+import tempfile
+from contextlib import ExitStack
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from blast_cache import BlastCache
+from cds_cache import CdsCache, add_cache_arguments, cache_from_args
+from gtf_reader import CDS_KEYS, GtfRecord, iter_gtf_features
+from gtf_scan import CdsRegionSink
+from output_io import open_output
+from run_blastp import BLAST_DB_DIR, DEFAULT_COMMAND, DOCKER_IMAGE, docker_command, run_blastp
+
+# 숫자로 시작하는 스크립트 이름이라 importlib로 불러옴
+map_blast = importlib.import_module("5_map_blast_to_symbol")
+extract_gtf = importlib.import_module("extract_proteins_from_gtf")
+
+SymbolMapping = map_blast.SymbolMapping
+load_accession_to_symbol = map_blast.load_accession_to_symbol
+load_blast_queries = map_blast.load_blast_queries
+
+# 스크립트 기본 경로 설정
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
+INTERMEDIATE_DIR = os.path.join(PROJECT_ROOT, 'intermediate')
+
+LOC_MAP_HEADER = "gene_id\tprotein_id\tproduct\ttranscript_id"
+
+
+class LocProtein(NamedTuple):
+    """LOC (gene_id) → protein_id 매핑 한 행 (loc_protein_map.tsv 한 줄)."""
+    gene_id: str
+    protein_id: str
+    product: str
+    transcript_id: str
+
+
+class Protein(NamedTuple):
+    """단백질 서열 하나 (FASTA 레코드 하나)."""
+    protein_id: str
+    sequence: str
+
+
+def gtf_records(gtf_file: str, cache: Optional[CdsCache] = None) -> Iterator[GtfRecord]:
+    """GTF의 CDS 레코드 (cache를 주면 파싱된 CDS 캐시 사용, gtf_scan.scan_gtf()와 같음)."""
+    if cache is not None:
+        return cache.records(gtf_file)
+    return iter_gtf_features(gtf_file, CDS_KEYS)
+
+
+def tap(records: Iterable, *callbacks: Callable) -> Iterator:
+    """record를 그대로 넘기면서 callback에도 전달합니다 (한 번 읽은 GTF를 여러 단계가 함께 쓸 때)."""
+    for record in records:
+        for callback in callbacks:
+            callback(record)
+        yield record
+
+
+def extract_loc_to_protein(records: Iterable[GtfRecord]) -> Iterator[LocProtein]:
+    """
+    GTF CDS 레코드 → LOC → protein_id 매핑 (1_extract_loc_to_protein.py와 같은 행, 같은 순서).
+    (gene_id, protein_id) 쌍은 처음 나온 것만 돌려줍니다.
+    """
+    seen_pairs = set()
+    for record in records:
+        gene_id, transcript_id, protein_id, product = record[5]
+
+        # protein_id가 없으면 스킵
+        if not gene_id or not protein_id:
+            continue
+
+        # 중복 쌍 제거
+        pair = (gene_id, protein_id)
+        if pair in seen_pairs:
+            continue
+        seen_pairs.add(pair)
+
+        yield LocProtein(gene_id, protein_id, product or "", transcript_id or "")
+
+
+def extract_proteins(cds_regions: Dict[str, List[Tuple]], genome_file: str, workers: int = 1,
+                     table_id: int = 1, verbose: bool = False) -> Iterator[Protein]:
+    """
+    CDS 영역 → 번역한 단백질 (extract_proteins_from_gtf.py와 같은 서열, protein_id 순서).
+
+    Args:
+        cds_regions: {transcript_id: [(chrom, start, end, strand, frame, protein_id), ...]} (CdsRegionSink)
+        genome_file: 게놈 FASTA (.fai 인덱스 + mmap으로 필요한 구간만 읽음) 또는 .2bit
+    """
+    with extract_gtf.open_genome(genome_file) as genome:
+        proteins_by_id, error_count = extract_gtf.translate_proteins(cds_regions, genome, workers, verbose,
+                                                                     table_id)
+    print(f"  Translated {len(proteins_by_id)} proteins ({error_count} errors)", file=sys.stderr)
+
+    for protein_id in sorted(proteins_by_id):
+        yield Protein(protein_id, proteins_by_id[protein_id])
+
+
+def extract_sequences(proteins: Iterable[Protein], ids: Set[str]) -> Iterator[Protein]:
+    """ids에 있는 단백질만 돌려줍니다 (2_extract_proteins.py와 같은 선택, 입력 순서)."""
+    for protein in proteins:
+        if protein.protein_id in ids:
+            yield protein
+
+
+def map_blast_to_symbol(blast_queries: Iterable[Tuple[str, List[Tuple]]], loc_records: Iterable[LocProtein],
+                        symbol_map: Dict[str, str], min_identity: float = 30.0, min_coverage: float = 30.0,
+                        counts: Optional[Dict[str, int]] = None) -> Iterator[SymbolMapping]:
+    """
+    query별 BLAST hit → gene symbol 매핑 행 (5_map_blast_to_symbol.py와 같은 행, 같은 순서).
+
+    Args:
+        blast_queries: (protein_id, 순위순 hit 목록) - load_blast_queries() 참고
+        loc_records: extract_loc_to_protein()의 결과
+        counts: 지정하면 "mapped"/"unmapped" protein 수를 더함
+    """
+    # 파일로 읽을 때와 같이 같은 protein_id는 마지막 행의 gene_id 사용
+    loc_map = {record.protein_id: record.gene_id for record in loc_records}
+    return map_blast.iter_mappings(blast_queries, loc_map, symbol_map, min_identity, min_coverage,
+                                   counts=counts)
+
+
+def write_loc_map(records: Iterable[LocProtein], output_file) -> Iterator[LocProtein]:
+    """record를 그대로 넘기면서 loc_protein_map.tsv 형식으로 씁니다."""
+    print(LOC_MAP_HEADER, file=output_file)
+    for record in records:
+        output_file.write("\t".join(record) + "\n")
+        yield record
+
+
+def write_proteins(proteins: Iterable[Protein], output_file) -> Iterator[Protein]:
+    """record를 그대로 넘기면서 FASTA로 씁니다."""
+    for protein in proteins:
+        output_file.write_fasta(protein.protein_id, protein.sequence)
+        yield protein
+
+
+def run_chain(gtf_file: str, genome_file: str, annotation_file: str, output_file, blast_options: Dict,
+              blast_file: Optional[str] = None, intermediate_dir: Optional[str] = None,
+              min_identity: float = 30.0, min_coverage: float = 30.0, top_k: int = 1,
+              cache: Optional[CdsCache] = None, workers: int = 1) -> Dict[str, int]:
+    """
+    GTF + genome → gene symbol 매핑을 한 프로세스에서 실행합니다.
+
+    Args:
+        blast_options: run_blastp.run_blastp()의 인자 (db, command_template, shards, jobs, ...)
+        blast_file: 이미 있는 BLAST 결과 (지정하면 BLAST를 실행하지 않음)
+        intermediate_dir: 지정하면 중간 파일(loc_protein_map.tsv, proteins.fasta, shrimp_query.fasta,
+                          blast_results_complete.txt)을 여기에 저장. 없으면 BLAST 입출력만 임시 디렉토리에 씀
+
+    Returns:
+        {"loc_pairs", "proteins", "queries", "mapped", "unmapped"}
+    """
+    stats = {}
+    work_dir = intermediate_dir or tempfile.mkdtemp(prefix="genesymbol_")
+    os.makedirs(work_dir, exist_ok=True)
+
+    try:
+        # 1. GTF 한 번 읽기 → LOC 매핑 + CDS 영역
+        print(f"Scanning GTF from {gtf_file}...", file=sys.stderr)
+        regions = CdsRegionSink()
+        records = extract_loc_to_protein(tap(gtf_records(gtf_file, cache), regions.add))
+        if intermediate_dir:
+            with open_output(os.path.join(work_dir, 'loc_protein_map.tsv'), background=True) as output:
+                loc_records = list(write_loc_map(records, output))
+        else:
+            loc_records = list(records)
+        stats["loc_pairs"] = len(loc_records)
+        print(f"  {len(loc_records)} LOC → protein pairs, {len(regions.cds_regions)} transcripts", file=sys.stderr)
+
+        # 2. 번역 → query 선택 (BLAST 입력이므로 query FASTA는 항상 파일로 씀)
+        query_file = os.path.join(work_dir, 'shrimp_query.fasta')
+        if blast_file is None or intermediate_dir:
+            print(f"Extracting proteins from {genome_file}...", file=sys.stderr)
+            proteins = extract_proteins(regions.cds_regions, genome_file, workers)
+            query_ids = {record.protein_id for record in loc_records}
+            query_count = 0
+            with ExitStack() as stack:
+                if intermediate_dir:
+                    proteins_output = stack.enter_context(
+                        open_output(os.path.join(work_dir, 'proteins.fasta'), background=True))
+                    proteins = write_proteins(proteins, proteins_output)
+                query_output = stack.enter_context(open_output(query_file, background=True))
+                for _ in write_proteins(extract_sequences(proteins, query_ids), query_output):
+                    query_count += 1
+            stats["queries"] = query_count
+            print(f"  {query_count} query proteins", file=sys.stderr)
+
+        # 3. BLAST
+        if blast_file is None:
+            blast_file = os.path.join(work_dir, 'blast_results_complete.txt')
+            run_blastp(query_file, output_path=blast_file, work_dir=os.path.join(work_dir, 'blast_shards'),
+                       **blast_options)
+
+        # 4. 매핑
+        print(f"Loading accession → symbol mapping from {annotation_file}...", file=sys.stderr)
+        symbol_map = load_accession_to_symbol(annotation_file)
+
+        print(map_blast.OUTPUT_HEADER, file=output_file)
+        counts = {"mapped": 0, "unmapped": 0}
+        for mapping in map_blast_to_symbol(load_blast_queries(blast_file, top_k), loc_records, symbol_map,
+                                           min_identity, min_coverage, counts):
+            output_file.write(mapping.to_tsv())
+        stats.update(counts)
+
+    finally:
+        if not intermediate_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="GTF + genome → gene symbol 매핑을 중간 파일 없이 한 프로세스에서 실행합니다.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+예시:
+  cd scripts
+  # BLAST까지 실행 (중간 파일 없음, BLAST 입출력만 임시 디렉토리)
+  python stages.py --docker -o ../results/final_gene_symbol_map_COMPLETE.tsv
+
+  # 중간 파일도 저장 (스크립트를 차례로 실행한 것과 같은 파일)
+  python stages.py --docker --intermediate-dir ../intermediate -o ../results/final.tsv
+
+  # 이미 있는 BLAST 결과로 매핑만 (GTF에서 LOC 매핑을 바로 만듦)
+  python stages.py -b ../intermediate/blast_results_complete.txt -o ../results/final.tsv
+        """
+    )
+
+    parser.add_argument(
+        "--gtf",
+        default=os.path.join(DATA_DIR, 'annotation.gtf'),
+        help="입력 GTF 파일 (기본값: data/annotation.gtf)"
+    )
+
+    parser.add_argument(
+        "--genome",
+        default=os.path.join(DATA_DIR, 'genome.fna'),
+        help="게놈 FASTA 또는 .2bit 파일 (기본값: data/genome.fna)"
+    )
+
+    parser.add_argument(
+        "-a", "--annotation-file",
+        metavar="ANNOTATION_FILE",
+        default=os.path.join(INTERMEDIATE_DIR, 'human_symbol_map_uniprot.tsv'),
+        help="Reference accession → gene symbol 매핑 파일 (기본값: intermediate/human_symbol_map_uniprot.tsv)"
+    )
+
+    parser.add_argument(
+        "-b", "--blast-file",
+        metavar="BLAST_FILE",
+        help="이미 있는 BLAST 결과 (지정하면 번역/BLAST를 건너뜀)"
+    )
+
+    parser.add_argument(
+        "-d", "--db",
+        default=os.path.join(BLAST_DB_DIR, 'human_complete'),
+        help="BLAST database (기본값: blast_db/human_complete)"
+    )
+
+    parser.add_argument(
+        "-o", "--output",
+        metavar="OUTPUT",
+        help="출력 파일 (기본값: stdout)"
+    )
+
+    parser.add_argument(
+        "--intermediate-dir",
+        metavar="DIR",
+        help="중간 파일을 저장할 디렉토리 (기본값: 저장하지 않음)"
+    )
+
+    parser.add_argument(
+        "--min-identity",
+        type=float,
+        default=30.0,
+        metavar="PERCENT",
+        help="최소 identity 퍼센트 (기본값: 30.0)"
+    )
+
+    parser.add_argument(
+        "--min-coverage",
+        type=float,
+        default=30.0,
+        metavar="PERCENT",
+        help="최소 query coverage 퍼센트 (기본값: 30.0)"
+    )
+
+    parser.add_argument(
+        "-k", "--top-hits",
+        type=int,
+        default=1,
+        metavar="K",
+        help="query마다 출력할 hit 수 (기본값: 1)"
+    )
+
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        metavar="N",
+        help="번역 process 수와 동시 BLAST shard 수 (기본값: CPU 코어 수)"
+    )
+
+    parser.add_argument(
+        "--evalue",
+        default="1e-5",
+        help="blastp -evalue (기본값: 1e-5)"
+    )
+
+    parser.add_argument(
+        "--max-target-seqs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="blastp -max_target_seqs (기본값: 1)"
+    )
+
+    command_group = parser.add_mutually_exclusive_group()
+    command_group.add_argument(
+        "--docker",
+        nargs="?",
+        const=DOCKER_IMAGE,
+        metavar="IMAGE",
+        help=f"blastp를 Docker로 실행 (기본 이미지: {DOCKER_IMAGE})"
+    )
+    command_group.add_argument(
+        "--blast-command",
+        metavar="TEMPLATE",
+        help="shard별로 실행할 blastp 명령 template (run_blastp.py --command)"
+    )
+
+    add_cache_arguments(parser)
+
+    args = parser.parse_args()
+
+    if args.top_hits < 1:
+        parser.error("--top-hits must be >= 1")
+    jobs = args.jobs or os.cpu_count() or 1
+    if jobs < 1:
+        parser.error("--jobs must be >= 1")
+
+    db = os.path.abspath(args.db)
+    if args.docker:
+        # 임시 디렉토리 위치는 실행 때 정해지므로 상위 디렉토리를 mount
+        work_root = os.path.abspath(args.intermediate_dir) if args.intermediate_dir else tempfile.gettempdir()
+        command_template = docker_command(args.docker, [work_root, os.path.dirname(db)])
+    else:
+        command_template = args.blast_command or DEFAULT_COMMAND
+
+    blast_options = dict(
+        db=db,
+        command_template=command_template,
+        shards=jobs * 4,
+        jobs=jobs,
+        evalue=args.evalue,
+        max_target_seqs=args.max_target_seqs,
+        cache=None if args.no_cache else BlastCache(args.cache_dir),
+        cache_params={"command": args.blast_command or "blastp", "evalue": args.evalue,
+                      "max_target_seqs": args.max_target_seqs},
+    )
+
+    with open_output(args.output, background=True) as output:
+        stats = run_chain(
+            args.gtf,
+            args.genome,
+            args.annotation_file,
+            output,
+            blast_options,
+            blast_file=args.blast_file,
+            intermediate_dir=args.intermediate_dir,
+            min_identity=args.min_identity,
+            min_coverage=args.min_coverage,
+            top_k=args.top_hits,
+            cache=cache_from_args(args),
+            workers=jobs,
+        )
+
+    print(f"\nMapping Summary:", file=sys.stderr)
+    print(f"  Mapped: {stats['mapped']}", file=sys.stderr)
+    print(f"  Unmapped: {stats['unmapped']}", file=sys.stderr)
+    print(f"  Total: {stats['mapped'] + stats['unmapped']}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
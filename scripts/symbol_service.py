@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+LOC → protein → reference accession → gene symbol 조회 서비스 (상주 HTTP 서버).
+
+loc_protein_map.tsv, human_symbol_map_uniprot.tsv, 최종 매핑 결과를 한 번만 읽어 메모리 index로 두고,
+다른 도구들은 파일을 다시 파싱하는 대신 HTTP(TCP 또는 Unix socket)로 조회합니다.
+파일이 바뀌면 (pipeline.py 재실행 등) 백그라운드에서 다시 읽어 index를 통째로 교체합니다.
+다시 읽다가 실패하면 기존 index로 계속 응답합니다.
+
+  python symbol_service.py --port 8765
+  curl 'http://127.0.0.1:8765/lookup?id=LOC113829000&id=XP_064077102.1'
+  curl -X POST http://127.0.0.1:8765/lookup -d '{"ids": ["LOC113829000", "Q969H6"]}'
+
+API (응답은 JSON):
+  GET  /lookup?id=ID[&id=ID...]   gene_id(LOC), protein_id(XP), reference accession 중 무엇이든 조회
+  POST /lookup                    {"ids": [...]} 또는 줄마다 ID 하나인 텍스트 (batch)
+  GET  /health                    로드 시각, 파일, 항목 수
+  POST /reload                    파일을 바로 다시 읽음
+"""
+
+import sys
+import argparse
+import importlib
+import json
+import os
+import socketserver
+import stat
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from compressed_io import open_input
+from table_io import detect_table_format, read_table
+
+# 숫자로 시작하는 스크립트 이름이라 importlib로 불러옴
+map_blast = importlib.import_module("5_map_blast_to_symbol")
+SymbolMapping = map_blast.SymbolMapping
+
+# 스크립트 기본 경로 설정
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+INTERMEDIATE_DIR = os.path.join(PROJECT_ROOT, 'intermediate')
+RESULTS_DIR = os.path.join(PROJECT_ROOT, 'results')
+
+DEFAULT_PORT = 8765
+
+# 파일 변경 확인 간격 (초)
+DEFAULT_RELOAD_INTERVAL = 2.0
+
+# POST 요청 본문 최대 크기
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+
+def _table_rows(path: str, column_count: int, skip_header: bool):
+    """TSV (압축 가능) 또는 Parquet/Arrow 테이블의 앞 column_count개 컬럼 (빈 줄, # 줄 제외)."""
+    if detect_table_format(path) is not None:
+        table = read_table(path)
+        columns = [table.column(i).to_pylist() for i in range(min(column_count, table.num_columns))]
+        columns += [[""] * table.num_rows] * (column_count - len(columns))
+        yield from zip(*columns)
+        return
+
+    with open_input(path) as f:
+        if skip_header:
+            next(f, None)
+        for line in f:
+            line = line.rstrip("\n")
+            if not line or line.startswith("#"):
+                continue
+            cols = line.split("\t")
+            if len(cols) >= 2:
+                yield (cols + [""] * column_count)[:column_count]
+
+
+def _score(value) -> Optional[float]:
+    """최종 매핑의 숫자 컬럼 → float (이전 결과 파일의 '-'나 빈 값은 None)."""
+    if value is None or value in ("", "-"):
+        return None
+    return float(value)
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """(크기, mtime_ns) - 파일이 없으면 None."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class SymbolIndex:
+    """
+    조회용 메모리 index (읽기 전용, 다시 읽을 때는 새로 만들어 교체).
+
+    같은 문자열(gene_id, symbol 등)은 sys.intern으로 한 번만 저장하고,
+    매핑 행은 SymbolMapping tuple로 gene_id / protein_id별 목록에 둡니다.
+    """
+
+    def __init__(self, loc_file: str, annotation_file: str, mapping_file: Optional[str] = None):
+        intern = sys.intern
+
+        # protein_id → (gene_id, product), gene_id → [protein_id, ...]
+        self.proteins: Dict[str, Tuple[str, str]] = {}
+        self.genes: Dict[str, List[str]] = {}
+        for gene_id, protein_id, product in _table_rows(loc_file, 3, skip_header=True):
+            if not gene_id or not protein_id:
+                continue
+            gene_id, protein_id = intern(gene_id), intern(protein_id)
+            if protein_id not in self.proteins:
+                self.proteins[protein_id] = (gene_id, intern(product or ""))
+                self.genes.setdefault(gene_id, []).append(protein_id)
+
+        self.symbols: Dict[str, str] = {}
+        for accession, symbol in _table_rows(annotation_file, 2, skip_header=False):
+            accession = (accession or "").strip()
+            if accession:
+                self.symbols[intern(accession)] = intern((symbol or "").strip())
+
+        self.mappings_by_gene: Dict[str, List[SymbolMapping]] = {}
+        self.mappings_by_protein: Dict[str, List[SymbolMapping]] = {}
+        self.mapping_count = 0
+        if mapping_file is not None:
+            for row in _table_rows(mapping_file, 8, skip_header=True):
+                gene_id, protein_id, accession, symbol = map(intern, row[:4])
+                mapping = SymbolMapping(gene_id, protein_id, accession, symbol, *map(_score, row[4:8]))
+                self.mappings_by_gene.setdefault(gene_id, []).append(mapping)
+                self.mappings_by_protein.setdefault(protein_id, []).append(mapping)
+                self.mapping_count += 1
+
+    def counts(self) -> Dict[str, int]:
+        return {
+            "genes": len(self.genes),
+            "proteins": len(self.proteins),
+            "accessions": len(self.symbols),
+            "mappings": self.mapping_count,
+        }
+
+    def lookup(self, query_id: str) -> Dict:
+        """gene_id, protein_id, accession 중 하나로 조회 (없으면 type이 null)."""
+        if query_id in self.genes or query_id in self.mappings_by_gene:
+            mappings = self.mappings_by_gene.get(query_id, [])
+            return {
+                "id": query_id,
+                "type": "gene",
+                "gene_id": query_id,
+                "proteins": [{"protein_id": protein_id, "product": self.proteins[protein_id][1]}
+                             for protein_id in self.genes.get(query_id, [])],
+                "symbols": sorted({m.symbol for m in mappings if m.symbol}),
+                "mappings": [m._asdict() for m in mappings],
+            }
+
+        if query_id in self.proteins or query_id in self.mappings_by_protein:
+            gene_id, product = self.proteins.get(query_id, (None, ""))
+            mappings = self.mappings_by_protein.get(query_id, [])
+            return {
+                "id": query_id,
+                "type": "protein",
+                "gene_id": gene_id or (mappings[0].gene_id if mappings else None),
+                "protein_id": query_id,
+                "product": product,
+                "mappings": [m._asdict() for m in mappings],
+            }
+
+        accession = map_blast.extract_accession(query_id) if query_id.strip() else query_id
+        if accession in self.symbols:
+            return {"id": query_id, "type": "accession", "accession": accession, "symbol": self.symbols[accession]}
+
+        return {"id": query_id, "type": None}
+
+
+class SymbolService:
+    """현재 SymbolIndex와 원본 파일 상태. 파일이 바뀌면 reload()로 새 index로 교체합니다."""
+
+    def __init__(self, loc_file: str, annotation_file: str, mapping_file: Optional[str] = None):
+        self.files = {"loc": loc_file, "annotation": annotation_file}
+        if mapping_file is not None:
+            self.files["mapping"] = mapping_file
+        self.index: Optional[SymbolIndex] = None
+        self.signatures: Dict[str, Optional[Tuple[int, int]]] = {}
+        self.loaded_at = None
+        self.reload_count = 0
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def reload(self) -> bool:
+        """
+        파일을 다시 읽어 index를 교체합니다. 최종 매핑 파일은 없으면 매핑 없이 로드합니다.
+
+        Returns:
+            성공 여부 (실패하면 기존 index 유지, 처음 로드할 때는 예외를 그대로 올림)
+        """
+        with self._reload_lock:
+            signatures = {name: file_signature(path) for name, path in self.files.items()}
+            mapping_file = self.files.get("mapping") if signatures.get("mapping") else None
+            started = time.perf_counter()
+            try:
+                index = SymbolIndex(self.files["loc"], self.files["annotation"], mapping_file)
+            except (IOError, ValueError, IndexError) as e:
+                if self.index is None:
+                    raise
+                # 같은 파일을 매번 다시 시도하지 않도록 다음 변경 때까지 기다림
+                self.signatures = signatures
+                print(f"Warning: reload failed, keeping previous index: {e}", file=sys.stderr)
+                return False
+
+            # 읽는 동안 파일이 또 바뀌었으면 다음 확인 때 다시 읽도록 읽기 전 signature를 기록
+            self.index = index
+            self.signatures = signatures
+            self.loaded_at = time.strftime("%Y-%m-%d %H:%M:%S")
+            self.reload_count += 1
+            counts = ", ".join(f"{value:,} {name}" for name, value in index.counts().items())
+            print(f"Loaded {counts} in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+            return True
+
+    def changed(self) -> bool:
+        return any(file_signature(path) != self.signatures.get(name) for name, path in self.files.items())
+
+    def watch(self, interval: float):
+        """interval초마다 파일 변경을 확인해 다시 읽는 백그라운드 thread 시작."""
+        def run():
+            while not self._stop.wait(interval):
+                if self.changed():
+                    print("Input files changed, reloading...", file=sys.stderr)
+                    self.reload()
+
+        threading.Thread(target=run, name="symbol-service-reload", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def health(self) -> Dict:
+        return {
+            "status": "ok",
+            "loaded_at": self.loaded_at,
+            "reloads": self.reload_count - 1,
+            "files": {name: {"path": path, "present": self.signatures.get(name) is not None}
+                      for name, path in self.files.items()},
+            "counts": self.index.counts(),
+        }
+
+
+class SymbolRequestHandler(BaseHTTPRequestHandler):
+    """JSON API 핸들러 (self.server.service가 SymbolService)."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive로 연결을 재사용하면 조회당 지연이 더 줄어듦
+
+    def address_string(self) -> str:
+        # Unix socket이면 client_address가 빈 문자열
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, payload, status: int = 200):
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> Optional[bytes]:
+        # 본문을 읽지 않고 응답하는 경우에는 연결을 재사용할 수 없으므로 닫음
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length < 0:
+                raise ValueError
+        except ValueError:
+            self.close_connection = True
+            self._send_json({"error": "invalid Content-Length"}, 400)
+            return None
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send_json({"error": f"request body larger than {MAX_BODY_BYTES} bytes"}, 413)
+            return None
+        return self.rfile.read(length)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        service = self.server.service
+
+        if url.path == "/health":
+            self._send_json(service.health())
+        elif url.path == "/lookup":
+            ids = parse_qs(url.query).get("id", [])
+            if not ids:
+                self._send_json({"error": "missing id parameter"}, 400)
+                return
+            index = service.index
+            self._send_json({"results": [index.lookup(query_id) for query_id in ids]})
+        else:
+            self._send_json({"error": f"unknown path: {url.path}"}, 404)
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        service = self.server.service
+
+        body = self._read_body()
+        if body is None:
+            return
+
+        if url.path == "/reload":
+            if not service.reload():
+                self._send_json({"error": "reload failed, previous index kept"}, 500)
+                return
+            self._send_json(service.health())
+        elif url.path == "/lookup":
+            try:
+                ids = parse_ids(body, self.headers.get("Content-Type", ""))
+            except ValueError as e:
+                self._send_json({"error": str(e)}, 400)
+                return
+            index = service.index
+            self._send_json({"results": [index.lookup(query_id) for query_id in ids]})
+        else:
+            self._send_json({"error": f"unknown path: {url.path}"}, 404)
+
+
+def parse_ids(body: bytes, content_type: str = "") -> List[str]:
+    """POST 본문 → ID 목록. JSON ({"ids": [...]} 또는 [...]) 또는 줄마다 ID 하나인 텍스트."""
+    text = body.decode("utf-8")
+    if "json" in content_type or text.lstrip()[:1] in ("{", "["):
+        try:
+            payload = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON: {e}")
+        ids = payload.get("ids") if isinstance(payload, dict) else payload
+        if not isinstance(ids, list) or not all(isinstance(i, str) for i in ids):
+            raise ValueError('expected {"ids": [string, ...]}')
+        return ids
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix domain socket 위의 HTTP 서버 (curl --unix-socket으로 조회)."""
+    daemon_threads = True
+
+
+def make_server(service: SymbolService, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                unix_socket: Optional[str] = None, verbose: bool = False):
+    """
+    SymbolService를 응답하는 서버 생성 (serve_forever()로 실행).
+    unix_socket 경로에 이전 실행의 socket이 남아 있으면 지우고, socket이 아닌 파일이면 종료합니다.
+    """
+    if unix_socket is not None:
+        if os.path.exists(unix_socket):
+            if not stat.S_ISSOCK(os.stat(unix_socket).st_mode):
+                print(f"Error: {unix_socket} exists and is not a socket", file=sys.stderr)
+                sys.exit(1)
+            os.remove(unix_socket)
+        server = UnixHTTPServer(unix_socket, SymbolRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), SymbolRequestHandler)
+        server.daemon_threads = True
+    server.service = service
+    server.verbose = verbose
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="LOC/protein/accession → gene symbol 조회를 HTTP로 제공하는 상주 서비스",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+예시:
+  cd scripts
+  python symbol_service.py                                  # http://127.0.0.1:8765
+  python symbol_service.py --unix-socket /tmp/symbols.sock
+
+  curl 'http://127.0.0.1:8765/lookup?id=LOC113829000'
+  curl -X POST http://127.0.0.1:8765/lookup --data-binary @ids.txt     # 줄마다 ID 하나
+  curl --unix-socket /tmp/symbols.sock 'http://localhost/lookup?id=XP_064077102.1'
+        """
+    )
+
+    parser.add_argument(
+        "-l", "--loc-file",
+        metavar="LOC_FILE",
+        default=os.path.join(INTERMEDIATE_DIR, 'loc_protein_map.tsv'),
+        help="LOC → protein_id 매핑 (기본값: intermediate/loc_protein_map.tsv)"
+    )
+
+    parser.add_argument(
+        "-a", "--annotation-file",
+        metavar="ANNOTATION_FILE",
+        default=os.path.join(INTERMEDIATE_DIR, 'human_symbol_map_uniprot.tsv'),
+        help="Reference accession → gene symbol 매핑 (기본값: intermediate/human_symbol_map_uniprot.tsv)"
+    )
+
+    parser.add_argument(
+        "-m", "--mapping-file",
+        metavar="MAPPING_FILE",
+        default=os.path.join(RESULTS_DIR, 'final_gene_symbol_map_COMPLETE.tsv'),
+        help="5_map_blast_to_symbol.py 최종 매핑 결과 (기본값: results/final_gene_symbol_map_COMPLETE.tsv, "
+             "없으면 생길 때 로드)"
+    )
+
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="listen 주소 (기본값: 127.0.0.1)"
+    )
+
+    parser.add_argument(
+        "-p", "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"listen 포트 (기본값: {DEFAULT_PORT})"
+    )
+
+    parser.add_argument(
+        "--unix-socket",
+        metavar="PATH",
+        help="TCP 대신 Unix domain socket으로 listen"
+    )
+
+    parser.add_argument(
+        "--reload-interval",
+        type=float,
+        default=DEFAULT_RELOAD_INTERVAL,
+        metavar="SECONDS",
+        help=f"입력 파일 변경 확인 간격 (기본값: {DEFAULT_RELOAD_INTERVAL:g}, 0이면 자동으로 다시 읽지 않음)"
+    )
+
+    parser.add_argument(
+        "-v", "--verbose",
+        action="store_true",
+        help="요청마다 로그 출력"
+    )
+
+    args = parser.parse_args()
+
+    service = SymbolService(args.loc_file, args.annotation_file, args.mapping_file)
+    try:
+        service.reload()
+    except (IOError, ValueError, IndexError) as e:
+        print(f"Error loading input files: {e}", file=sys.stderr)
+        sys.exit(1)
+    if service.signatures.get("mapping") is None:
+        print(f"Warning: {args.mapping_file} not found, serving without final mappings", file=sys.stderr)
+
+    if args.reload_interval > 0:
+        service.watch(args.reload_interval)
+
+    server = make_server(service, args.host, args.port, args.unix_socket, args.verbose)
+    where = args.unix_socket or f"http://{args.host}:{server.server_address[1]}"
+    print(f"Serving symbol lookups on {where}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+        server.server_close()
+        if args.unix_socket and os.path.exists(args.unix_socket):
+            os.remove(args.unix_socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Parquet / Arrow IPC 테이블 입출력 (pyarrow 필요, 선택).
+
+형식은 경로 확장자로 정합니다: .parquet, .arrow / .feather / .ipc (Arrow IPC file)
+
+  - 출력: open_output()이 이 확장자를 보면 TableOutput을 돌려줍니다.
+    스크립트는 TSV를 쓸 때와 똑같이 줄을 write하고, 첫 줄(header)이 컬럼 이름, 이후 줄이 행이 됩니다.
+    컬럼 타입은 COLUMN_TYPES(컬럼 이름 기준)를 따르고 나머지는 문자열입니다.
+  - 입력: read_column_lists()/read_table()로 필요한 컬럼만 읽습니다 (memory-map 사용, 문자열 split 없음).
+    open_input()은 이 형식의 파일을 TSV 텍스트로 보여 주므로 다른 스크립트도 그대로 읽을 수 있습니다.
+
+  python table_io.py ../intermediate/loc_protein_map.tsv ../intermediate/loc_protein_map.parquet
+  python table_io.py --blast ../intermediate/blast_results_complete.txt ../intermediate/blast_results.arrow
+"""
+
+import os
+import sys
+import argparse
+from typing import Iterator, List, Optional, Sequence, Union
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet/Arrow 파일을 쓰지 않으면 필요 없음
+    pa = None
+
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+ARROW_EXTENSIONS = (".arrow", ".feather", ".ipc")
+
+_PARQUET_MAGIC = b"PAR1"
+_ARROW_MAGIC = b"ARROW1"
+
+# header 없는 TSV(BLAST outfmt 6 등)에서 만든 테이블 표시 (TSV로 다시 보여 줄 때 header 생략)
+_HEADER_METADATA_KEY = b"tsv_header"
+
+# outfmt 6 기본 12 컬럼
+BLAST_COLUMNS = ("qseqid", "sseqid", "pident", "length", "mismatch", "gapopen",
+                 "qstart", "qend", "sstart", "send", "evalue", "bitscore")
+
+# 컬럼 이름 → 타입 ("int" / "float"), 목록에 없는 컬럼은 문자열
+COLUMN_TYPES = {
+    # CDS 좌표 테이블 (gtf_scan.py --cds-table)
+    "start": "int", "end": "int", "frame": "int",
+    # 최종 매핑 (5_map_blast_to_symbol.py)
+    "identity(%)": "float", "coverage(%)": "float", "bit_score": "float",
+    # BLAST outfmt 6
+    "pident": "float", "length": "int", "mismatch": "int", "gapopen": "int",
+    "qstart": "int", "qend": "int", "sstart": "int", "send": "int",
+    "evalue": "float", "bitscore": "float",
+    # 통계 (gtf_scan.py --stats)
+    "value": "int",
+}
+
+# 숫자 컬럼에서 null로 읽는 값 (최종 매핑은 값이 없을 때 "-"를 씀)
+NULL_VALUES = frozenset(("", "-"))
+
+DEFAULT_BATCH_ROWS = 1 << 16
+
+
+def table_format(path: Optional[str]) -> Optional[str]:
+    """경로 확장자 기준 형식: 'parquet', 'arrow' 또는 None (TSV 등 텍스트)."""
+    if not path:
+        return None
+    lower = path.lower()
+    if lower.endswith(PARQUET_EXTENSIONS):
+        return "parquet"
+    if lower.endswith(ARROW_EXTENSIONS):
+        return "arrow"
+    return None
+
+
+def detect_table_format(path: str) -> Optional[str]:
+    """파일 앞부분의 magic byte 기준 형식: 'parquet', 'arrow' 또는 None."""
+    with open(path, "rb") as f:
+        head = f.read(6)
+    if head[:4] == _PARQUET_MAGIC:
+        return "parquet"
+    if head == _ARROW_MAGIC:
+        return "arrow"
+    return None
+
+
+def _require_pyarrow(path: str):
+    if pa is None:
+        raise ValueError(f"{path} is a Parquet/Arrow table; install the 'pyarrow' package to use it")
+
+
+def _arrow_type(name: str):
+    kind = COLUMN_TYPES.get(name)
+    if kind == "int":
+        return pa.int64()
+    if kind == "float":
+        return pa.float64()
+    return pa.string()
+
+
+def _convert(values: List[str], kind: Optional[str]) -> list:
+    """TSV 문자열 값 → 컬럼 타입 값 (빈 값과 "-"는 null)."""
+    if kind == "int":
+        return [None if v in NULL_VALUES else int(v) for v in values]
+    if kind == "float":
+        return [None if v in NULL_VALUES else float(v) for v in values]
+    return values
+
+
+class TableOutput:
+    """
+    TSV 줄을 받아 Parquet/Arrow IPC 파일로 쓰는 출력 (BufferedOutput과 같은 인터페이스).
+
+    DEFAULT_BATCH_ROWS 행마다 record batch 하나로 내보내고, 임시 파일에 쓴 뒤
+    정상 종료했을 때만 최종 경로로 rename합니다.
+
+    Args:
+        path: 출력 경로 (.parquet / .arrow / .feather / .ipc)
+        columns: 컬럼 이름 (지정하면 header 없는 TSV로 취급해 첫 줄도 데이터로 읽음)
+    """
+
+    def __init__(self, path: str, columns: Optional[Sequence[str]] = None,
+                 batch_rows: int = DEFAULT_BATCH_ROWS):
+        _require_pyarrow(path)
+        self.name = path
+        self.path = path
+        self.closed = False
+        self._format = table_format(path) or "parquet"
+        self._batch_rows = batch_rows
+        self._tmp_path = f"{path}.{os.getpid()}.tmp"
+        self._writer = None
+        self._pending = ""
+        self._has_header = columns is None
+        self._columns: Optional[List[str]] = None
+        self._rows: List[List[str]] = []
+        if columns is not None:
+            self._set_columns(list(columns))
+
+    def _set_columns(self, columns: List[str]):
+        self._columns = columns
+        self._kinds = [COLUMN_TYPES.get(name) for name in columns]
+        metadata = None if self._has_header else {_HEADER_METADATA_KEY: b"false"}
+        self._schema = pa.schema([pa.field(name, _arrow_type(name)) for name in columns], metadata=metadata)
+
+    # --- file object 호환 ---
+
+    def write(self, text: str) -> int:
+        lines = (self._pending + text).split("\n")
+        self._pending = lines.pop()
+        for line in lines:
+            self._add_line(line)
+        return len(text)
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        """줄 단위로 처리하므로 할 일 없음 (record batch는 batch_rows마다 내보냄)."""
+
+    def writable(self) -> bool:
+        return True
+
+    def write_rows(self, rows):
+        """TSV 행 여러 개를 한 번에 출력 (각 값은 str()로 변환)."""
+        for row in rows:
+            self._add_row([str(v) for v in row])
+
+    # --- 내부 처리 ---
+
+    def _add_line(self, line: str):
+        if self._columns is None:
+            self._set_columns(line.split("\t"))
+            return
+        if line:
+            self._add_row(line.split("\t"))
+
+    def _add_row(self, cols: List[str]):
+        if len(cols) != len(self._columns):
+            raise ValueError(f"{self.path}: expected {len(self._columns)} columns, got {len(cols)}")
+        self._rows.append(cols)
+        if len(self._rows) >= self._batch_rows:
+            self._write_batch()
+
+    def _write_batch(self):
+        column_values = list(zip(*self._rows)) if self._rows else [()] * len(self._columns)
+        arrays = [pa.array(_convert(list(values), kind), type=field.type)
+                  for values, kind, field in zip(column_values, self._kinds, self._schema)]
+        batch = pa.RecordBatch.from_arrays(arrays, schema=self._schema)
+        self._rows = []
+
+        if self._writer is None:
+            if self._format == "parquet":
+                self._writer = pq.ParquetWriter(self._tmp_path, self._schema, compression="zstd")
+            else:
+                self._writer = pa.ipc.new_file(self._tmp_path, self._schema)
+        self._writer.write_batch(batch)
+
+    # --- 종료 ---
+
+    def close(self):
+        """남은 행을 쓰고, 임시 파일을 최종 경로로 rename합니다."""
+        if self.closed:
+            return
+        try:
+            if self._pending:
+                self._add_line(self._pending)
+                self._pending = ""
+            if self._columns is None:
+                raise ValueError(f"{self.path}: no header line written")
+            if self._rows or self._writer is None:
+                self._write_batch()
+            self._writer.close()
+        except BaseException:
+            self.abort()
+            raise
+
+        self.closed = True
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """지금까지 쓴 내용을 버립니다 (최종 경로의 기존 파일은 건드리지 않음)."""
+        if self.closed:
+            return
+        self.closed = True
+        self._rows = []
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            except Exception:
+                pass
+        try:
+            os.remove(self._tmp_path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def read_table(path: str, columns: Optional[Sequence[Union[int, str]]] = None):
+    """
+    Parquet/Arrow 파일을 pyarrow.Table로 읽습니다 (memory-map).
+
+    Args:
+        columns: 읽을 컬럼 (이름 또는 0부터 시작하는 위치), None이면 전체
+    """
+    _require_pyarrow(path)
+    fmt = detect_table_format(path)
+
+    if fmt == "parquet":
+        parquet_file = pq.ParquetFile(path, memory_map=True)
+        names = parquet_file.schema_arrow.names
+        selected = None if columns is None else [names[c] if isinstance(c, int) else c for c in columns]
+        return parquet_file.read(columns=selected)
+
+    if fmt == "arrow":
+        # IPC file은 버퍼를 복사하지 않고 memory-map된 영역을 그대로 사용
+        table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+        if columns is None:
+            return table
+        return table.select([table.schema.names[c] if isinstance(c, int) else c for c in columns])
+
+    raise ValueError(f"{path} is not a Parquet or Arrow IPC file")
+
+
+def read_column_lists(path: str, columns: Sequence[Union[int, str]]) -> List[list]:
+    """read_table()의 컬럼들을 Python list로 (TSV loader의 cols[i] 대신)."""
+    table = read_table(path, columns)
+    return [table.column(i).to_pylist() for i in range(table.num_columns)]
+
+
+def _format_value(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        text = repr(value)
+        return text[:-2] if text.endswith(".0") else text
+    return str(value)
+
+
+def iter_tsv_chunks(path: str, batch_rows: int = DEFAULT_BATCH_ROWS) -> Iterator[bytes]:
+    """
+    테이블을 TSV 텍스트로 batch 단위로 돌려줍니다 (header 포함, header 없는 TSV에서 만든 테이블이면 생략).
+    파일은 바로 열어서 pyarrow가 없거나 형식이 잘못되었으면 여기서 ValueError가 납니다.
+    """
+    table = read_table(path)
+
+    def chunks():
+        metadata = table.schema.metadata or {}
+        if metadata.get(_HEADER_METADATA_KEY) != b"false":
+            yield ("\t".join(table.schema.names) + "\n").encode()
+
+        for batch in table.to_batches(max_chunksize=batch_rows):
+            columns = [[_format_value(v) for v in column.to_pylist()] for column in batch.columns]
+            yield "".join("\t".join(row) + "\n" for row in zip(*columns)).encode()
+
+    return chunks()
+
+
+def convert(input_file: str, output_file: str, columns: Optional[Sequence[str]] = None):
+    """TSV ↔ Parquet/Arrow 변환 (입력/출력 형식은 각각 확장자/magic byte로 결정)."""
+    from compressed_io import open_input
+    from output_io import open_output
+
+    with open_input(input_file) as src, open_output(output_file, columns=columns) as dst:
+        for line in src:
+            dst.write(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="TSV 테이블을 Parquet/Arrow IPC로 (또는 반대로) 변환합니다.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+예시:
+  cd scripts
+  python table_io.py ../intermediate/loc_protein_map.tsv ../intermediate/loc_protein_map.parquet
+  python table_io.py --blast ../intermediate/blast_results_complete.txt ../intermediate/blast_results.arrow
+  python table_io.py ../results/final_gene_symbol_map_COMPLETE.parquet ../results/final.tsv
+        """
+    )
+
+    parser.add_argument("input_file", metavar="INPUT", help="입력 파일 (TSV, .gz/.zst, .parquet, .arrow)")
+    parser.add_argument("output_file", metavar="OUTPUT", help="출력 파일 (확장자로 형식 결정, .tsv/.gz면 TSV)")
+    parser.add_argument(
+        "--blast",
+        action="store_true",
+        help="입력이 header 없는 BLAST outfmt 6 (컬럼 이름: qseqid sseqid pident ...)"
+    )
+
+    args = parser.parse_args()
+
+    if pa is None:
+        parser.error("pyarrow is required (pip install pyarrow)")
+
+    columns = BLAST_COLUMNS if args.blast and table_format(args.output_file) else None
+    try:
+        convert(args.input_file, args.output_file, columns)
+    except (IOError, ValueError) as e:
+        print(f"Error converting {args.input_file}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
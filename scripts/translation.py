@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+DNA → protein 번역 엔진.
+
+- reverse_complement: bytes.translate 한 번으로 보수 변환 (A/C/G/T 외의 염기는 N)
+- translate / translate_many: 코돈을 0-63 index로 바꿔 64-entry 번역표에서 조회
+  (N 등 모호한 염기가 포함된 코돈은 X). NumPy가 있으면 여러 CDS를 한 번에 벡터 연산으로
+  번역하고, 없으면 순수 Python 경로를 사용합니다.
+
+NCBI genetic code 번호(1=표준, 5=무척추동물 미토콘드리아 등)를 지원합니다.
+"""
+
+from typing import Dict, List, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # NumPy가 없으면 순수 Python 경로 사용
+    np = None
+
+# 코돈 순서: 첫째/둘째/셋째 염기 모두 T, C, A, G 순 (NCBI gc.prt 형식)
+_BASES = "TCAG"
+
+# NCBI genetic code table (https://www.ncbi.nlm.nih.gov/Taxonomy/Utils/wprintgc.cgi)
+GENETIC_CODES: Dict[int, str] = {
+    1: "FFLLSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",   # Standard
+    2: "FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIMMTTTTNNKKSS**VVVVAAAADDEEGGGG",   # Vertebrate Mitochondrial
+    3: "FFLLSSSSYY**CCWWTTTTPPPPHHQQRRRRIIMMTTTTNNKKSSRRVVVVAAAADDEEGGGG",   # Yeast Mitochondrial
+    4: "FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",   # Mold/Protozoan Mitochondrial
+    5: "FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIMMTTTTNNKKSSSSVVVVAAAADDEEGGGG",   # Invertebrate Mitochondrial
+    6: "FFLLSSSSYYQQCC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",   # Ciliate Nuclear
+    9: "FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIIMTTTTNNNKSSSSVVVVAAAADDEEGGGG",   # Echinoderm/Flatworm Mito
+    10: "FFLLSSSSYY**CCCWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",  # Euplotid Nuclear
+    11: "FFLLSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",  # Bacterial/Plastid
+    12: "FFLLSSSSYY**CC*WLLLSPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",  # Alternative Yeast Nuclear
+    13: "FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIMMTTTTNNKKSSGGVVVVAAAADDEEGGGG",  # Ascidian Mitochondrial
+    14: "FFLLSSSSYYY*CCWWLLLLPPPPHHQQRRRRIIIMTTTTNNNKSSSSVVVVAAAADDEEGGGG",  # Alternative Flatworm Mito
+    16: "FFLLSSSSYY*LCC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",  # Chlorophycean Mito
+    21: "FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIMMTTTTNNNKSSSSVVVVAAAADDEEGGGG",  # Trematode Mitochondrial
+    22: "FFLLSS*SYY*LCC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",  # Scenedesmus obliquus Mito
+    23: "FF*LSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",  # Thraustochytrium Mito
+    24: "FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSSKVVVVAAAADDEEGGGG",  # Rhabdopleuridae Mito
+    25: "FFLLSSSSYY**CCGWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",  # SR1/Gracilibacteria
+    26: "FFLLSSSSYY**CC*WLLLAPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",  # Pachysolen tannophilus
+    29: "FFLLSSSSYYYYCC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",  # Mesodinium Nuclear
+    30: "FFLLSSSSYYEECC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",  # Peritrich Nuclear
+    31: "FFLLSSSSYYEECCWWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",  # Blastocrithidia Nuclear
+    33: "FFLLSSSSYYY*CCWWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSSKVVVVAAAADDEEGGGG",  # Cephalodiscidae Mito
+}
+
+# 보수 변환표: A/C/G/T(대문자)만 보수로, 나머지는 모두 N
+_COMPLEMENT = bytes(
+    {ord("A"): ord("T"), ord("T"): ord("A"), ord("C"): ord("G"), ord("G"): ord("C")}.get(i, ord("N"))
+    for i in range(256)
+)
+
+
+def codon_table(table_id: int = 1) -> Dict[str, str]:
+    """genetic code 번호에 해당하는 {codon: amino acid} dict (대문자 코돈 64개)."""
+    if table_id not in GENETIC_CODES:
+        raise ValueError(f"Unsupported genetic code: {table_id}")
+    amino_acids = GENETIC_CODES[table_id]
+    codons = [a + b + c for a in _BASES for b in _BASES for c in _BASES]
+    return dict(zip(codons, amino_acids))
+
+
+def reverse_complement(seq: str) -> str:
+    """DNA 서열의 보수 역순 (A/C/G/T 외의 염기는 N)."""
+    return seq.encode("ascii").translate(_COMPLEMENT)[::-1].decode("ascii")
+
+
+if np is not None:
+    # 염기 → 2-bit 코드 (T=0, C=1, A=2, G=3, 대소문자 구분 없음).
+    # 그 외 염기는 64로 두어 코돈 index가 64 이상이 되게 함 → 번역표의 64번(X)으로 clip
+    _BASE_CODE = np.full(256, 64, dtype=np.int16)
+    for _code, _base in enumerate(_BASES):
+        _BASE_CODE[ord(_base)] = _code
+        _BASE_CODE[ord(_base.lower())] = _code
+
+    _TABLE_ARRAYS = {}
+
+    def _table_array(table_id: int):
+        """65-entry 번역표 (index 0-63: 코돈, 64: 모호한 코돈 → X)."""
+        arr = _TABLE_ARRAYS.get(table_id)
+        if arr is None:
+            if table_id not in GENETIC_CODES:
+                raise ValueError(f"Unsupported genetic code: {table_id}")
+            arr = np.frombuffer((GENETIC_CODES[table_id] + "X").encode("ascii"), dtype=np.uint8)
+            _TABLE_ARRAYS[table_id] = arr
+        return arr
+
+    def _translate_bytes(dna: bytes, table_id: int) -> bytes:
+        """코돈 경계에 맞춰 이어붙인 DNA(길이는 3의 배수)를 한 번에 번역."""
+        codes = _BASE_CODE[np.frombuffer(dna, dtype=np.uint8)].reshape(-1, 3)
+        index = codes[:, 0] * 16 + codes[:, 1] * 4 + codes[:, 2]
+        np.minimum(index, 64, out=index)
+        return _table_array(table_id)[index].tobytes()
+
+    def translate_many(dna_seqs: Sequence[str], table_id: int = 1) -> List[str]:
+        """
+        여러 CDS 서열을 한 번의 벡터 연산으로 번역합니다.
+
+        각 서열 끝의 3의 배수가 아닌 나머지 염기는 버립니다 (translate와 동일).
+        """
+        trimmed = [seq[:len(seq) - len(seq) % 3] if len(seq) % 3 else seq for seq in dna_seqs]
+        protein = _translate_bytes("".join(trimmed).encode("ascii"), table_id).decode("ascii")
+
+        proteins = []
+        pos = 0
+        for seq in trimmed:
+            end = pos + len(seq) // 3
+            proteins.append(protein[pos:end])
+            pos = end
+        return proteins
+
+    def translate(dna_seq: str, table_id: int = 1) -> str:
+        """DNA 서열을 단백질로 번역 (N 등 모호한 염기가 포함된 코돈은 X)."""
+        trimmed = dna_seq[:len(dna_seq) - len(dna_seq) % 3]
+        return _translate_bytes(trimmed.encode("ascii"), table_id).decode("ascii")
+
+else:
+    def translate(dna_seq: str, table_id: int = 1) -> str:
+        """DNA 서열을 단백질로 번역 (N 등 모호한 염기가 포함된 코돈은 X)."""
+        table = codon_table(table_id)
+        dna_seq = dna_seq.upper()
+        return "".join([table.get(dna_seq[i:i+3], "X") for i in range(0, len(dna_seq) - 2, 3)])
+
+    def translate_many(dna_seqs: Sequence[str], table_id: int = 1) -> List[str]:
+        """여러 CDS 서열을 번역합니다."""
+        return [translate(seq, table_id) for seq in dna_seqs]
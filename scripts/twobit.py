@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+UCSC .2bit 게놈 파일 변환 및 random access 모듈.
+
+.2bit는 염기 하나를 2 bit로 저장하고 (T=0, C=1, A=2, G=3, byte당 4염기),
+N(및 ACGT가 아닌 문자) 구간과 soft-mask(소문자) 구간은 따로 (start, size) 목록으로 저장합니다.
+텍스트 FASTA보다 약 1/4 크기이고, 시작할 때 텍스트 파싱이나 대문자 변환이 필요 없습니다.
+UCSC twoBitToFa / faToTwoBit, pyfaidx 등 다른 도구와 같은 형식입니다.
+
+  # 한 번만 변환 (gzip/zstd FASTA도 가능)
+  python twobit.py ../data/genome.fna            # → ../data/genome.2bit
+
+  genome = TwoBitFile("genome.2bit")
+  dna = genome["NC_089186.1"][1000:2000]          # 대문자 str (IndexedFasta와 같은 사용법)
+
+ACGT가 아닌 IUPAC 문자(R, Y 등)는 faToTwoBit와 마찬가지로 N으로 저장됩니다.
+"""
+
+import sys
+import argparse
+import os
+import mmap
+import re
+import shutil
+import struct
+from bisect import bisect_right
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from fasta_index import IndexedSequence, iter_fasta
+
+TWOBIT_SIGNATURE = 0x1A412743
+
+# 한 번에 pack하는 염기 수 (4의 배수, 변환 중 메모리 사용량 제한)
+PACK_CHUNK_BASES = 1 << 22
+
+# 염기 → 2-bit 코드 숫자 ('0'~'3'). N 등은 T(0)로 저장하고 N 구간으로 덮어씀
+_CODE_TABLE = str.maketrans("TCAGtcag", "01230123")
+_NON_ACGT = re.compile(r"[^ACGTacgt]+")
+_SOFT_MASK = re.compile(r"[a-z]+")
+
+# packed byte 하나 → 4염기
+_DECODE_TABLE = [bytes(ord("TCAG"[(byte >> shift) & 3]) for shift in (6, 4, 2, 0)) for byte in range(256)]
+_LOWER_TABLE = bytes.maketrans(b"ACGTN", b"acgtn")
+
+
+def is_twobit(path: str) -> bool:
+    return path.endswith(".2bit")
+
+
+def twobit_path_for(fasta_file: str) -> str:
+    """genome.fna(.gz) → genome.2bit"""
+    base = fasta_file
+    for ext in (".gz", ".bgz", ".zst"):
+        if base.endswith(ext):
+            base = base[:-len(ext)]
+    stem, ext = os.path.splitext(base)
+    return (stem if ext in (".fa", ".fna", ".fasta", ".fas") else base) + ".2bit"
+
+
+class TwoBitEntry(NamedTuple):
+    """.2bit 인덱스의 한 행 (서열 이름, record 시작 offset)."""
+    name: str
+    offset: int
+
+
+class TwoBitRecord(NamedTuple):
+    """서열 하나의 record header."""
+    name: str
+    length: int
+    n_starts: List[int]
+    n_sizes: List[int]
+    mask_starts: List[int]
+    mask_sizes: List[int]
+    dna_offset: int
+
+
+def _runs(pattern, seq: str) -> Tuple[List[int], List[int]]:
+    starts, sizes = [], []
+    for match in pattern.finditer(seq):
+        starts.append(match.start())
+        sizes.append(match.end() - match.start())
+    return starts, sizes
+
+
+def pack_bases(seq: str) -> bytes:
+    """염기 서열 → 2-bit packed bytes (첫 염기가 상위 bit, 마지막 byte는 0으로 채움)."""
+    digits = seq.translate(_CODE_TABLE)
+    if len(digits) % 4:
+        digits += "0" * (4 - len(digits) % 4)
+    if not digits:
+        return b""
+    # 4진수 문자열 → 정수 변환은 2의 거듭제곱 진법이라 길이에 선형
+    return int(digits, 4).to_bytes(len(digits) // 4, "big")
+
+
+def _record_bytes(seq: str) -> Iterator[bytes]:
+    """서열 하나의 .2bit record (header + packed DNA)를 조각으로 돌려줍니다."""
+    n_starts, n_sizes = _runs(_NON_ACGT, seq)
+    # N 구간 안의 문자는 pack할 때 '0'이 아닌 문자로 남지 않도록 T로 바꿈
+    if n_starts:
+        seq_acgt = _NON_ACGT.sub(lambda m: "T" * len(m.group()), seq)
+    else:
+        seq_acgt = seq
+    mask_starts, mask_sizes = _runs(_SOFT_MASK, seq)
+
+    n, m = len(n_starts), len(mask_starts)
+    yield struct.pack(f"<II{n}I{n}II{m}I{m}II", len(seq), n, *n_starts, *n_sizes,
+                      m, *mask_starts, *mask_sizes, 0)
+    for i in range(0, len(seq_acgt), PACK_CHUNK_BASES):
+        yield pack_bases(seq_acgt[i:i + PACK_CHUNK_BASES])
+
+
+def fasta_to_twobit(fasta_file: str, twobit_file: str, verbose: bool = False) -> int:
+    """
+    FASTA → .2bit 변환.
+
+    record를 임시 파일에 먼저 쓰고 (인덱스 offset은 모든 서열 이름을 알아야 정해짐),
+    header + 인덱스 뒤에 붙여 twobit_file로 옮깁니다. 4 GB를 넘으면 64-bit offset(version 1)을 씁니다.
+
+    Returns:
+        서열 수
+    """
+    names: List[str] = []
+    record_offsets: List[int] = []
+    body_path = twobit_file + ".body.tmp"
+    tmp_path = twobit_file + ".tmp"
+
+    try:
+        with open(body_path, "wb") as body:
+            position = 0
+            for name, seq in iter_fasta(fasta_file, upper=False):
+                if not name:
+                    continue
+                if len(name.encode()) > 255:
+                    raise ValueError(f"sequence name longer than 255 bytes: {name[:40]}...")
+                names.append(name)
+                record_offsets.append(position)
+                for chunk in _record_bytes(seq):
+                    body.write(chunk)
+                    position += len(chunk)
+                if verbose:
+                    print(f"  {name}: {len(seq):,} bp", file=sys.stderr)
+                del seq
+
+        index_size = sum(1 + len(name.encode()) + 4 for name in names)
+        header_size = 16
+        version = 0
+        if header_size + index_size + position > 0xFFFFFFFF:
+            version = 1
+            index_size += 4 * len(names)
+        offset_format = "<Q" if version else "<I"
+        base = header_size + index_size
+
+        with open(tmp_path, "wb") as out:
+            out.write(struct.pack("<IIII", TWOBIT_SIGNATURE, version, len(names), 0))
+            for name, offset in zip(names, record_offsets):
+                encoded = name.encode()
+                out.write(bytes([len(encoded)]) + encoded + struct.pack(offset_format, base + offset))
+            with open(body_path, "rb") as body:
+                shutil.copyfileobj(body, out, 16 * 1024 * 1024)
+        os.replace(tmp_path, twobit_file)
+
+    finally:
+        for path in (body_path, tmp_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    return len(names)
+
+
+class TwoBitFile:
+    """
+    mmap 기반 .2bit reader.
+
+    IndexedFasta와 같은 방식(``chrom in genome``, ``genome[chrom][start:end]``)으로 사용할 수 있습니다.
+    record header(N/soft-mask 구간)는 서열을 처음 사용할 때 읽습니다.
+    """
+
+    def __init__(self, twobit_file: str, entries: Optional[List[TwoBitEntry]] = None):
+        self.twobit_file = twobit_file
+        self._file = open(twobit_file, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(self._mm, "madvise") and hasattr(mmap, "MADV_RANDOM"):
+            self._mm.madvise(mmap.MADV_RANDOM)
+
+        signature, version, count, _ = struct.unpack_from("<IIII", self._mm, 0)
+        if signature == TWOBIT_SIGNATURE:
+            self._endian = "<"
+        elif signature == int.from_bytes(struct.pack("<I", TWOBIT_SIGNATURE), "big"):
+            self._endian = ">"
+            version, count = struct.unpack_from(">II", self._mm, 4)
+        else:
+            self.close()
+            raise ValueError(f"{twobit_file} is not a .2bit file")
+        if version not in (0, 1):
+            self.close()
+            raise ValueError(f"{twobit_file}: unsupported .2bit version {version}")
+
+        if entries is None:
+            entries = self._read_index(count, version)
+        self._entries: Dict[str, TwoBitEntry] = {e.name: e for e in entries}
+        self._records: Dict[str, TwoBitRecord] = {}
+
+    def _read_index(self, count: int, version: int) -> List[TwoBitEntry]:
+        offset_format = self._endian + ("Q" if version else "I")
+        offset_size = struct.calcsize(offset_format)
+        entries = []
+        position = 16
+        for _ in range(count):
+            name_size = self._mm[position]
+            name = self._mm[position + 1:position + 1 + name_size].decode()
+            position += 1 + name_size
+            entries.append(TwoBitEntry(name, struct.unpack_from(offset_format, self._mm, position)[0]))
+            position += offset_size
+        return entries
+
+    def entry(self, name: str) -> TwoBitRecord:
+        """서열의 record header (처음 요청할 때 읽고 캐시)."""
+        record = self._records.get(name)
+        if record is not None:
+            return record
+
+        e = self._endian
+        position = self._entries[name].offset
+        length, n_count = struct.unpack_from(f"{e}II", self._mm, position)
+        position += 8
+        blocks = struct.unpack_from(f"{e}{2 * n_count}I", self._mm, position)
+        n_starts, n_sizes = list(blocks[:n_count]), list(blocks[n_count:])
+        position += 8 * n_count
+        mask_count, = struct.unpack_from(f"{e}I", self._mm, position)
+        position += 4
+        blocks = struct.unpack_from(f"{e}{2 * mask_count}I", self._mm, position)
+        mask_starts, mask_sizes = list(blocks[:mask_count]), list(blocks[mask_count:])
+        position += 8 * mask_count + 4  # reserved
+
+        record = self._records[name] = TwoBitRecord(name, length, n_starts, n_sizes, mask_starts, mask_sizes,
+                                                    position)
+        return record
+
+    def fetch_entry(self, record: TwoBitRecord, start: int, end: int, soft_mask: bool = False) -> str:
+        """record의 0-based [start, end) 구간을 str로 반환 (기본: 대문자, 범위는 서열 길이로 잘림)."""
+        start = max(start, 0)
+        end = min(end, record.length)
+        if start >= end:
+            return ""
+
+        packed = self._mm[record.dna_offset + start // 4:record.dna_offset + (end - 1) // 4 + 1]
+        skip = start % 4
+        dna = b"".join(map(_DECODE_TABLE.__getitem__, packed))[skip:skip + end - start]
+
+        n_blocks = self._overlapping(record.n_starts, record.n_sizes, start, end) if record.n_starts else []
+        mask_blocks = (self._overlapping(record.mask_starts, record.mask_sizes, start, end)
+                       if soft_mask and record.mask_starts else [])
+        if n_blocks or mask_blocks:
+            dna = bytearray(dna)
+            for block_start, block_end in n_blocks:
+                dna[block_start - start:block_end - start] = b"N" * (block_end - block_start)
+            for block_start, block_end in mask_blocks:
+                part = slice(block_start - start, block_end - start)
+                dna[part] = dna[part].translate(_LOWER_TABLE)
+
+        return dna.decode("ascii")
+
+    @staticmethod
+    def _overlapping(starts: List[int], sizes: List[int], start: int, end: int) -> List[Tuple[int, int]]:
+        """[start, end)와 겹치는 구간들 (구간은 정렬되어 있고 겹치지 않음)."""
+        blocks = []
+        i = max(bisect_right(starts, start) - 1, 0)
+        while i < len(starts) and starts[i] < end:
+            block_start, block_end = max(starts[i], start), min(starts[i] + sizes[i], end)
+            if block_start < block_end:
+                blocks.append((block_start, block_end))
+            i += 1
+        return blocks
+
+    def fetch(self, name: str, start: int, end: int, soft_mask: bool = False) -> str:
+        """서열 이름과 0-based [start, end) 구간으로 서열을 가져옵니다."""
+        return self.fetch_entry(self.entry(name), start, end, soft_mask)
+
+    def entries(self) -> Iterator[TwoBitEntry]:
+        """인덱스를 파일 순서대로 반환 (worker process에 넘길 때 사용)."""
+        return iter(self._entries.values())
+
+    def __contains__(self, name) -> bool:
+        return name in self._entries
+
+    def __getitem__(self, name: str) -> IndexedSequence:
+        return IndexedSequence(self, self.entry(name))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def keys(self):
+        return self._entries.keys()
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="게놈 FASTA를 UCSC .2bit 형식으로 변환합니다 (extract_proteins_from_gtf.py에서 바로 사용 가능).",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+예시:
+  cd scripts
+  python twobit.py ../data/genome.fna                      # → ../data/genome.2bit
+  python extract_proteins_from_gtf.py ../data/annotation.gtf ../data/genome.2bit
+        """
+    )
+
+    parser.add_argument(
+        "fasta_file",
+        metavar="FASTA_FILE",
+        help="입력 게놈 FASTA (gzip/zstd 압축 가능)"
+    )
+
+    parser.add_argument(
+        "-o", "--output",
+        metavar="OUTPUT",
+        help="출력 .2bit 파일 (기본값: 입력 파일 이름의 확장자를 .2bit로 바꿈)"
+    )
+
+    parser.add_argument(
+        "-v", "--verbose",
+        action="store_true",
+        help="서열별 길이 출력"
+    )
+
+    args = parser.parse_args()
+
+    output = args.output or twobit_path_for(args.fasta_file)
+    print(f"Converting {args.fasta_file} → {output}...", file=sys.stderr)
+    try:
+        count = fasta_to_twobit(args.fasta_file, output, args.verbose)
+    except (IOError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Wrote {count} sequences ({os.path.getsize(output):,} bytes, "
+          f"FASTA: {os.path.getsize(args.fasta_file):,} bytes)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()